@@ -1,14 +1,21 @@
-import requests
 import json
 import os
+import sys
 from dotenv import load_dotenv
 import logging
 import psycopg2
 from utils.db_connection import DatabaseConnection
 
+# HTTP client and run reports are shared with the import scripts
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "scripts")))
+from http_client import HttpClient
+from etl_profiler import db_time, etl_run, record_rows, stage
+
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+client = HttpClient()
+
 
 def load_coordinates_from_db():
     """
@@ -26,8 +33,9 @@ def load_coordinates_from_db():
     try:
         with db_connector as conn:
             with conn.cursor() as cur:
-                cur.execute(sql_search)
-                rows = cur.fetchall()
+                with db_time():
+                    cur.execute(sql_search)
+                    rows = cur.fetchall()
                 if not rows:
                     print("No data found in the database.")
                     return []
@@ -54,7 +62,7 @@ def fetch_air_quality_data(lat, lon):
     """
     url = f"http://api.openweathermap.org/data/2.5/air_pollution?lat={lat}&lon={lon}&appid={os.getenv("AIR_QUALITY_KEY")}"
 
-    response = requests.get(url)
+    response = client.get(url)
 
     if response.status_code != 200:
         logging.error(f"An unexpected error occurred status code: {response.status_code}")
@@ -66,28 +74,37 @@ def fetch_air_quality_data(lat, lon):
 
 
 def main():
-    result = load_coordinates_from_db()
+    with etl_run("air_quality_api"):
+        fetch_and_save()
+
+
+def fetch_and_save():
+    with stage("load_clusters"):
+        result = load_coordinates_from_db()
+        record_rows(read=len(result or []))
     if not result:
         logging.error("No data found in the database.")
         return
 
     output = []
-    for row in result:
-        cluster_id, lat, lon = row[0], float(row[1]), float(row[2])
-        air_quality_data = fetch_air_quality_data(lat, lon)
-        if air_quality_data is None:
-            logging.error(f"Failed to fetch air quality data for coordinates: {lat}, {lon}")
-            continue
-        output.append(
-            {
-                "cluster_id": cluster_id,
-                "air_quality_data": air_quality_data.get("list")
-            }
-        )
-        logging.info(f"Air quality data for cluster ID {cluster_id} obtained successfully.")
-
-    with open("../raw_data/air_quality_data.json", "w") as f:
+    with stage("fetch_air_quality"):
+        for row in result:
+            cluster_id, lat, lon = row[0], float(row[1]), float(row[2])
+            air_quality_data = fetch_air_quality_data(lat, lon)
+            if air_quality_data is None:
+                logging.error(f"Failed to fetch air quality data for coordinates: {lat}, {lon}")
+                continue
+            output.append(
+                {
+                    "cluster_id": cluster_id,
+                    "air_quality_data": air_quality_data.get("list")
+                }
+            )
+            logging.info(f"Air quality data for cluster ID {cluster_id} obtained successfully.")
+
+    with stage("save"), open("../raw_data/air_quality_data.json", "w") as f:
         json.dump(output, f, indent=4)
+        record_rows(written=len(output))
 
 if __name__ == "__main__":
     main()
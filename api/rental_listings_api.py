@@ -1,12 +1,19 @@
-import requests
 import json
 import os
+import sys
 from dotenv import load_dotenv
 
+# HTTP client and run reports are shared with the import scripts
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "scripts")))
+from http_client import HttpClient
+from etl_profiler import etl_run, record_rows, stage
+
 load_dotenv()
 
 STATE = ["DC", "VA", "MD", "WV"]
 
+client = HttpClient()
+
 def fetch_rental_listings(state, limit=500, offset=0) -> list:
     """
     Fetch rental listings from the RentCast API.
@@ -29,7 +36,7 @@ def fetch_rental_listings(state, limit=500, offset=0) -> list:
         }
         
         print(f"Fetching {state} listings with offset {offset}...")
-        response = requests.get(url, headers=headers)
+        response = client.get(url, headers=headers)
 
         if response.status_code != 200:
             print(f"Error: {response.status_code}")
@@ -38,6 +45,7 @@ def fetch_rental_listings(state, limit=500, offset=0) -> list:
         
         data = response.json()
         listings.extend(data)
+        record_rows(read=len(data))
         print(f"Retrieved {len(data)} listings for {state}")
         
         # Check if we are at the last page
@@ -54,12 +62,18 @@ def main():
     """
     Main function to fetch rental listings for multiple states and save them to a JSON file.
     """
+    with etl_run("rental_listings_api"):
+        fetch_and_save()
+
+
+def fetch_and_save():
     all_listings = []
 
     for state in STATE:
         # Fetch rental listings for each state
         print(f"Fetching rental listings for {state}...")
-        rental_listings = fetch_rental_listings(state)
+        with stage(f"fetch_{state}"):
+            rental_listings = fetch_rental_listings(state)
         all_listings.extend(rental_listings)
         print(f"Total listings fetched for {state}: {len(rental_listings)}")
 
@@ -76,8 +90,9 @@ def main():
     output_file = os.path.join(output_dir, "dmv_rental_listings.json")
 
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
+        with stage("save"), open(output_file, "w", encoding="utf-8") as f:
             json.dump(all_listings, f, ensure_ascii=False, indent=4)
+            record_rows(written=len(all_listings))
         print(f"Data successfully saved to {output_file}")
     except Exception as e:
         print(f"Error saving data: {e}")
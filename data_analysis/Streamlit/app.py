@@ -1,24 +1,42 @@
 import streamlit as st
 import pandas as pd
-import folium
+import pydeck as pdk
 import branca.colormap as cm
-from streamlit_folium import st_folium
 import numpy as np
-import streamlit.components.v1 as components
+import matplotlib.image
+import base64
+import io
+import os
+import sys
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, root)
+from server.utils.feature_snapshot import open_snapshot, partition_slices
 
 # --- Page Configuration ---
 st.set_page_config(layout="wide")
 
 # --- Constants ---
 DEFAULT_ZOOM = 9
-SAMPLING_THRESHOLD = 5000
-SAMPLING_SIZE = 2000
+POINT_RADIUS_PIXELS = 3
 
-HEATMAP_FILES = {
-    "# of Nearby Parks": "../EDA/heatmap_nearby_parks.html",
-    "# of Nearby Bus Stops": "../EDA/heatmap_nearby_bus_stops.html"
+# Label -> column; only columns present in the loaded data are offered
+MAP_FEATURES = {
+    "QoL (0-1)": "QoL_0_1",
+    "Price": "price",
+    "Walkability (NWI)": "nwi_score",
+    "AQI": "aqi",
+    "# of Nearby Bus Stops": "nearby_bus_stops",
+    "# of Nearby Bus Routes": "nearby_routes",
+    "# of Nearby Parks": "nearby_parks",
+    "Nearest Bus Stop (mi)": "nearest_bus_stop_miles",
+    "Nearest Park (mi)": "nearest_park_miles",
+    "Crime density (per km²)": "crime_density",
 }
 
+HEATMAP_BINS = 80
+HEATMAP_STATS = {"Mean value": "mean", "Listing count": "count"}
+
 # --- Data Loading ---
 @st.cache_data
 def load_main_data(path):
@@ -26,41 +44,177 @@ def load_main_data(path):
     df = df[["listing_db_id", "latitude", "longitude", "QoL_0_1"]]
     return df.dropna(subset=["latitude", "longitude", "QoL_0_1"])
 
+@st.cache_resource
+def partition_frames():
+    # {"frames": partition hash -> DataFrame}; outlives snapshot versions so unchanged partitions are reused.
+    # Sessions share it: the mapping is replaced as a whole, never modified in place, so readers need no lock.
+    return {"frames": {}}
+
+@st.cache_data(max_entries=2)
+def load_snapshot_data(_snapshot, version):
+    """Listings of ``_snapshot``; it is not hashed, ``version`` (its own manifest's) is the cache key."""
+    columns = ["listing_db_id", "latitude", "longitude", "state", "county", "qol_score"]
+    columns += [c for c in MAP_FEATURES.values() if c in _snapshot.table.column_names]
+
+    # Only partitions whose hash changed since the last version are converted
+    shared = partition_frames()
+    cached = shared["frames"]
+    frames, current, reloaded = [], {}, 0
+    for entry, part in partition_slices(_snapshot):
+        frame = cached.get(entry["hash"]) if entry["hash"] else None
+        if frame is None:
+            frame = part.select(columns).to_pandas()
+            reloaded += 1
+        if entry["hash"]:
+            current[entry["hash"]] = frame
+        frames.append(frame)
+    shared["frames"] = current
+
+    df = pd.concat(frames, ignore_index=True)
+    df.attrs["partitions"] = (reloaded, len(frames))
+    df["QoL_0_1"] = normalized(df.pop("qol_score"))
+    # Missing feature values are dropped per feature when the map is built
+    return df.dropna(subset=["latitude", "longitude"])
+
+def normalized(values):
+    """``values`` rescaled to [0, 1]; a constant score maps to 0 and missing scores stay NaN."""
+    low, high = values.min(), values.max()
+    if pd.isna(low) or high == low:
+        # Empty, all-NaN or single-valued: there is no span to divide by
+        return values.where(values.isna(), 0.0).astype(float)
+    return (values - low) / (high - low)
+
 # --- Map Builder ---
-def create_qol_map(df, feature="QoL_0_1", zoom=DEFAULT_ZOOM):
-    lat0, lon0 = df.latitude.mean(), df.longitude.mean()
-    m = folium.Map(location=[lat0, lon0], zoom_start=zoom)
-
-    plot_df = df.sample(n=SAMPLING_SIZE, random_state=42) if len(df) > SAMPLING_THRESHOLD else df
-    plot_df = plot_df.dropna(subset=[feature])
-    if plot_df.empty:
-        return m
-
-    vmin, vmax = plot_df[feature].min(), plot_df[feature].quantile(0.95)
-    cmap = cm.linear.viridis.scale(vmin, vmax)
-    cmap.caption = feature
-    m.add_child(cmap)
-
-    for _, row in plot_df.iterrows():
-        val = row[feature]
-        folium.CircleMarker(
-            [row.latitude, row.longitude],
-            radius=4,
-            color=cmap(val),
-            fill=True, fill_color=cmap(val), fill_opacity=0.7,
-            popup=f"{feature}: {val:.3f}"
-        ).add_to(m)
-    return m
+def colormap_rgb(values, vmin, vmax, cmap=cm.linear.viridis):
+    """RGB (n x 3, uint8) for ``values`` on ``cmap`` between vmin and vmax, interpolated per channel."""
+    stops = np.asarray(cmap.colors)[:, :3] * 255
+    positions = np.linspace(0.0, 1.0, len(stops))
+    t = np.clip((np.asarray(values, dtype=float) - vmin) / ((vmax - vmin) or 1.0), 0.0, 1.0)
+    return np.column_stack([np.interp(t, positions, stops[:, i]) for i in range(3)]).astype(np.uint8)
+
+@st.cache_data(max_entries=32)
+def build_point_data(_df, data_key, feature, states):
+    """
+    Columnar point data for one feature and state filter.
+
+    ``_df`` is not hashed; ``data_key`` (snapshot version or CSV path),
+    ``feature`` and ``states`` are the cache key.
+    """
+    df = _df if not states else _df[_df["state"].isin(states)]
+    df = df[np.isfinite(df[feature].to_numpy(dtype=float))]
+    values = df[feature].to_numpy(dtype=float)
+    if not len(values):
+        return None, None, None
+    vmin, vmax = float(values.min()), float(np.quantile(values, 0.95))
+    rgb = colormap_rgb(values, vmin, vmax)
+    points = pd.DataFrame({
+        "listing_db_id": df["listing_db_id"].to_numpy(),
+        "lon": df["longitude"].to_numpy().round(6),
+        "lat": df["latitude"].to_numpy().round(6),
+        "value": values.round(3),
+        "r": rgb[:, 0],
+        "g": rgb[:, 1],
+        "b": rgb[:, 2],
+    })
+    return points, vmin, vmax
+
+def create_qol_map(points, feature, zoom=DEFAULT_ZOOM):
+    """A single WebGL scatterplot layer over every listing; no per-row markers."""
+    layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=points,
+        get_position="[lon, lat]",
+        get_fill_color="[r, g, b, 180]",
+        get_radius=POINT_RADIUS_PIXELS,
+        radius_units="pixels",
+        pickable=True,
+    )
+    view = pdk.ViewState(latitude=float(points.lat.mean()), longitude=float(points.lon.mean()), zoom=zoom)
+    return pdk.Deck(
+        layers=[layer],
+        initial_view_state=view,
+        map_style=None,
+        tooltip={"text": f"Listing {{listing_db_id}}\n{feature}: {{value}}"},
+    )
+
+# --- Heatmap Builder ---
+def binned_grid(lat, lon, values, bounds, bins, stat="mean"):
+    """
+    ``bins`` x ``bins`` grid over ``bounds`` (south, west, north, east) with
+    the mean of ``values`` (or the listing count) per cell; NaN where empty.
+    Rows run north to south, as in an image.
+    """
+    south, west, north, east = bounds
+    edges = (np.linspace(south, north, bins + 1), np.linspace(west, east, bins + 1))
+    counts, _, _ = np.histogram2d(lat, lon, bins=edges)
+    if stat == "count":
+        grid = counts
+    else:
+        sums, _, _ = np.histogram2d(lat, lon, bins=edges, weights=values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            grid = sums / counts
+    return np.where(counts > 0, grid, np.nan)[::-1]
+
+@st.cache_data(max_entries=64)
+def build_heatmap(_df, data_key, feature, counties, price_band, bins, stat):
+    """
+    Heatmap PNG (data URL) for one parameter set, with its bounds, color range and listing count.
+
+    Streamlit keeps the 64 most recently used parameter sets; ``_df`` is not
+    hashed, ``data_key`` stands in for it.
+    """
+    df = _df if not counties else _df[_df["county"].isin(counties)]
+    if price_band is not None:
+        df = df[df["price"].between(*price_band)]
+    df = df[np.isfinite(df[feature].to_numpy(dtype=float))]
+    if df.empty:
+        return None
+    lat, lon = df["latitude"].to_numpy(), df["longitude"].to_numpy()
+    south, north, west, east = lat.min(), lat.max(), lon.min(), lon.max()
+    # A single listing (or a straight line of them) still gets a visible cell
+    pad_lat, pad_lon = max((north - south) * 0.01, 0.005), max((east - west) * 0.01, 0.005)
+    bounds = (south - pad_lat, west - pad_lon, north + pad_lat, east + pad_lon)
+    grid = binned_grid(lat, lon, df[feature].to_numpy(dtype=float), bounds, bins, stat)
+
+    filled = ~np.isnan(grid)
+    vmin, vmax = float(grid[filled].min()), float(np.quantile(grid[filled], 0.95))
+    rgba = np.zeros(grid.shape + (4,), dtype=np.uint8)
+    rgba[filled, :3] = colormap_rgb(grid[filled], vmin, vmax)
+    rgba[filled, 3] = 200
+    buf = io.BytesIO()
+    matplotlib.image.imsave(buf, rgba, format="png")
+    image = "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+    return image, bounds, vmin, vmax, len(df)
+
+def create_heatmap(image, bounds, zoom=DEFAULT_ZOOM):
+    south, west, north, east = bounds
+    layer = pdk.Layer("BitmapLayer", image=image, bounds=[west, south, east, north], opacity=0.8)
+    view = pdk.ViewState(latitude=(south + north) / 2, longitude=(west + east) / 2, zoom=zoom)
+    return pdk.Deck(layers=[layer], initial_view_state=view, map_style=None)
 
 # --- App Start ---
 st.title("Rental Listing Explorer")
 
-# Load data once
-df = load_main_data("../EDA/final_rental_listings_with_qol.csv")
+# Load data once, from the feature snapshot when one is published. The version comes from the opened
+# snapshot itself, so a manifest swapped in between cannot pair one version's key with another's data.
+snapshot = open_snapshot()
+if snapshot is not None:
+    manifest = snapshot.manifest
+    df = load_snapshot_data(snapshot, manifest["version"])
+    data_key = f"snapshot-{manifest['version']}"
+    reloaded, total = df.attrs.get("partitions", (0, 0))
+    st.sidebar.caption(
+        f"Feature snapshot v{manifest['version']} ({manifest['created_at'][:19]} UTC); "
+        f"{reloaded} of {total} partitions reloaded."
+    )
+else:
+    data_key = "../EDA/final_rental_listings_with_qol.csv"
+    df = load_main_data(data_key)
+    st.sidebar.warning("No feature snapshot published; showing the static CSV export.")
 
 # Sidebar
 st.sidebar.header("View Options")
-choice = st.sidebar.radio("Select view:", ["QoL Map", "Static Heatmaps"])
+choice = st.sidebar.radio("Select view:", ["QoL Map", "Heatmaps"])
 
 # Main
 if df is None or df.empty:
@@ -68,17 +222,40 @@ if df is None or df.empty:
 else:
     if choice == "QoL Map":
         st.header("Quality-of-Life Map")
-        qol_map = create_qol_map(df)
-        st_folium(qol_map, width=1000, height=600)
-
-    elif choice == "Static Heatmaps":
-        st.header("Pre-generated Static Heatmaps")
-        selected = st.sidebar.selectbox("Which heatmap?", list(HEATMAP_FILES.keys()))
-        path = HEATMAP_FILES[selected]
-        try:
-            html = open(path, "r", encoding="utf-8").read()
-            components.html(html, height=600, scrolling=True)
-        except FileNotFoundError:
-            st.error(f"Heatmap file not found:\n{path}")
-        except Exception as e:
-            st.error(f"Error loading heatmap:\n{e}")
\ No newline at end of file
+        features = {label: col for label, col in MAP_FEATURES.items() if col in df.columns}
+        label = st.sidebar.selectbox("Color by:", list(features))
+        states = ()
+        if "state" in df.columns:
+            states = tuple(sorted(st.sidebar.multiselect("States:", sorted(df["state"].dropna().unique()))))
+        points, vmin, vmax = build_point_data(df, data_key, features[label], states)
+        if points is None:
+            st.warning("No listings match the selection.")
+        else:
+            st.caption(f"{len(points):,} listings. {label}: {vmin:.3f} (purple) to {vmax:.3f} (yellow, 95th percentile)")
+            st.pydeck_chart(create_qol_map(points, label), height=600)
+
+    elif choice == "Heatmaps":
+        st.header("Feature Heatmaps")
+        features = {label: col for label, col in MAP_FEATURES.items() if col in df.columns}
+        label = st.sidebar.selectbox("Feature:", list(features))
+        stat_label = st.sidebar.radio("Cell value:", list(HEATMAP_STATS))
+        bins = st.sidebar.slider("Grid cells per side:", 20, 200, HEATMAP_BINS, step=10)
+        counties = ()
+        if "county" in df.columns:
+            counties = tuple(sorted(st.sidebar.multiselect("Counties:", sorted(df["county"].dropna().unique()))))
+        price_band = None
+        if "price" in df.columns and df["price"].notna().any():
+            low, high = int(df["price"].min()), int(df["price"].max())
+            selected = st.sidebar.slider("Price band ($):", low, high, (low, high), step=50)
+            price_band = None if selected == (low, high) else selected
+
+        heatmap = build_heatmap(
+            df, data_key, features[label], counties, price_band, bins, HEATMAP_STATS[stat_label]
+        )
+        if heatmap is None:
+            st.warning("No listings match the selection.")
+        else:
+            image, bounds, vmin, vmax, n = heatmap
+            shown = label if HEATMAP_STATS[stat_label] == "mean" else "listings per cell"
+            st.caption(f"{n:,} listings. {shown}: {vmin:.3f} (purple) to {vmax:.3f} (yellow, 95th percentile)")
+            st.pydeck_chart(create_heatmap(image, bounds), height=600)
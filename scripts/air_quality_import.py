@@ -2,6 +2,7 @@ import logging
 import json
 import psycopg2
 from utils.db_connection import DatabaseConnection
+from etl_profiler import db_time, etl_run, record_rows, stage
 
 
 def ugm3_to_ppb(c_ugm3, molecular_weight):
@@ -136,6 +137,7 @@ def read_and_import():
     # Read file
     with open("../raw_data/air_quality_data.json", "r") as f:
         data = json.load(f)
+    record_rows(read=len(data))
 
     # Connect to the database
     db_connection = DatabaseConnection()
@@ -154,14 +156,16 @@ def read_and_import():
                     output_json = process_air_quality_data(air_quality_data)
 
                     try:
-                        cursor.execute(
-                            insert_sql,
-                            (
-                                cluster_id,
-                                output_json["aqi"],
-                                output_json["category"]
+                        with db_time():
+                            cursor.execute(
+                                insert_sql,
+                                (
+                                    cluster_id,
+                                    output_json["aqi"],
+                                    output_json["category"]
+                                )
                             )
-                        )
+                        record_rows(written=1)
                         logging.info(f"Inserted air quality data for cluster ID {cluster_id} into the database.")
                     except psycopg2.Error as e:
                         logging.error(f"Error inserting data for cluster ID {cluster_id}: {e}")
@@ -180,7 +184,8 @@ def read_and_import():
 
 
 def main():
-    read_and_import()
+    with etl_run("air_quality"), stage("import"):
+        read_and_import()
 
 
 if __name__ == "__main__":
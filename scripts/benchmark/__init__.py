@@ -0,0 +1,3 @@
+from .baseline import compare, load_baseline, save_results
+from .load import run_load
+from .seed import SCALES, parse_scale, seed_database
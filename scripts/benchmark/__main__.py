@@ -0,0 +1,186 @@
+import os
+import sys
+import socket
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+from .baseline import DEFAULT_TOLERANCE, baseline_path, compare, load_baseline, save_results
+from .load import ENDPOINTS, run_load
+from .seed import DEFAULT_BUS_STOPS, DEFAULT_PARKS, ROOT, connection_params, parse_scale, seed_database, server_env, start_embedded
+from .server import DEFAULT_SERVER_CMD, server_memory_mb, start_server, stop_server, wait_until_ready
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_DB_NAME = "rental_bench"
+DEFAULT_EMBEDDED_DIR = os.path.join(tempfile.gettempdir(), "rental-bench-pg")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _connect(args):
+    embedded = start_embedded(args.embedded_dir) if args.embedded else None
+    return embedded, connection_params(embedded)
+
+
+def _build_snapshot(env, directory: str):
+    # Same entry point as production; runs in this (scripts) environment
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "scripts", "build_feature_snapshot.py"), "--dir", directory],
+        env=env,
+        check=True,
+    )
+
+
+def seed(args):
+    embedded, params = _connect(args)
+    summary = seed_database(
+        params, args.db_name, parse_scale(args.scale), args.embedded, args.bus_stops, args.parks, args.seed
+    )
+    logging.info(f"Seeded {args.db_name}: {summary}")
+
+
+def run(args):
+    backend = "embedded" if args.embedded else "postgis"
+    n_listings = parse_scale(args.scale)
+    embedded, params = _connect(args)
+
+    seed_summary = None
+    if not args.skip_seed:
+        seed_summary = seed_database(
+            params, args.db_name, n_listings, args.embedded, args.bus_stops, args.parks, args.seed
+        )
+
+    with tempfile.TemporaryDirectory(prefix="rental-bench-snapshot-") as snapshot_dir:
+        env = server_env(params, args.db_name, snapshot_dir)
+        if args.no_cache:
+            for name in ("RENTAL_SCORE", "BUS_STOPS", "PARKS"):
+                env[f"CACHE_TTL_{name}"] = "0"
+                env[f"CACHE_STALE_TTL_{name}"] = "0"
+        if not args.no_snapshot:
+            _build_snapshot(env, snapshot_dir)
+
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        process = start_server(env, port, args.server_cmd)
+        try:
+            wait_until_ready(base_url, process)
+            memory_at_start = server_memory_mb(process.pid)
+            runs = []
+            for endpoint in args.endpoints:
+                for concurrency in args.concurrency:
+                    result = run_load(
+                        base_url, endpoint, n_listings, concurrency, args.duration, args.warmup, args.seed
+                    )
+                    result["memory"] = server_memory_mb(process.pid)
+                    runs.append(result)
+                    if not result["requests"]:
+                        logging.warning(f"{endpoint} @ {concurrency}: no request finished in time; raise --duration.")
+                    logging.info(
+                        f"{endpoint} @ {concurrency}: {result['throughput_rps']} req/s, "
+                        f"p50 {result.get('p50_ms')} ms, p95 {result.get('p95_ms')} ms, "
+                        f"p99 {result.get('p99_ms')} ms, {result['errors']} errors"
+                    )
+            memory_at_end = server_memory_mb(process.pid)
+        finally:
+            stop_server(process)
+
+    results = {
+        "backend": backend,
+        "scale": args.scale,
+        "listings": n_listings,
+        "snapshot": not args.no_snapshot,
+        "cache": not args.no_cache,
+        "git_commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "seed": seed_summary,
+        "memory": {
+            "start_rss_mb": (memory_at_start or {}).get("rss_mb"),
+            "end_rss_mb": (memory_at_end or {}).get("rss_mb"),
+            "peak_rss_mb": (memory_at_end or {}).get("peak_rss_mb"),
+        },
+        "runs": runs,
+    }
+
+    output = args.output or os.path.join(
+        ROOT, "scripts", "benchmark", "results", f"{backend}-{args.scale}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    save_results(results, output)
+    logging.info(f"Results saved to {output}")
+
+    path = baseline_path(backend, args.scale)
+    if args.update_baseline:
+        save_results(results, path)
+        logging.info(f"Baseline updated: {path}")
+        return
+
+    baseline = load_baseline(path)
+    if baseline is None:
+        logging.info(f"No baseline at {path}; run with --update-baseline to record one.")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        for line in regressions:
+            logging.error(f"Regression: {line}")
+        sys.exit(1)
+    logging.info(f"No regressions against {path} (tolerance {args.tolerance:.0%}).")
+
+
+def _add_database_args(parser):
+    parser.add_argument("--scale", default="10k", help="1k, 10k, 100k, 1m or a listing count.")
+    parser.add_argument("--db-name", default=DEFAULT_DB_NAME, help="Benchmark database (dropped and recreated).")
+    parser.add_argument("--embedded", action="store_true", help="Use an embedded Postgres stand-in (pgserver, no PostGIS).")
+    parser.add_argument("--embedded-dir", default=DEFAULT_EMBEDDED_DIR, help="Data directory of the embedded Postgres.")
+    parser.add_argument("--bus-stops", type=int, default=DEFAULT_BUS_STOPS, help="Synthetic bus stops.")
+    parser.add_argument("--parks", type=int, default=DEFAULT_PARKS, help="Synthetic parks and other leisure places.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data and request order.")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmark", description="HTTP benchmarks of the rental score API.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = subparsers.add_parser("seed", help="Create and seed the benchmark database only.")
+    _add_database_args(seed_parser)
+    seed_parser.set_defaults(func=seed)
+
+    run_parser = subparsers.add_parser("run", help="Seed, start the server, drive it and compare to the baseline.")
+    _add_database_args(run_parser)
+    run_parser.add_argument("--skip-seed", action="store_true", help="Reuse the already seeded database.")
+    run_parser.add_argument(
+        "--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=list(ENDPOINTS), help="Endpoints to drive."
+    )
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrency levels.")
+    run_parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per level.")
+    run_parser.add_argument("--warmup", type=float, default=2.0, help="Unrecorded seconds before each level.")
+    run_parser.add_argument("--no-snapshot", action="store_true", help="Serve from Postgres instead of a snapshot.")
+    run_parser.add_argument("--no-cache", action="store_true", help="Disable the response caches (TTLs of 0).")
+    run_parser.add_argument("--server-cmd", default=DEFAULT_SERVER_CMD, help="Server command, run in server/; {port} is filled in.")
+    run_parser.add_argument("--output", default=None, help="Results file (default: benchmark/results/...).")
+    run_parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline.")
+    run_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative regression.")
+    run_parser.set_defaults(func=run)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import json
+from typing import Dict, List, Optional
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# Relative change beyond which a metric counts as a regression
+DEFAULT_TOLERANCE = 0.15
+
+
+def baseline_path(backend: str, scale: str, directory: str = BASELINE_DIR) -> str:
+    return os.path.join(directory, f"{backend}-{scale}.json")
+
+
+def load_baseline(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Regressions of ``results`` against ``baseline``, as readable lines.
+
+    Per endpoint and concurrency: p50/p95/p99 latency and errors may not
+    grow, and throughput may not drop, by more than ``tolerance``. Peak
+    server RSS is checked the same way.
+    """
+    regressions = []
+    previous = {(run["endpoint"], run["concurrency"]): run for run in baseline.get("runs", [])}
+    for run in results["runs"]:
+        key = (run["endpoint"], run["concurrency"])
+        old = previous.get(key)
+        if old is None:
+            continue
+        label = f"{run['endpoint']} @ {run['concurrency']}"
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if metric in run and metric in old and run[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{label}: {metric} {old[metric]:.1f} -> {run[metric]:.1f}")
+        if run["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {old['throughput_rps']:.1f} -> {run['throughput_rps']:.1f} req/s")
+        if run["errors"] > old["errors"]:
+            regressions.append(f"{label}: errors {old['errors']} -> {run['errors']}")
+
+    old_peak = (baseline.get("memory") or {}).get("peak_rss_mb")
+    new_peak = (results.get("memory") or {}).get("peak_rss_mb")
+    if old_peak and new_peak and new_peak > old_peak * (1 + tolerance):
+        regressions.append(f"server peak RSS {old_peak:.0f} -> {new_peak:.0f} MB")
+    return regressions
@@ -0,0 +1,92 @@
+import time
+import random
+import asyncio
+from typing import Callable, Dict
+
+import aiohttp
+import numpy as np
+
+# Endpoint name -> path builder; listing routes pick a random seeded listing
+ENDPOINTS: Dict[str, Callable[[random.Random, int], str]] = {
+    "rentalScore": lambda rng, n: "/api/rentalScore",
+    "busStopsInOneMiles": lambda rng, n: f"/api/busStopsInOneMiles/{rng.randint(1, n)}",
+    "parksInOneMiles": lambda rng, n: f"/api/parksInOneMiles/{rng.randint(1, n)}",
+}
+
+
+async def _drive(base_url: str, path_for, n_listings: int, concurrency: int, duration: float, warmup: float, seed: int):
+    latencies, statuses = [], {}
+    errors = 0
+    loop = asyncio.get_running_loop()
+    record_from = loop.time() + warmup
+    stop_at = record_from + duration
+
+    timeout = aiohttp.ClientTimeout(total=120)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+
+        async def worker(worker_id: int):
+            nonlocal errors
+            rng = random.Random(seed * 1000 + worker_id)
+            while loop.time() < stop_at:
+                url = base_url + path_for(rng, n_listings)
+                started = time.perf_counter()
+                try:
+                    async with session.get(url) as response:
+                        await response.read()
+                        status = response.status
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    status = None
+                elapsed = time.perf_counter() - started
+                if loop.time() - elapsed < record_from:
+                    continue
+                if status is None or status >= 500:
+                    errors += 1
+                else:
+                    latencies.append(elapsed)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return np.array(latencies), statuses, errors
+
+
+def run_load(
+    base_url: str,
+    endpoint: str,
+    n_listings: int,
+    concurrency: int,
+    duration: float = 10.0,
+    warmup: float = 2.0,
+    seed: int = 42,
+) -> Dict:
+    """
+    Drive one endpoint with ``concurrency`` closed-loop clients for ``duration`` seconds.
+
+    Requests finishing during the warmup are not recorded. 404s (listings
+    without nearby stops or parks) count as successful responses.
+
+    Returns:
+        dict: Throughput, latency percentiles (ms), status counts and errors.
+    """
+    latencies, statuses, errors = asyncio.run(
+        _drive(base_url, ENDPOINTS[endpoint], n_listings, concurrency, duration, warmup, seed)
+    )
+    result = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "duration_seconds": duration,
+        "requests": int(len(latencies)),
+        "errors": errors,
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / duration, 2),
+    }
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+        result.update({
+            "mean_ms": round(float(latencies.mean() * 1000), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(latencies.max() * 1000), 3),
+        })
+    return result
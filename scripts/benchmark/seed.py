@@ -0,0 +1,296 @@
+import os
+import time
+import logging
+from typing import Dict
+
+import psycopg2
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+INIT_SQL = os.path.join(ROOT, "sql", "init.sql")
+MIGRATIONS_DIR = os.path.join(ROOT, "sql", "migrations")
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Number of rental listings per named scale
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Roughly the real WMATA / OpenStreetMap counts; they do not grow with listings
+DEFAULT_BUS_STOPS = 10_000
+DEFAULT_PARKS = 2_000
+
+# Where synthetic points land: (city, county, state, lat, lon, spread km, share).
+# Baltimore is outside the DMV region, so ~2% of listings are out of scope as in the real data.
+AREAS = [
+    ("Washington", "District of Columbia", "DC", 38.9072, -77.0369, 4.0, 0.33),
+    ("Arlington", "Arlington", "VA", 38.8816, -77.0910, 3.0, 0.15),
+    ("Alexandria", None, "VA", 38.8048, -77.0469, 3.0, 0.10),
+    ("Fairfax", "Fairfax", "VA", 38.8462, -77.3064, 8.0, 0.15),
+    ("Bethesda", "Montgomery", "MD", 38.9847, -77.0947, 4.0, 0.10),
+    ("Silver Spring", "Montgomery", "MD", 38.9907, -77.0261, 4.0, 0.10),
+    ("Hyattsville", "Prince George's", "MD", 38.9559, -76.9455, 5.0, 0.05),
+    ("Baltimore", "Baltimore City", "MD", 39.2904, -76.6122, 5.0, 0.02),
+]
+
+# Migrations replaced by an embedded stand-in (no PostGIS geography type)
+EMBEDDED_REPLACEMENTS = {"0003": "standin_geography.sql"}
+
+
+def parse_scale(scale: str) -> int:
+    """Listing count for a named scale ("10k") or a plain integer."""
+    return SCALES[scale.lower()] if scale.lower() in SCALES else int(scale)
+
+
+def _areas_sql() -> str:
+    # VALUES rows with cumulative share bounds so one random() picks an area
+    rows, low = [], 0.0
+    for city, county, state, lat, lon, spread_km, share in AREAS:
+        county_sql = "NULL" if county is None else "'" + county.replace("'", "''") + "'"
+        rows.append(f"('{city}', {county_sql}, '{state}', {lat}, {lon}, {spread_km}, {low}, {low + share})")
+        low += share
+    return ",\n        ".join(rows)
+
+
+def _points_cte(count_param: str, spread_scale: float = 1.0) -> str:
+    """CTE ``pts(g, city, county, state, lat, lon)``: Gaussian clusters around the areas."""
+    return f"""
+    areas (city, county, state, lat, lon, spread_km, lo, hi) AS (
+        VALUES
+        {_areas_sql()}
+    ),
+    draws AS (
+        SELECT g, random() * (SELECT max(hi) FROM areas) AS pick,
+               greatest(random(), 1e-12) AS u1, random() AS u2, random() AS u3
+        FROM generate_series(1, %({count_param})s) AS g
+    ),
+    pts AS (
+        SELECT d.g, a.city, a.county, a.state,
+               a.lat + a.spread_km * {spread_scale} / 111.32 * sqrt(-2 * ln(d.u1)) * cos(2 * pi() * d.u2) AS lat,
+               a.lon + a.spread_km * {spread_scale} / (111.32 * cos(radians(a.lat)))
+                     * sqrt(-2 * ln(d.u1)) * sin(2 * pi() * d.u2) AS lon,
+               d.u3
+        FROM draws d
+        JOIN areas a ON d.pick >= a.lo AND d.pick < a.hi
+    )"""
+
+
+def _listings_sql() -> str:
+    return f"""
+    WITH {_points_cte("listings")}
+    INSERT INTO public.rental_listings (
+        listing_id, listing_name, formatted_address, address_line_1, city, state, county,
+        latitude, longitude, geom, property_type, bedrooms, bathrooms, price, status
+    )
+    SELECT 'bench-' || g,
+           'Bench Listing ' || g,
+           g || ' Benchmark St, ' || city || ', ' || state,
+           g || ' Benchmark St',
+           city, state, county, lat, lon,
+           ST_SetSRID(ST_MakePoint(lon, lat), 4326),
+           (ARRAY['Apartment', 'Condo', 'Townhouse', 'Single Family'])[1 + floor(u3 * 4)::int],
+           floor(u3 * 5)::int,
+           1 + floor(u3 * 3) * 0.5,
+           (1200 + floor(u3 * 5) * 550 + random() * 600)::int,
+           'Active'
+    FROM pts;
+    """
+
+
+def _bus_stops_sql() -> str:
+    return f"""
+    WITH {_points_cte("bus_stops", spread_scale=1.5)}
+    INSERT INTO public.bus_stops (id, name, lon, lat, geom)
+    SELECT g, 'Bench Stop ' || g, lon, lat, ST_SetSRID(ST_MakePoint(lon, lat), 4326)
+    FROM pts;
+    """
+
+
+def _parks_sql() -> str:
+    return f"""
+    WITH {_points_cte("parks", spread_scale=1.5)}
+    INSERT INTO public.open_street (lat, lon, name, leisure, geom)
+    SELECT lat, lon, 'Bench Park ' || g,
+           CASE WHEN u3 < 0.7 THEN 'park' WHEN u3 < 0.8 THEN 'garden'
+                WHEN u3 < 0.9 THEN 'playground' ELSE 'pitch' END,
+           ST_SetSRID(ST_MakePoint(lon, lat), 4326)
+    FROM pts;
+    """
+
+
+# Clusters, air quality, walkability, reviews and QoL for the seeded listings
+DERIVED_SQL = """
+INSERT INTO public.listing_clusters (listing_db_id, cluster_id)
+SELECT listing_db_id, dense_rank() OVER (ORDER BY floor(latitude * 50), floor(longitude * 50))
+FROM public.rental_listings
+WHERE in_scope;
+
+INSERT INTO public.rental_clusters (cluster_id, centroid_lat, centroid_lon, member_count)
+SELECT lc.cluster_id, avg(rl.latitude), avg(rl.longitude), count(*)
+FROM public.listing_clusters lc
+JOIN public.rental_listings rl ON rl.listing_db_id = lc.listing_db_id
+GROUP BY lc.cluster_id;
+
+INSERT INTO public.cluster_air_quality (cluster_id, aqi, category)
+SELECT cluster_id, 20 + floor(random() * 60)::int, 'Good'
+FROM public.rental_clusters;
+
+INSERT INTO public.listings_geo (listing_db_id, geo_id)
+SELECT listing_db_id, 'bg-' || floor(latitude * 100) || '-' || floor(longitude * 100)
+FROM public.rental_listings;
+
+INSERT INTO public.geo_nwi (geo_id, nwi_score)
+SELECT geo_id, round((1 + random() * 19)::numeric, 1)
+FROM (SELECT DISTINCT geo_id FROM public.listings_geo) g;
+
+INSERT INTO public.place_review (place_name, place_id, rating, listing_id)
+SELECT 'Bench Place ' || listing_db_id, 'bench-place-' || listing_db_id,
+       round((3 + random() * 2)::numeric, 1), listing_db_id
+FROM public.rental_listings
+WHERE random() < 0.7;
+
+DROP TABLE IF EXISTS public.listings_qol;
+CREATE TABLE public.listings_qol (listing_db_id bigint, qol_score double precision);
+INSERT INTO public.listings_qol (listing_db_id, qol_score)
+SELECT listing_db_id, random() * 4 - 2
+FROM public.rental_listings
+WHERE in_scope;
+"""
+
+
+def connection_params(embedded_server=None) -> Dict:
+    """psycopg2 connection parameters (without dbname) for the benchmark Postgres."""
+    if embedded_server is not None:
+        # pgserver listens on a unix socket in its data directory, with trust auth
+        return {"host": str(embedded_server.pgdata), "user": "postgres", "password": "benchmark"}
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return {
+        "host": os.getenv("DB_HOST"),
+        "user": os.getenv("DB_USER"),
+        "password": os.getenv("DB_PASSWORD"),
+        "port": os.getenv("DB_PORT", 5432),
+    }
+
+
+def start_embedded(data_dir: str):
+    """Embedded Postgres via ``pgserver`` (the ``benchmark`` extra); kept alive by the returned handle."""
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit("The embedded backend needs pgserver: uv sync --extra benchmark")
+    os.makedirs(data_dir, exist_ok=True)
+    return pgserver.get_server(data_dir, cleanup_mode="stop")
+
+
+def recreate_database(params: Dict, db_name: str):
+    """Drop and create ``db_name``; refuses to touch the database the app is configured for."""
+    if db_name == os.getenv("DB_NAME"):
+        raise SystemExit(f"Refusing to recreate {db_name}: it is the configured DB_NAME.")
+    conn = psycopg2.connect(dbname="postgres", **params)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f'DROP DATABASE IF EXISTS "{db_name}" WITH (FORCE);')
+            cur.execute(f'CREATE DATABASE "{db_name}";')
+    finally:
+        conn.close()
+
+
+def _apply_schema(conn, embedded: bool):
+    with conn.cursor() as cur:
+        with open(INIT_SQL, "r", encoding="utf-8") as f:
+            init_sql = f.read()
+        if embedded:
+            with open(os.path.join(BENCHMARK_DIR, "standin.sql"), "r", encoding="utf-8") as f:
+                cur.execute(f.read())
+            init_sql = init_sql.replace("geometry (Point, 4326)", "point")
+        else:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS postgis;")
+        cur.execute(init_sql)
+
+        for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+            if not filename.endswith(".sql"):
+                continue
+            path = os.path.join(MIGRATIONS_DIR, filename)
+            if embedded and filename[:4] in EMBEDDED_REPLACEMENTS:
+                path = os.path.join(BENCHMARK_DIR, EMBEDDED_REPLACEMENTS[filename[:4]])
+            with open(path, "r", encoding="utf-8") as f:
+                migration_sql = f.read()
+            cur.execute(migration_sql.replace("geometry (Point, 4326)", "point") if embedded else migration_sql)
+    conn.commit()
+
+
+def seed_database(
+    params: Dict,
+    db_name: str,
+    n_listings: int,
+    embedded: bool = False,
+    bus_stops: int = DEFAULT_BUS_STOPS,
+    parks: int = DEFAULT_PARKS,
+    seed: int = 42,
+) -> Dict:
+    """
+    Recreate ``db_name`` with the app schema and synthetic DMV-like data.
+
+    Listings, stops and parks are drawn around DC-area centers inside
+    Postgres (``generate_series``), so even 1M listings never pass through
+    Python. ``setseed`` makes a given seed reproduce the same data.
+
+    Returns:
+        dict: Row counts and the seconds spent on each step.
+    """
+    recreate_database(params, db_name)
+    conn = psycopg2.connect(dbname=db_name, **params)
+    timings = {}
+    try:
+        started = time.perf_counter()
+        _apply_schema(conn, embedded)
+        timings["schema_seconds"] = round(time.perf_counter() - started, 3)
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT setseed(%s);", ((seed % 2000) / 1000 - 1,))
+            for name, sql, count in (
+                ("listings", _listings_sql(), n_listings),
+                ("bus_stops", _bus_stops_sql(), bus_stops),
+                ("parks", _parks_sql(), parks),
+            ):
+                started = time.perf_counter()
+                cur.execute(sql, {name: count})
+                timings[f"{name}_seconds"] = round(time.perf_counter() - started, 3)
+                logging.info(f"Seeded {count} {name} in {timings[f'{name}_seconds']:.1f}s.")
+
+            started = time.perf_counter()
+            cur.execute(DERIVED_SQL)
+            timings["derived_seconds"] = round(time.perf_counter() - started, 3)
+            conn.commit()
+
+            conn.autocommit = True
+            cur.execute("VACUUM ANALYZE;")
+            cur.execute("SELECT count(*), count(*) FILTER (WHERE in_scope) FROM public.rental_listings;")
+            total, in_scope = cur.fetchone()
+    finally:
+        conn.close()
+
+    return {
+        "listings": total,
+        "in_scope_listings": in_scope,
+        "bus_stops": bus_stops,
+        "parks": parks,
+        "seed": seed,
+        **timings,
+    }
+
+
+def server_env(params: Dict, db_name: str, snapshot_dir: str) -> Dict:
+    """Environment for a server process pointed at the benchmark database and snapshot directory."""
+    env = dict(os.environ)
+    env.update({
+        "DB_HOST": str(params["host"]),
+        "DB_NAME": db_name,
+        "DB_USER": str(params["user"]),
+        "DB_PASSWORD": str(params["password"]),
+        "DB_PORT": str(params.get("port", 5432)),
+        # The benchmark controls when snapshots are built
+        "SNAPSHOT_REFRESH_SECONDS": "0",
+        "FEATURE_SNAPSHOT_DIR": snapshot_dir,
+    })
+    return env
@@ -0,0 +1,100 @@
+import os
+import time
+import shlex
+import signal
+import subprocess
+import urllib.request
+from typing import Dict, List, Optional
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "server"))
+
+# `fastapi dev` is the development mode (no static client mount); --no-reload keeps it one process
+DEFAULT_SERVER_CMD = "uv run fastapi dev --no-reload --host 127.0.0.1 --port {port}"
+
+
+def start_server(env: Dict, port: int, command: str = DEFAULT_SERVER_CMD, cwd: str = SERVER_DIR) -> subprocess.Popen:
+    """Start the API server in its own process group."""
+    return subprocess.Popen(
+        shlex.split(command.format(port=port)),
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def wait_until_ready(base_url: str, process: Optional[subprocess.Popen] = None, timeout: float = 120):
+    """Poll a database-free endpoint until the server answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before becoming ready.")
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/cacheStats", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server at {base_url} not ready after {timeout}s.")
+
+
+def stop_server(process: subprocess.Popen):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=15)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def _process_tree(pid: int) -> List[int]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def _status_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status", "r") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    return 0
+
+
+def server_memory_mb(pid: int) -> Optional[Dict]:
+    """
+    Current and peak RSS of the server, in MB.
+
+    The launcher (e.g. ``uv run``) is the direct child, so the largest
+    process in the tree is taken as the server. None where /proc is missing.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    best = None
+    for member in _process_tree(pid):
+        try:
+            rss, peak = _status_kb(member, "VmRSS"), _status_kb(member, "VmHWM")
+        except OSError:
+            continue
+        if best is None or rss > best[0]:
+            best = (rss, peak)
+    if best is None:
+        return None
+    return {"rss_mb": round(best[0] / 1024, 1), "peak_rss_mb": round(best[1] / 1024, 1)}
@@ -0,0 +1,24 @@
+-- PostGIS stand-ins for the embedded benchmark database (no PostGIS available).
+-- Points use the core point type (x = lon, y = lat); distances are equirectangular
+-- meters, close enough at DMV scale. SQL bodies stay inlinable so GiST indexes on
+-- the point columns still serve ST_DWithin and <->.
+CREATE OR REPLACE FUNCTION ST_MakePoint(x double precision, y double precision)
+RETURNS point LANGUAGE sql IMMUTABLE PARALLEL SAFE AS 'SELECT point(x, y)';
+
+CREATE OR REPLACE FUNCTION ST_SetSRID(p point, srid integer)
+RETURNS point LANGUAGE sql IMMUTABLE PARALLEL SAFE AS 'SELECT p';
+
+CREATE OR REPLACE FUNCTION ST_Distance(a point, b point)
+RETURNS double precision LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+'SELECT 111320 * sqrt(((a[0] - b[0]) * cos(radians((a[1] + b[1]) / 2))) ^ 2 + (a[1] - b[1]) ^ 2)';
+
+CREATE OR REPLACE FUNCTION ST_DWithin(a point, b point, meters double precision)
+RETURNS boolean LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+-- Bounding boxes around both sides so either argument's GiST index can be used
+'SELECT a <@ box(
+     point(b[0] - meters / (111320 * cos(radians(b[1]))), b[1] - meters / 111320),
+     point(b[0] + meters / (111320 * cos(radians(b[1]))), b[1] + meters / 111320)
+ ) AND b <@ box(
+     point(a[0] - meters / (111320 * cos(radians(a[1]))), a[1] - meters / 111320),
+     point(a[0] + meters / (111320 * cos(radians(a[1]))), a[1] + meters / 111320)
+ ) AND ST_Distance(a, b) <= meters';
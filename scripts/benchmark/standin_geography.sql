@@ -0,0 +1,10 @@
+-- Embedded replacement for 0003_geography_columns: geog mirrors geom as a point
+ALTER TABLE public.rental_listings ADD COLUMN IF NOT EXISTS geog point GENERATED ALWAYS AS (geom) STORED;
+ALTER TABLE public.bus_stops ADD COLUMN IF NOT EXISTS geog point GENERATED ALWAYS AS (geom) STORED;
+ALTER TABLE public.open_street ADD COLUMN IF NOT EXISTS geog point GENERATED ALWAYS AS (geom) STORED;
+
+CREATE INDEX IF NOT EXISTS rental_listings_geog_idx ON public.rental_listings USING gist (geog);
+CREATE INDEX IF NOT EXISTS bus_stops_geog_idx ON public.bus_stops USING gist (geog);
+CREATE INDEX IF NOT EXISTS open_street_geog_idx ON public.open_street USING gist (geog);
+CREATE INDEX IF NOT EXISTS open_street_parks_geog_idx ON public.open_street USING gist (geog)
+WHERE leisure = 'park';
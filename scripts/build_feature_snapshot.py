@@ -0,0 +1,22 @@
+import os
+import sys
+import argparse
+import logging
+
+# The snapshot format lives with the server, which reads it at startup
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, root)
+from server.utils.feature_snapshot import build_snapshot, snapshot_dir
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the listing feature snapshot.")
+    parser.add_argument("--dir", default=snapshot_dir(), help="Snapshot directory.")
+    args = parser.parse_args()
+    build_snapshot(args.dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@ import os
 import psycopg2
 from psycopg2.extras import execute_values
 import json
+import logging
 from dotenv import load_dotenv
+from etl_profiler import db_time, record_rows
 
 
 def import_bus_stops():
@@ -27,7 +29,8 @@ def import_bus_stops():
     with open("../raw_data/bus_stops.json", "r", encoding="utf-8") as f:
         data = json.load(f)
         stops = data["Stops"]
-        print(f"Number of stops: {len(stops)}")
+        logging.info(f"Number of stops: {len(stops)}")
+        record_rows(read=len(stops))
         # Prepare data for batch insert
         values = [
             (
@@ -40,16 +43,30 @@ def import_bus_stops():
             )
             for stop in stops
         ]
-        print("Prepared data for batch insert")
         # Use execute_values for batch insert
-        execute_values(
-            cur,
-            query,
-            [(v[0], v[1], v[2], v[3], v[4], v[5]) for v in values],
-            template="(%s, %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326))",
-        )
-        print("Batch insert executed")
+        with db_time():
+            execute_values(
+                cur,
+                query,
+                [(v[0], v[1], v[2], v[3], v[4], v[5]) for v in values],
+                template="(%s, %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326))",
+            )
+        record_rows(written=len(values))
+        logging.info(f"Inserted {len(values)} bus stops")
+
+        # Normalized stop -> route rows; a stop's routes are replaced as a whole
+        routes = sorted({(int(stop["StopID"]), route) for stop in stops for route in stop.get("Routes") or []})
+        with db_time():
+            cur.execute("DELETE FROM bus_stop_routes WHERE stop_id = ANY(%s);", ([v[0] for v in values],))
+            execute_values(
+                cur,
+                "INSERT INTO bus_stop_routes (stop_id, route) VALUES %s ON CONFLICT DO NOTHING;",
+                routes,
+            )
+        record_rows(written=len(routes))
+        logging.info(f"Inserted {len(routes)} stop routes")
 
-    conn.commit()
+    with db_time():
+        conn.commit()
     cur.close()
     conn.close()
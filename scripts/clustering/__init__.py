@@ -0,0 +1,7 @@
+from .assign import ClusterAssigner, assign_new_listings
+from .cache import ClusterCache
+from .grid_search import hdbscan_grid_search
+from .nearest import nearest_centroids
+from .pipeline import load_listings, run_clustering
+from .publish import publish_clusters
+from .weighted_hdbscan import collapse_coordinates, weighted_hdbscan
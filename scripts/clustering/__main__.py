@@ -0,0 +1,93 @@
+import os
+import argparse
+import logging
+
+from .assign import DEFAULT_MAX_DISTANCE_KM, assign_new_listings
+from .cache import ClusterCache
+from .pipeline import load_listings, run_clustering
+from .publish import publish_clusters
+
+DEFAULT_CACHE_DIR = os.getenv("CLUSTER_CACHE_DIR", "../raw_data/cluster_cache")
+
+
+def run(args):
+    # Imported lazily so `--help` works without database credentials
+    from utils.db_engine import DBEngine
+
+    engine = DBEngine().get_engine()
+    df = load_listings(engine)
+    logging.info(f"Loaded {len(df)} listings for clustering.")
+
+    cache = ClusterCache(None if args.no_cache else args.cache_dir)
+    assignments_df, clusters_df, unassigned_df, model_info = run_clustering(
+        df,
+        n_workers=args.workers,
+        cache=cache,
+        dedupe=not args.no_dedupe,
+        noise_max_distance_km=args.noise_max_distance_km,
+    )
+    logging.info(f"Clustering produced {len(clusters_df)} clusters.")
+
+    if args.output:
+        assignments_df.merge(df, on="listing_db_id").to_csv(args.output, index=False)
+        logging.info(f"Saved assignments to {args.output}")
+
+    if args.publish:
+        from utils.db_connection import DatabaseConnection
+
+        with DatabaseConnection() as conn:
+            version = publish_clusters(conn, assignments_df, clusters_df, model_info, unassigned_df)
+        logging.info(f"Cluster model v{version} is live.")
+
+
+def assign(args):
+    from utils.db_connection import DatabaseConnection
+
+    with DatabaseConnection() as conn:
+        result = assign_new_listings(
+            conn,
+            max_distance_km=args.max_distance_km,
+            listing_ids=args.listing_ids,
+            dry_run=args.dry_run,
+        )
+    logging.info(f"Assignment summary: {result}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="clustering", description="HDBSCAN clustering of rental listings.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the full two-round clustering.")
+    run_parser.add_argument("--workers", type=int, default=None, help="Grid-search processes (default: all cores).")
+    run_parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directory for cached fits.")
+    run_parser.add_argument("--no-cache", action="store_true", help="Disable the fit cache.")
+    run_parser.add_argument("--no-dedupe", action="store_true", help="Cluster every listing instead of unique coordinates.")
+    run_parser.add_argument(
+        "--noise-max-distance-km",
+        type=float,
+        default=None,
+        help="Leave remaining noise farther than this from every centroid unassigned.",
+    )
+    run_parser.add_argument("--output", default=None, help="Optional CSV path for the final assignments.")
+    run_parser.add_argument("--publish", action="store_true", help="Write clusters and assignments to the database.")
+    run_parser.set_defaults(func=run)
+
+    assign_parser = subparsers.add_parser("assign", help="Assign new or moved listings to existing clusters.")
+    assign_parser.add_argument(
+        "--max-distance-km",
+        type=float,
+        default=DEFAULT_MAX_DISTANCE_KM,
+        help="Listings farther than this from every centroid are flagged for re-clustering.",
+    )
+    assign_parser.add_argument(
+        "--listing-ids", type=int, nargs="*", default=[], help="Assigned listings to re-evaluate (e.g. moved ones)."
+    )
+    assign_parser.add_argument("--dry-run", action="store_true", help="Report assignments without writing them.")
+    assign_parser.set_defaults(func=assign)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import time
+import logging
+from typing import List, Optional
+
+import numpy as np
+from psycopg2.extras import execute_values
+from sklearn.neighbors import BallTree
+
+from .nearest import EARTH_RADIUS_KM, query_nearest
+
+# One mile, the radius used for the other neighbourhood features
+DEFAULT_MAX_DISTANCE_KM = 1.609
+
+
+class ClusterAssigner:
+    """
+    Nearest-centroid lookup over the published ``rental_clusters``.
+
+    Centroids are indexed in a haversine BallTree, so assigning a batch of
+    new listings is a tree query instead of a full HDBSCAN run.
+    """
+
+    def __init__(self, cluster_ids: np.ndarray, centroids: np.ndarray):
+        self.cluster_ids = np.asarray(cluster_ids)
+        self.tree = BallTree(np.radians(centroids), metric="haversine")
+
+    def assign(self, coords: np.ndarray, max_distance_km: Optional[float] = None):
+        """
+        Nearest cluster for every (lat, lon) row in degrees.
+
+        Returns:
+            tuple: (cluster ids, distances in km, mask of rows within the cap)
+        """
+        distances, indices = query_nearest(self.tree, np.radians(coords))
+        distances_km = distances * EARTH_RADIUS_KM
+        cluster_ids = self.cluster_ids[indices]
+        if max_distance_km is None:
+            within = np.ones(len(coords), dtype=bool)
+        else:
+            within = distances_km <= max_distance_km
+        return cluster_ids, distances_km, within
+
+
+def touched_clusters(previous: np.ndarray, cluster_ids: np.ndarray, within: np.ndarray) -> List[int]:
+    """Clusters that lose or gain a member: every previous cluster and every new one within the cap."""
+    touched = np.union1d(previous[previous >= 0], cluster_ids[within])
+    return touched.astype(np.int64).tolist()
+
+
+# Centroid and size of the touched clusters from their current members; an emptied cluster keeps its centroid
+RECOMPUTE_CENTROIDS_SQL = """
+    UPDATE rental_clusters AS rc SET
+        centroid_lat = COALESCE(m.centroid_lat, rc.centroid_lat),
+        centroid_lon = COALESCE(m.centroid_lon, rc.centroid_lon),
+        member_count = COALESCE(m.member_count, 0)
+    FROM unnest(%s::integer[]) AS t(cluster_id)
+    LEFT JOIN (
+        SELECT lc.cluster_id, AVG(rl.latitude) AS centroid_lat, AVG(rl.longitude) AS centroid_lon,
+               COUNT(*)::integer AS member_count
+        FROM listing_clusters lc
+        JOIN rental_listings rl ON rl.listing_db_id = lc.listing_db_id
+        WHERE lc.cluster_id = ANY(%s::integer[])
+        GROUP BY lc.cluster_id
+    ) m ON m.cluster_id = t.cluster_id
+    WHERE rc.cluster_id = t.cluster_id;
+"""
+
+
+def assign_new_listings(
+    conn,
+    max_distance_km: float = DEFAULT_MAX_DISTANCE_KM,
+    listing_ids: Optional[List[int]] = None,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Assign unclustered (and explicitly listed, e.g. moved) listings to the
+    nearest existing cluster.
+
+    Listings within ``max_distance_km`` of a centroid get a
+    ``listing_clusters`` row, and the centroid and ``member_count`` of every
+    cluster that gained or lost a listing are recomputed from its members,
+    the same basis the full clustering publishes. Listings farther than
+    that from every centroid lose any stale assignment and are queued in
+    ``cluster_recluster_queue`` for the next full re-cluster.
+
+    Args:
+        conn: Open psycopg2 connection; committed unless ``dry_run``.
+        max_distance_km (float): Distance cap to the nearest centroid.
+        listing_ids (list): Already-assigned listings to re-evaluate.
+        dry_run (bool): Compute assignments without writing them.
+
+    Returns:
+        dict: Counts of assigned and flagged listings.
+    """
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute("SELECT cluster_id, centroid_lat, centroid_lon FROM rental_clusters ORDER BY cluster_id;")
+        clusters = cur.fetchall()
+        if not clusters:
+            logging.error("No clusters found; run a full clustering first.")
+            return {"assigned": 0, "flagged": 0}
+
+        cur.execute(
+            """
+            SELECT rl.listing_db_id, rl.latitude, rl.longitude, lc.cluster_id
+            FROM rental_listings rl
+            LEFT JOIN listing_clusters lc ON rl.listing_db_id = lc.listing_db_id
+            WHERE (lc.listing_db_id IS NULL OR rl.listing_db_id = ANY(%s))
+              AND rl.in_scope
+            ORDER BY rl.listing_db_id;
+            """,
+            (list(listing_ids or []),),
+        )
+        rows = cur.fetchall()
+
+    if not rows:
+        logging.info("No listings need a cluster assignment.")
+        return {"assigned": 0, "flagged": 0}
+
+    cluster_array = np.array(clusters, dtype=np.float64)
+    assigner = ClusterAssigner(cluster_array[:, 0].astype(np.int64), cluster_array[:, 1:3])
+
+    listing_db_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    coords = np.array([(row[1], row[2]) for row in rows], dtype=np.float64)
+    previous = np.array([row[3] if row[3] is not None else -1 for row in rows], dtype=np.int64)
+
+    cluster_ids, distances_km, within = assigner.assign(coords, max_distance_km)
+
+    had_cluster = previous >= 0
+    touched = touched_clusters(previous, cluster_ids, within)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logging.info(
+        f"Assigned {within.sum()} of {len(rows)} listings, flagged {(~within).sum()} "
+        f"beyond {max_distance_km} km ({elapsed_ms:.1f} ms)."
+    )
+    result = {"assigned": int(within.sum()), "flagged": int((~within).sum())}
+    if dry_run:
+        return result
+
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM listing_clusters WHERE listing_db_id = ANY(%s);",
+            (listing_db_ids[had_cluster].tolist(),),
+        )
+        execute_values(
+            cur,
+            "INSERT INTO listing_clusters (listing_db_id, cluster_id) VALUES %s",
+            list(zip(listing_db_ids[within].tolist(), cluster_ids[within].tolist())),
+        )
+        cur.execute(RECOMPUTE_CENTROIDS_SQL, (touched, touched))
+        cur.execute(
+            "DELETE FROM cluster_recluster_queue WHERE listing_db_id = ANY(%s);",
+            (listing_db_ids[within].tolist(),),
+        )
+        execute_values(
+            cur,
+            """
+            INSERT INTO cluster_recluster_queue (listing_db_id, nearest_cluster_id, distance_km)
+            VALUES %s
+            ON CONFLICT (listing_db_id) DO UPDATE SET
+                nearest_cluster_id = EXCLUDED.nearest_cluster_id,
+                distance_km = EXCLUDED.distance_km,
+                flagged_at = now();
+            """,
+            list(
+                zip(
+                    listing_db_ids[~within].tolist(),
+                    cluster_ids[~within].tolist(),
+                    distances_km[~within].round(3).tolist(),
+                )
+            ),
+        )
+    conn.commit()
+    return result
@@ -0,0 +1,69 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def hash_coordinates(coords: np.ndarray) -> str:
+    """Stable content hash of a coordinate array (shape + dtype + bytes)."""
+    coords = np.ascontiguousarray(coords)
+    digest = hashlib.sha256()
+    digest.update(str(coords.shape).encode())
+    digest.update(coords.dtype.str.encode())
+    digest.update(coords.tobytes())
+    return digest.hexdigest()
+
+
+def hash_params(params: Dict) -> str:
+    """Stable hash of a parameter set; key order does not matter."""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ClusterCache:
+    """
+    On-disk cache of fitted HDBSCAN results.
+
+    Entries are keyed by the hash of the input coordinates and the hash of
+    the parameter set, so a rerun on unchanged listings skips every fit it
+    has already done. Each entry is an ``.npz`` holding the labels and the
+    evaluation row produced by the grid search.
+    """
+
+    def __init__(self, cache_dir: Optional[str]):
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, data_hash: str, params: Dict) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, data_hash[:16], f"{hash_params(params)[:16]}.npz")
+
+    def get(self, data_hash: str, params: Dict):
+        """Return ``(labels, row)`` for a cached fit, or ``None``."""
+        path = self._path(data_hash, params)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                labels = entry["labels"]
+                row = json.loads(str(entry["row"]))
+            return labels, row
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def put(self, data_hash: str, params: Dict, labels: np.ndarray, row: Dict):
+        path = self._path(data_hash, params)
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, labels=labels, row=json.dumps(row, default=str))
+        # Atomic so a crashed run never leaves a half-written entry behind
+        os.replace(tmp_path, path)
@@ -0,0 +1,248 @@
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import HDBSCAN
+from sklearn.metrics import silhouette_score
+
+from .cache import ClusterCache, hash_coordinates
+from .weighted_hdbscan import weighted_hdbscan
+
+# Worker-side views of the shared input arrays (set by _attach_shared_arrays)
+_SHARED_ARRAYS: Dict[str, np.ndarray] = {}
+_SHARED_BLOCKS: List[shared_memory.SharedMemory] = []
+
+
+def _attach_shared_arrays(specs: Dict[str, Tuple[str, Tuple[int, ...], str]]):
+    """Process-pool initializer: map the parent's input arrays read-only."""
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        _SHARED_BLOCKS.append(block)
+        _SHARED_ARRAYS[name] = array
+
+
+def _share_arrays(arrays: Dict[str, np.ndarray]):
+    """Copy arrays into new shared memory blocks; returns (blocks, specs)."""
+    blocks, specs = [], {}
+    for name, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        blocks.append(block)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def evaluate_labels(
+    coords_radians: np.ndarray,
+    labels: np.ndarray,
+    metric: str,
+    sample_weight: Optional[np.ndarray] = None,
+) -> Dict:
+    """
+    Cluster count, noise fraction and silhouette score for one labelling.
+
+    With ``sample_weight`` the noise fraction counts weight (listings); the
+    silhouette is computed over the unique points.
+    """
+    weights = np.ones(len(labels)) if sample_weight is None else sample_weight
+    total_points = weights.sum()
+    n_clusters = len(np.unique(labels)) - (1 if -1 in labels else 0)
+    noise_points = weights[labels == -1].sum()
+    fraction_noise = noise_points / total_points if total_points > 0 else 0
+
+    sil_score = np.nan
+    clustered_mask = labels != -1
+    n_clustered_points = np.sum(clustered_mask)
+
+    # Compute silhouette score only if more than 1 cluster and at least some valid points exist.
+    if n_clusters > 1 and n_clustered_points >= (n_clusters + 1):
+        try:
+            sil_score = silhouette_score(
+                coords_radians[clustered_mask],
+                labels[clustered_mask],
+                metric=metric,
+            )
+        except ValueError as e:
+            logging.warning(f"Silhouette error: {e}")
+            sil_score = np.nan
+
+    return {
+        "n_clusters": n_clusters,
+        "noise_fraction": fraction_noise,
+        "silhouette": float(sil_score),
+    }
+
+
+def fit_hdbscan(
+    coords_radians: np.ndarray,
+    min_cluster_size: int,
+    min_samples: Optional[int],
+    metric: str = "haversine",
+    n_jobs: Optional[int] = None,
+    sample_weight: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Fit HDBSCAN on coordinates in radians and return the labels.
+
+    When ``sample_weight`` is given the coordinates are unique points and
+    the weights their multiplicities (see ``weighted_hdbscan``).
+    """
+    if sample_weight is not None:
+        return weighted_hdbscan(coords_radians, sample_weight, min_cluster_size, min_samples, metric)
+
+    hdbscan = HDBSCAN(
+        min_cluster_size=min_cluster_size,
+        min_samples=min_samples,
+        metric=metric,
+        n_jobs=n_jobs,
+    )
+    return hdbscan.fit_predict(coords_radians)
+
+
+def _fit_config(min_cluster_size: int, min_samples: Optional[int], metric: str):
+    """Process-pool task: fit one configuration on the shared arrays."""
+    coords = _SHARED_ARRAYS["coords"]
+    weights = _SHARED_ARRAYS.get("weights")
+    # One core per fit; the pool supplies the parallelism
+    labels = fit_hdbscan(coords, min_cluster_size, min_samples, metric, n_jobs=1, sample_weight=weights)
+    return labels, evaluate_labels(coords, labels, metric, weights)
+
+
+def _valid_configs(
+    total_points: float,
+    min_cluster_size_options: List[int],
+    min_samples_options: List[Optional[int]],
+) -> List[Tuple[int, Optional[int]]]:
+    configs = []
+    for min_cluster_size, min_samples in product(min_cluster_size_options, min_samples_options):
+        if min_cluster_size <= 1 or min_cluster_size > total_points:
+            logging.info(f"Skipping invalid min_cluster_size: {min_cluster_size}")
+            continue
+        current_min_samples = min_samples if min_samples is not None else min_cluster_size
+        if current_min_samples <= 0 or current_min_samples > total_points:
+            logging.info(f"Skipping invalid min_samples={current_min_samples}")
+            continue
+        configs.append((min_cluster_size, min_samples))
+    return configs
+
+
+def select_best_params(results_df: pd.DataFrame, eval_metric: str) -> Optional[Dict]:
+    """Pick the best row: highest silhouette or lowest noise fraction."""
+    if results_df.empty:
+        return None
+
+    best_params = None
+    # Filter out rows where the metric calculation failed (NaN) if optimizing that metric
+    if eval_metric == "silhouette":
+        valid_results = results_df.dropna(subset=["silhouette"])
+        if not valid_results.empty:
+            best_idx = valid_results["silhouette"].astype(float).idxmax()
+            best_params = results_df.loc[best_idx].to_dict()
+    elif eval_metric == "noise_fraction":
+        best_idx = results_df["noise_fraction"].astype(float).idxmin()
+        best_params = results_df.loc[best_idx].to_dict()
+    else:
+        raise ValueError(f"Unknown eval_metric: {eval_metric}")
+
+    if best_params:
+        # Convert back to int where needed
+        best_params["min_cluster_size"] = int(best_params["min_cluster_size"])
+        if best_params["min_samples"] is not None and pd.notna(best_params["min_samples"]):
+            best_params["min_samples"] = int(best_params["min_samples"])
+        else:
+            best_params["min_samples"] = None
+    return best_params
+
+
+def hdbscan_grid_search(
+    coords_radians: np.ndarray,
+    min_cluster_size_options: List[int] = [5],
+    min_samples_options: List[Optional[int]] = [None],
+    eval_metric: str = "silhouette",
+    metric: str = "haversine",
+    n_workers: Optional[int] = None,
+    cache: Optional[ClusterCache] = None,
+    sample_weight: Optional[np.ndarray] = None,
+):
+    """
+    Performs HDBSCAN grid search and returns results, best parameters and
+    the labels of every fitted configuration.
+
+    Configurations run across a process pool. The coordinates (and weights)
+    are placed in shared memory once and mapped read-only by every worker
+    instead of being pickled per task. Fits found in ``cache`` are reused.
+    With ``sample_weight`` the coordinates are unique points, sizes and
+    noise fractions count weight.
+
+    Returns:
+        tuple: (results DataFrame, best params dict or None,
+                {(min_cluster_size, min_samples): labels})
+    """
+    coords_radians = np.ascontiguousarray(coords_radians, dtype=np.float64)
+    arrays = {"coords": coords_radians}
+    if sample_weight is not None:
+        arrays["weights"] = np.ascontiguousarray(sample_weight, dtype=np.float64)
+    total_points = arrays["weights"].sum() if sample_weight is not None else len(coords_radians)
+
+    if total_points == 0:
+        logging.warning("No data points provided for grid search.")
+        return pd.DataFrame(), None, {}
+
+    configs = _valid_configs(total_points, min_cluster_size_options, min_samples_options)
+    data_hash = hash_coordinates(np.column_stack(list(arrays.values())))
+    cache = cache or ClusterCache(None)
+
+    fitted: Dict[Tuple[int, Optional[int]], Tuple[np.ndarray, Dict]] = {}
+    pending = []
+    for min_cluster_size, min_samples in configs:
+        params = {"min_cluster_size": min_cluster_size, "min_samples": min_samples, "metric": metric}
+        cached = cache.get(data_hash, params)
+        if cached is not None:
+            fitted[(min_cluster_size, min_samples)] = cached
+        else:
+            pending.append((min_cluster_size, min_samples))
+
+    logging.info(
+        f"Grid search over {len(configs)} configurations on {len(coords_radians)} points "
+        f"({len(configs) - len(pending)} cached)."
+    )
+
+    if pending:
+        n_workers = min(n_workers or os.cpu_count() or 1, len(pending))
+        blocks, specs = _share_arrays(arrays)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_attach_shared_arrays,
+                initargs=(specs,),
+            ) as pool:
+                futures = {
+                    config: pool.submit(_fit_config, config[0], config[1], metric)
+                    for config in pending
+                }
+                for (min_cluster_size, min_samples), future in futures.items():
+                    labels, row = future.result()
+                    params = {"min_cluster_size": min_cluster_size, "min_samples": min_samples, "metric": metric}
+                    cache.put(data_hash, params, labels, row)
+                    fitted[(min_cluster_size, min_samples)] = (labels, row)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    results = []
+    labels_by_config = {}
+    for min_cluster_size, min_samples in configs:
+        labels, row = fitted[(min_cluster_size, min_samples)]
+        labels_by_config[(min_cluster_size, min_samples)] = labels
+        results.append({"min_cluster_size": min_cluster_size, "min_samples": min_samples, **row})
+
+    results_df = pd.DataFrame(results)
+    return results_df, select_best_params(results_df, eval_metric), labels_by_config
@@ -0,0 +1,81 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def query_nearest(
+    tree: BallTree,
+    coords_radians: np.ndarray,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    n_jobs: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Nearest tree point for every row, queried in chunks.
+
+    Memory stays O(chunk_size) regardless of how many points and centroids
+    there are. Chunks run on a thread pool; BallTree queries release the
+    GIL, so they use several cores.
+
+    Returns:
+        tuple: (distances in radians, indices into the tree data)
+    """
+    n = len(coords_radians)
+    distances = np.empty(n, dtype=np.float64)
+    indices = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return distances, indices
+
+    def query_chunk(start: int):
+        stop = min(start + chunk_size, n)
+        chunk_distances, chunk_indices = tree.query(coords_radians[start:stop], k=1)
+        distances[start:stop] = chunk_distances[:, 0]
+        indices[start:stop] = chunk_indices[:, 0]
+
+    starts = range(0, n, chunk_size)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(starts) == 1:
+        for start in starts:
+            query_chunk(start)
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            list(pool.map(query_chunk, starts))
+    return distances, indices
+
+
+def nearest_centroids(
+    coords_radians: np.ndarray,
+    centroids_radians: np.ndarray,
+    cluster_ids: np.ndarray,
+    max_distance_km: Optional[float] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    n_jobs: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Label every point with the cluster of its nearest centroid.
+
+    Args:
+        coords_radians (ndarray): (lat, lon) points in radians.
+        centroids_radians (ndarray): (lat, lon) centroids in radians.
+        cluster_ids (ndarray): Cluster id of every centroid.
+        max_distance_km (float): Points farther than this from every
+            centroid get label -1.
+        chunk_size (int): Points per tree query.
+        n_jobs (int): Threads used for the chunks (default: all cores).
+
+    Returns:
+        tuple: (labels, distances to the nearest centroid in km)
+    """
+    tree = BallTree(centroids_radians, metric="haversine")
+    distances, indices = query_nearest(tree, coords_radians, chunk_size, n_jobs)
+    distances_km = distances * EARTH_RADIUS_KM
+    labels = np.asarray(cluster_ids)[indices]
+    if max_distance_km is not None:
+        labels = np.where(distances_km <= max_distance_km, labels, -1)
+    return labels, distances_km
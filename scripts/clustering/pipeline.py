@@ -0,0 +1,256 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cache import ClusterCache, hash_coordinates
+from .grid_search import hdbscan_grid_search
+from .nearest import nearest_centroids
+from .weighted_hdbscan import collapse_coordinates
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Parameter grids used by the original notebook
+FIRST_ROUND_SIZE_OPTIONS = [5, 10, 15, 20]
+FIRST_ROUND_SAMPLES_OPTIONS = [None, 5, 10]
+SECOND_ROUND_SIZE_OPTIONS = [2, 3, 5, 7, 10]
+SECOND_ROUND_SAMPLES_OPTIONS = [None, 2, 3, 5]
+
+# Fallbacks when a grid search yields no usable configuration
+FIRST_ROUND_DEFAULT_PARAMS = (5, 5)
+SECOND_ROUND_DEFAULT_PARAMS = (2, 2)
+
+COORDINATE_PRECISION = 4
+
+
+def load_listings(engine) -> pd.DataFrame:
+    """Load the in-scope rental listings that take part in clustering."""
+    query = """
+    SELECT listing_db_id, latitude, longitude
+    FROM rental_listings AS rl
+    WHERE rl.in_scope
+    ORDER BY rl.listing_db_id;
+    """
+    return pd.read_sql(query, engine)
+
+
+def _best_labels(
+    labels_by_config: Dict,
+    best_params: Optional[Dict],
+    default_params: Tuple[int, int],
+) -> Tuple[Tuple[int, Optional[int]], np.ndarray]:
+    if best_params:
+        config = (best_params["min_cluster_size"], best_params["min_samples"])
+    else:
+        config = default_params
+    return config, labels_by_config.get(config)
+
+
+def _round(
+    coords_radians: np.ndarray,
+    weights: Optional[np.ndarray],
+    size_options: List[int],
+    samples_options: List[Optional[int]],
+    eval_metric: str,
+    default_params: Tuple[int, int],
+    n_workers: Optional[int],
+    cache: ClusterCache,
+    name: str,
+) -> Tuple[Tuple[int, Optional[int]], np.ndarray]:
+    results_df, best_params, labels_by_config = hdbscan_grid_search(
+        coords_radians,
+        min_cluster_size_options=size_options,
+        min_samples_options=samples_options,
+        eval_metric=eval_metric,
+        metric="haversine",
+        n_workers=n_workers,
+        cache=cache,
+        sample_weight=weights,
+    )
+    logging.info(f"{name} results:\n{results_df}")
+
+    config, labels = _best_labels(labels_by_config, best_params, default_params)
+    if labels is None:
+        # Default configuration was not part of the grid; fit it on its own
+        _, _, labels_by_config = hdbscan_grid_search(
+            coords_radians,
+            min_cluster_size_options=[config[0]],
+            min_samples_options=[config[1]],
+            eval_metric=eval_metric,
+            n_workers=1,
+            cache=cache,
+            sample_weight=weights,
+        )
+        labels = labels_by_config.get(config)
+        if labels is None:
+            logging.warning(f"{name}: no valid configuration, marking every point as noise.")
+            return config, np.full(len(coords_radians), -1, dtype=np.int64)
+
+    logging.info(f"{name} parameters: min_cluster_size={config[0]}, min_samples={config[1]}")
+    return config, labels
+
+
+def assign_noise_to_nearest_centroid(
+    final_df: pd.DataFrame,
+    max_distance_km: Optional[float] = None,
+    n_jobs: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Assign points still labelled -1 to the cluster with the nearest centroid.
+
+    Uses a chunked BallTree query rather than a dense noise x centroid
+    distance matrix. The nearest cluster and the distance to its centroid
+    are stored in ``nearest_cluster`` and ``centroid_distance_km`` (the
+    point's own cluster and 0 for points HDBSCAN clustered itself); points
+    beyond ``max_distance_km`` stay -1 in ``cluster``. Without any
+    centroid, noise keeps -1 and a NaN distance.
+    """
+    remaining_noise_mask = final_df["cluster"] == -1
+    clustered_points = final_df.loc[~remaining_noise_mask]
+    all_centroids_df = clustered_points.groupby("cluster")[["latitude", "longitude"]].mean()
+    final_df["nearest_cluster"] = final_df["cluster"]
+    final_df["centroid_distance_km"] = np.where(remaining_noise_mask, np.nan, 0.0)
+
+    if remaining_noise_mask.any() and not all_centroids_df.empty:
+        remaining_coords_radians = np.radians(
+            final_df.loc[remaining_noise_mask, ["latitude", "longitude"]].to_numpy()
+        )
+        labels, distances_km = nearest_centroids(
+            remaining_coords_radians,
+            np.radians(all_centroids_df.to_numpy()),
+            all_centroids_df.index.to_numpy(),
+            n_jobs=n_jobs,
+        )
+        within = distances_km <= max_distance_km if max_distance_km is not None else np.ones(len(labels), dtype=bool)
+        final_df.loc[remaining_noise_mask, "nearest_cluster"] = labels
+        final_df.loc[remaining_noise_mask, "cluster"] = np.where(within, labels, -1)
+        final_df.loc[remaining_noise_mask, "centroid_distance_km"] = distances_km
+
+    return all_centroids_df
+
+
+def run_clustering(
+    df: pd.DataFrame,
+    n_workers: Optional[int] = None,
+    cache: Optional[ClusterCache] = None,
+    dedupe: bool = True,
+    noise_max_distance_km: Optional[float] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Dict]:
+    """
+    Two-round HDBSCAN clustering of listings, as done in the notebook.
+
+    The first round searches for dense neighbourhoods (scored by
+    silhouette), the second round re-clusters the first round's noise
+    (scored by noise fraction), and whatever is still noise afterwards is
+    attached to the nearest cluster centroid. Listings beyond
+    ``noise_max_distance_km`` are returned separately, unassigned.
+
+    With ``dedupe`` (the default) listings sharing a rounded coordinate are
+    collapsed into one weighted point before clustering and the labels are
+    broadcast back, so both rounds scale with unique locations.
+
+    Args:
+        df (DataFrame): listing_db_id, latitude, longitude.
+        n_workers (int): Processes used by the grid searches (default: all cores).
+        cache (ClusterCache): Optional cache of fitted configurations.
+        dedupe (bool): Cluster unique coordinates with multiplicity weights.
+        noise_max_distance_km (float): Leave remaining noise farther than
+            this from every centroid unassigned (default: no cap).
+
+    Returns:
+        tuple: (assignments with listing_db_id/cluster_id,
+                clusters with cluster_id/centroid_lat/centroid_lon/member_count,
+                unassigned listings with listing_db_id/nearest_cluster_id/distance_km,
+                model info with the input hash and chosen parameters)
+    """
+    cache = cache or ClusterCache(None)
+    final_df = df[["listing_db_id", "latitude", "longitude"]].copy().reset_index(drop=True)
+
+    # Round close points to the same coordinates
+    final_df["latitude"] = final_df["latitude"].round(COORDINATE_PRECISION)
+    final_df["longitude"] = final_df["longitude"].round(COORDINATE_PRECISION)
+    coords_radians = np.radians(final_df[["latitude", "longitude"]].to_numpy())
+    model_info = {
+        "data_hash": hash_coordinates(coords_radians),
+        "params": {"dedupe": dedupe, "noise_max_distance_km": noise_max_distance_km},
+    }
+
+    if dedupe:
+        points, inverse, weights = collapse_coordinates(coords_radians)
+        logging.info(f"Collapsed {len(coords_radians)} listings into {len(points)} unique coordinates.")
+    else:
+        points, inverse, weights = coords_radians, np.arange(len(coords_radians)), None
+
+    # --- First round ---
+    first_config, point_labels = _round(
+        points,
+        weights,
+        FIRST_ROUND_SIZE_OPTIONS,
+        FIRST_ROUND_SAMPLES_OPTIONS,
+        "silhouette",
+        FIRST_ROUND_DEFAULT_PARAMS,
+        n_workers,
+        cache,
+        "First round",
+    )
+    model_info["params"]["first_round"] = list(first_config)
+    noise_points = point_labels == -1
+    logging.info(f"First round: {len(np.unique(point_labels[~noise_points]))} clusters, {noise_points.sum()} noise points.")
+
+    # --- Second round on the first round's noise ---
+    if noise_points.any():
+        second_config, secondary_labels = _round(
+            points[noise_points],
+            weights[noise_points] if weights is not None else None,
+            SECOND_ROUND_SIZE_OPTIONS,
+            SECOND_ROUND_SAMPLES_OPTIONS,
+            "noise_fraction",
+            SECOND_ROUND_DEFAULT_PARAMS,
+            n_workers,
+            cache,
+            "Second round",
+        )
+        model_info["params"]["second_round"] = list(second_config)
+        max_cluster_id_first = point_labels[~noise_points].max() if (~noise_points).any() else -1
+        point_labels = point_labels.copy()
+        point_labels[noise_points] = np.where(secondary_labels >= 0, max_cluster_id_first + 1 + secondary_labels, -1)
+        logging.info(f"Second round done. {np.sum(secondary_labels == -1)} points remain as noise.")
+
+    # Broadcast labels from unique points back to listings
+    final_df["cluster"] = point_labels[inverse]
+
+    # --- Remaining noise to nearest centroid ---
+    assign_noise_to_nearest_centroid(final_df, noise_max_distance_km, n_workers)
+    unassigned = final_df["cluster"] == -1
+    if unassigned.any():
+        if noise_max_distance_km is None:
+            reason = "there is no cluster to attach them to"
+        else:
+            reason = f"they are beyond {noise_max_distance_km} km of every centroid"
+        logging.warning(f"{unassigned.sum()} listings stay unassigned and are queued for re-clustering: {reason}.")
+    # Queued in cluster_recluster_queue on publish, like the listings assign.py flags
+    unassigned_df = final_df.loc[unassigned, ["listing_db_id", "nearest_cluster", "centroid_distance_km"]].rename(
+        columns={"nearest_cluster": "nearest_cluster_id", "centroid_distance_km": "distance_km"}
+    )
+    unassigned_df["nearest_cluster_id"] = (unassigned_df["nearest_cluster_id"].astype(int) + 1).where(
+        unassigned_df["nearest_cluster_id"] >= 0
+    ).astype("Int64")
+    unassigned_df["distance_km"] = unassigned_df["distance_km"].round(3)
+    final_df = final_df.loc[~unassigned]
+
+    # Published centroids average every member, noise attached above included, as assign.py recomputes them
+    clusters_df = final_df.groupby("cluster").agg(
+        latitude=("latitude", "mean"), longitude=("longitude", "mean"), member_count=("listing_db_id", "count")
+    ).reset_index()
+    clusters_df = clusters_df.rename(
+        columns={"cluster": "cluster_id", "latitude": "centroid_lat", "longitude": "centroid_lon"}
+    )
+
+    # Database cluster ids are 1-based
+    clusters_df["cluster_id"] = clusters_df["cluster_id"].astype(int) + 1
+    assignments_df = final_df[["listing_db_id", "cluster", "centroid_distance_km"]].rename(columns={"cluster": "cluster_id"})
+    assignments_df["cluster_id"] = assignments_df["cluster_id"].astype(int) + 1
+
+    return assignments_df, clusters_df, unassigned_df.reset_index(drop=True), model_info
+
@@ -0,0 +1,246 @@
+import io
+import json
+import logging
+from typing import Dict, Optional
+
+import pandas as pd
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+
+# OpenWeatherMap air quality is modelled on a coarse grid, so an old cluster's reading stands in for a new
+# cluster whose centroid is this close to it until air_quality_import.py is re-run
+AIR_QUALITY_REKEY_MAX_KM = 5.0
+
+# New cluster -> newest reading of the old cluster with the nearest centroid, within the cap.
+# Runs before the old rental_clusters is dropped; km from an equirectangular approximation.
+REKEY_AIR_QUALITY_SQL = """
+    CREATE TEMP TABLE cluster_air_quality_rekeyed ON COMMIT DROP AS
+    SELECT new.cluster_id, aq.aqi, aq.category
+    FROM {clusters} new
+    CROSS JOIN LATERAL (
+        SELECT old.cluster_id,
+               111.32 * sqrt(power(old.centroid_lat - new.centroid_lat, 2)
+                             + power((old.centroid_lon - new.centroid_lon) * cos(radians(new.centroid_lat)), 2)) AS km
+        FROM rental_clusters old
+        ORDER BY km
+        LIMIT 1
+    ) nearest
+    CROSS JOIN LATERAL (
+        SELECT aqi, category FROM cluster_air_quality
+        WHERE cluster_id = nearest.cluster_id
+        ORDER BY aq_id DESC
+        LIMIT 1
+    ) aq
+    WHERE nearest.km <= %s;
+
+    DELETE FROM cluster_air_quality;
+    INSERT INTO cluster_air_quality (cluster_id, aqi, category)
+    SELECT cluster_id, aqi, category FROM cluster_air_quality_rekeyed ORDER BY cluster_id;
+"""
+
+# Same upsert as assign.py's flagged listings
+ENQUEUE_SQL = """
+    INSERT INTO cluster_recluster_queue (listing_db_id, nearest_cluster_id, distance_km)
+    VALUES %s
+    ON CONFLICT (listing_db_id) DO UPDATE SET
+        nearest_cluster_id = EXCLUDED.nearest_cluster_id,
+        distance_km = EXCLUDED.distance_km,
+        flagged_at = now();
+"""
+
+
+def _copy_frame(cur, table: str, df: pd.DataFrame, columns):
+    """Bulk-load a DataFrame into ``table`` through COPY."""
+    buffer = io.StringIO()
+    df[columns].to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert(
+        sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+            sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, columns))
+        ),
+        buffer,
+    )
+
+
+def _build_staging(cur, version: int, assignments_df: pd.DataFrame, clusters_df: pd.DataFrame):
+    clusters_table = f"rental_clusters_v{version}"
+    assignments_table = f"listing_clusters_v{version}"
+
+    cur.execute(
+        sql.SQL(
+            """
+            CREATE TABLE {} (
+                cluster_id integer NOT NULL,
+                centroid_lat double precision NOT NULL,
+                centroid_lon double precision NOT NULL,
+                member_count integer NOT NULL
+            );
+            CREATE TABLE {} (
+                assignment_id serial NOT NULL,
+                listing_db_id integer NOT NULL,
+                cluster_id integer NOT NULL
+            );
+            """
+        ).format(sql.Identifier(clusters_table), sql.Identifier(assignments_table))
+    )
+    _copy_frame(cur, clusters_table, clusters_df, ["cluster_id", "centroid_lat", "centroid_lon", "member_count"])
+    _copy_frame(cur, assignments_table, assignments_df, ["listing_db_id", "cluster_id"])
+
+    # Indexes are built after the load, which is much cheaper than maintaining them row by row
+    cur.execute(
+        sql.SQL(
+            """
+            ALTER TABLE {clusters} ADD CONSTRAINT {clusters_pkey} PRIMARY KEY (cluster_id);
+            ALTER TABLE {assignments} ADD CONSTRAINT {assignments_pkey} PRIMARY KEY (assignment_id);
+            ALTER TABLE {assignments} ADD CONSTRAINT {listing_key} UNIQUE (listing_db_id);
+            CREATE INDEX {cluster_idx} ON {assignments} (cluster_id);
+            ANALYZE {clusters};
+            ANALYZE {assignments};
+            """
+        ).format(
+            clusters=sql.Identifier(clusters_table),
+            assignments=sql.Identifier(assignments_table),
+            clusters_pkey=sql.Identifier(f"{clusters_table}_pkey"),
+            assignments_pkey=sql.Identifier(f"{assignments_table}_pkey"),
+            listing_key=sql.Identifier(f"{assignments_table}_listing_db_id_key"),
+            cluster_idx=sql.Identifier(f"{assignments_table}_cluster_id_idx"),
+        )
+    )
+    return clusters_table, assignments_table
+
+
+def _swap_in(cur, version: int, clusters_table: str, assignments_table: str, unassigned_df: pd.DataFrame) -> int:
+    """
+    Replace the live tables with the staging ones; run inside one transaction.
+
+    ``cluster_air_quality`` is keyed by cluster id, so it is re-keyed to the
+    new clusters in the same transaction. The published listings leave
+    ``cluster_recluster_queue`` and ``unassigned_df`` joins it. Returns the number of new clusters without
+    a reading.
+    """
+    renames = {
+        "rental_clusters": [(f"{clusters_table}_pkey", "rental_clusters_pkey")],
+        "listing_clusters": [
+            (f"{assignments_table}_pkey", "listing_clusters_pkey"),
+            (f"{assignments_table}_listing_db_id_key", "listing_clusters_listing_db_id_key"),
+            (f"{assignments_table}_cluster_id_idx", "listing_clusters_cluster_id_idx"),
+            (f"{assignments_table}_assignment_id_seq", "listing_clusters_assignment_id_seq"),
+        ],
+    }
+    cur.execute("LOCK TABLE rental_clusters, listing_clusters, cluster_air_quality IN ACCESS EXCLUSIVE MODE;")
+    # Only the listings this run assigned leave the queue; ones flagged since it read its input stay
+    cur.execute(
+        sql.SQL("DELETE FROM cluster_recluster_queue q USING {} a WHERE q.listing_db_id = a.listing_db_id;").format(
+            sql.Identifier(assignments_table)
+        )
+    )
+    if not unassigned_df.empty:
+        rows = unassigned_df[["listing_db_id", "nearest_cluster_id", "distance_km"]].astype(object)
+        execute_values(cur, ENQUEUE_SQL, rows.where(rows.notna(), None).itertuples(index=False, name=None))
+    cur.execute(
+        sql.SQL(REKEY_AIR_QUALITY_SQL).format(clusters=sql.Identifier(clusters_table)), (AIR_QUALITY_REKEY_MAX_KM,)
+    )
+    cur.execute(
+        sql.SQL("SELECT COUNT(*) FROM {} WHERE cluster_id NOT IN (SELECT cluster_id FROM cluster_air_quality);").format(
+            sql.Identifier(clusters_table)
+        )
+    )
+    missing_air_quality = cur.fetchone()[0]
+
+    for live, staging in (("rental_clusters", clusters_table), ("listing_clusters", assignments_table)):
+        cur.execute(sql.SQL("DROP TABLE {};").format(sql.Identifier(live)))
+        cur.execute(sql.SQL("ALTER TABLE {} RENAME TO {};").format(sql.Identifier(staging), sql.Identifier(live)))
+        for old_name, new_name in renames[live]:
+            # Sequences and indexes share the relation namespace, so ALTER INDEX works for both
+            kind = "SEQUENCE" if old_name.endswith("_seq") else "INDEX"
+            cur.execute(
+                sql.SQL("ALTER {} {} RENAME TO {};").format(
+                    sql.SQL(kind), sql.Identifier(old_name), sql.Identifier(new_name)
+                )
+            )
+
+    cur.execute("UPDATE cluster_model_versions SET is_current = (version = %s);", (version,))
+    return missing_air_quality
+
+
+def publish_clusters(
+    conn,
+    assignments_df: pd.DataFrame,
+    clusters_df: pd.DataFrame,
+    model_info: Dict,
+    unassigned_df: Optional[pd.DataFrame] = None,
+) -> int:
+    """
+    Atomically replace ``rental_clusters`` and ``listing_clusters``.
+
+    The new clustering is loaded with COPY into versioned staging tables
+    (``rental_clusters_v<N>``, ``listing_clusters_v<N>``), indexed and
+    analyzed, and then swapped in with renames inside a single short
+    transaction. Readers see either the old or the new assignment table,
+    never a partial or duplicated one. In the same transaction every new
+    cluster takes over the air quality reading of the old cluster with the
+    nearest centroid (within ``AIR_QUALITY_REKEY_MAX_KM``), so AQI never
+    attaches to an unrelated cluster. The version, input hash and chosen
+    parameters are recorded in ``cluster_model_versions``. Listings the run
+    left unassigned are queued in ``cluster_recluster_queue`` in the same
+    transaction, so the next full run picks them up.
+
+    Args:
+        conn: Open psycopg2 connection.
+        assignments_df (DataFrame): listing_db_id, cluster_id.
+        clusters_df (DataFrame): cluster_id, centroid_lat, centroid_lon, member_count.
+        model_info (dict): Parameters and data hash of the clustering run.
+        unassigned_df (DataFrame): listing_db_id, nearest_cluster_id, distance_km
+            of the listings left without a cluster.
+
+    Returns:
+        int: The published cluster-model version.
+    """
+    if unassigned_df is None:
+        unassigned_df = pd.DataFrame(columns=["listing_db_id", "nearest_cluster_id", "distance_km"])
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO cluster_model_versions (data_hash, n_clusters, n_listings, params)
+            VALUES (%s, %s, %s, %s)
+            RETURNING version;
+            """,
+            (
+                model_info.get("data_hash"),
+                len(clusters_df),
+                len(assignments_df),
+                json.dumps(model_info.get("params", {})),
+            ),
+        )
+        version = cur.fetchone()[0]
+        try:
+            clusters_table, assignments_table = _build_staging(cur, version, assignments_df, clusters_df)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logging.info(f"Loaded cluster model v{version} into staging tables.")
+
+        try:
+            missing_air_quality = _swap_in(cur, version, clusters_table, assignments_table, unassigned_df)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            cur.execute(
+                sql.SQL("DROP TABLE IF EXISTS {}, {};").format(
+                    sql.Identifier(clusters_table), sql.Identifier(assignments_table)
+                )
+            )
+            conn.commit()
+            raise
+
+    logging.info(
+        f"Published cluster model v{version}: {len(clusters_df)} clusters, {len(assignments_df)} assignments, "
+        f"{len(unassigned_df)} listings queued for re-clustering."
+    )
+    if missing_air_quality:
+        logging.warning(
+            f"{missing_air_quality} new clusters have no air quality reading within {AIR_QUALITY_REKEY_MAX_KM} km; "
+            "re-run the air quality fetch and import for them."
+        )
+    return version
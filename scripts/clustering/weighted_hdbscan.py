@@ -0,0 +1,359 @@
+"""
+HDBSCAN* over unique coordinates with multiplicity weights.
+
+sklearn's HDBSCAN has no ``sample_weight``. Rounded listing coordinates
+repeat a lot (every unit of an apartment building shares one point), so
+here each unique coordinate is one point whose weight is the number of
+listings on it. The weights go into the density estimate: a point's core
+distance is the radius that holds ``min_samples`` listings, not
+``min_samples`` unique points. Cluster sizes in the condensed tree are
+summed weights, so ``min_cluster_size`` still counts listings.
+
+The steps follow sklearn's implementation: core distances from a
+BallTree, a minimum spanning tree on mutual reachability distance, single
+linkage, tree condensing, and excess-of-mass selection. Only the tree
+differs above a few thousand unique points: there it is built with scipy
+from a k-nearest-neighbour graph rather than by Prim's algorithm over all
+pairs, so the cost grows like u log u in the number of unique points u
+rather than u^2.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+from sklearn.metrics import DistanceMetric
+from sklearn.neighbors import BallTree
+
+# Neighbours per point in the sparse mutual reachability graph
+MST_NEIGHBORS = 16
+# Up to this many unique points the tree comes from Prim's algorithm over all pairs, as in sklearn
+EXACT_MST_MAX_POINTS = 2048
+
+
+def collapse_coordinates(coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Collapse duplicate rows of a coordinate array.
+
+    Returns:
+        tuple: (unique coordinates, inverse index mapping every input row to
+                its unique row, multiplicity of every unique row)
+    """
+    unique, inverse, counts = np.unique(coords, axis=0, return_inverse=True, return_counts=True)
+    return unique, inverse.reshape(-1), counts
+
+
+def weighted_core_distances(
+    coords: np.ndarray, weights: np.ndarray, min_samples: int, metric: str
+) -> np.ndarray:
+    """Distance at which each point's neighbourhood (itself included) holds ``min_samples`` weight."""
+    k = min(min_samples, len(coords))
+    tree = BallTree(coords, metric=metric)
+    distances, indices = tree.query(coords, k=k)
+    cumulative = np.cumsum(weights[indices], axis=1)
+    reached = cumulative >= min_samples
+    # Points whose k nearest never reach min_samples fall back to the k-th neighbour
+    first = np.where(reached.any(axis=1), reached.argmax(axis=1), k - 1)
+    return distances[np.arange(len(coords)), first]
+
+
+def prim_mst(coords: np.ndarray, core_distances: np.ndarray, metric: str) -> np.ndarray:
+    """Prim's algorithm on the full mutual reachability graph; O(n^2) time, O(n) memory."""
+    n = len(coords)
+    dist_metric = DistanceMetric.get_metric(metric)
+    edges = np.empty((n - 1, 3), dtype=np.float64)
+
+    in_tree = np.zeros(n, dtype=bool)
+    best_distance = np.full(n, np.inf)
+    best_source = np.zeros(n, dtype=np.int64)
+    current = 0
+
+    for i in range(n - 1):
+        in_tree[current] = True
+        candidates = np.flatnonzero(~in_tree)
+        distances = dist_metric.pairwise(coords[current : current + 1], coords[candidates])[0]
+        reachability = np.maximum(distances, np.maximum(core_distances[current], core_distances[candidates]))
+        better = reachability < best_distance[candidates]
+        best_distance[candidates[better]] = reachability[better]
+        best_source[candidates[better]] = current
+
+        # Ties go to the lowest index, as in sklearn
+        new_node = candidates[np.argmin(best_distance[candidates])]
+        edges[i] = (best_source[new_node], new_node, best_distance[new_node])
+        current = new_node
+
+    return edges
+
+
+def _mutual_reachability(distances, core_distances, sources, targets) -> np.ndarray:
+    weights = np.maximum(distances, np.maximum(core_distances[sources], core_distances[targets]))
+    # csgraph reads a zero weight as a missing edge
+    return np.maximum(weights, np.finfo(np.float64).tiny)
+
+
+def _cheapest_links(coords, core_distances, components, n_components, metric, n_neighbors):
+    """
+    For every component, its lightest mutual reachability edge among each
+    member's ``n_neighbors`` nearest points outside it.
+    """
+    sources, targets, weights = [], [], []
+    for component in range(n_components):
+        inside = components == component
+        members, outside = np.flatnonzero(inside), np.flatnonzero(~inside)
+        k = min(n_neighbors, len(outside))
+        distances, nearest = BallTree(coords[outside], metric=metric).query(coords[members], k=k)
+        nearest = outside[nearest]
+        reachability = _mutual_reachability(distances, core_distances, members[:, None], nearest)
+        row, col = np.unravel_index(np.argmin(reachability), reachability.shape)
+        sources.append(members[row])
+        targets.append(nearest[row, col])
+        weights.append(reachability[row, col])
+    return np.array(sources), np.array(targets), np.array(weights)
+
+
+def mutual_reachability_mst(
+    coords: np.ndarray, core_distances: np.ndarray, metric: str, n_neighbors: int = MST_NEIGHBORS
+) -> np.ndarray:
+    """
+    Minimum spanning tree of the mutual reachability graph.
+
+    Up to ``EXACT_MST_MAX_POINTS`` points it is ``prim_mst``, so small inputs
+    get exactly sklearn's tree, ties included. Above that it is built from each point's ``n_neighbors`` nearest
+    neighbours instead of all pairs: components the neighbour graph leaves apart are linked Boruvka style
+    through each component's cheapest edge to its nearest outside points, and
+    the tree is taken over neighbour and link edges with scipy. Time and
+    memory are O(u * n_neighbors) plus one BallTree per leftover component
+    and round. The tree is exact when every edge of the full tree joins
+    near neighbours, as in dense areas; across sparse gaps a link may be
+    slightly heavier than the exact one.
+
+    Returns:
+        ndarray: n - 1 rows of (source, target, mutual reachability distance).
+    """
+    n = len(coords)
+    if n <= EXACT_MST_MAX_POINTS:
+        return prim_mst(coords, core_distances, metric)
+
+    k = min(n_neighbors + 1, n)
+    distances, indices = BallTree(coords, metric=metric).query(coords, k=k)
+    sources = np.repeat(np.arange(n), k)
+    targets = indices.reshape(-1)
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    weights = _mutual_reachability(distances.reshape(-1)[keep], core_distances, sources, targets)
+
+    while True:
+        graph = coo_matrix((weights, (sources, targets)), shape=(n, n)).tocsr()
+        n_components, components = connected_components(graph, directed=False)
+        if n_components == 1:
+            break
+        link_sources, link_targets, link_weights = _cheapest_links(
+            coords, core_distances, components, n_components, metric, n_neighbors
+        )
+        sources = np.concatenate((sources, link_sources))
+        targets = np.concatenate((targets, link_targets))
+        weights = np.concatenate((weights, link_weights))
+
+    tree = minimum_spanning_tree(graph).tocoo()
+    return np.column_stack((tree.row, tree.col, tree.data)).astype(np.float64)
+
+
+def single_linkage(edges: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turn MST edges into a single-linkage hierarchy.
+
+    Returns:
+        tuple: (hierarchy rows of (left, right, distance), mass of every node;
+                leaves are 0..n-1 and merges are n..2n-2)
+    """
+    n = len(weights)
+    order = np.argsort(edges[:, 2])
+    parent = np.arange(2 * n - 1)
+    mass = np.zeros(2 * n - 1, dtype=np.float64)
+    mass[:n] = weights
+    hierarchy = np.empty((n - 1, 3), dtype=np.float64)
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    next_node = n
+    for row, edge in enumerate(edges[order]):
+        left, right = find(int(edge[0])), find(int(edge[1]))
+        hierarchy[row] = (left, right, edge[2])
+        mass[next_node] = mass[left] + mass[right]
+        parent[left] = parent[right] = next_node
+        next_node += 1
+
+    return hierarchy, mass
+
+
+def _subtree(hierarchy: np.ndarray, node: int, n: int):
+    result = []
+    to_process = [node]
+    while to_process:
+        result.extend(to_process)
+        to_process = [int(child) for x in to_process if x >= n for child in hierarchy[x - n, :2]]
+    return result
+
+
+def condense_tree(
+    hierarchy: np.ndarray, mass: np.ndarray, min_cluster_size: int, core_distances: np.ndarray
+) -> np.ndarray:
+    """
+    Condense the hierarchy: a split only creates two clusters when both
+    sides hold at least ``min_cluster_size`` weight; otherwise the smaller
+    side's points fall out of the cluster.
+
+    A single heavy point behaves like its duplicates would: it can carry
+    or form a cluster, whose members leave at the point's own core
+    distance.
+
+    Returns:
+        ndarray: rows of (parent cluster, child, lambda, child mass). Point
+                 children are < n, cluster labels start at n.
+    """
+    n = len(hierarchy) + 1
+    root = 2 * n - 2
+    relabel = {root: n}
+    next_label = n + 1
+    ignore = np.zeros(2 * n - 1, dtype=bool)
+    rows = []
+
+    with np.errstate(divide="ignore"):
+        leaf_lambdas = 1.0 / core_distances
+
+    for node in _subtree(hierarchy, root, n):
+        if node < n or ignore[node]:
+            continue
+        left, right, distance = hierarchy[node - n]
+        left, right = int(left), int(right)
+        lambda_value = 1.0 / distance if distance > 0 else np.inf
+        left_mass, right_mass = mass[left], mass[right]
+        split = left_mass >= min_cluster_size and right_mass >= min_cluster_size
+
+        for child, child_mass in ((left, left_mass), (right, right_mass)):
+            if split:
+                relabel[child] = next_label
+                rows.append((relabel[node], next_label, lambda_value, child_mass))
+                next_label += 1
+            elif child_mass >= min_cluster_size:
+                # The larger side carries the parent cluster on
+                relabel[child] = relabel[node]
+            else:
+                for sub_node in _subtree(hierarchy, child, n):
+                    if sub_node < n:
+                        rows.append((relabel[node], sub_node, lambda_value, mass[sub_node]))
+                    ignore[sub_node] = True
+                continue
+
+            if child < n:
+                rows.append((relabel[child], child, leaf_lambdas[child], child_mass))
+
+    return np.array(rows, dtype=np.float64).reshape(-1, 4)
+
+
+def select_clusters(condensed: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Excess-of-mass cluster selection.
+
+    Returns:
+        tuple: (selected mask, parent index) over cluster labels offset by n
+    """
+    parents = condensed[:, 0].astype(np.int64)
+    children = condensed[:, 1].astype(np.int64)
+    lambdas = condensed[:, 2]
+    child_mass = condensed[:, 3]
+
+    num_clusters = parents.max() - n + 1
+    birth = np.zeros(num_clusters)
+    is_cluster_row = children >= n
+    birth[children[is_cluster_row] - n] = lambdas[is_cluster_row]
+
+    stability = np.zeros(num_clusters)
+    np.add.at(stability, parents - n, (lambdas - birth[parents - n]) * child_mass)
+
+    cluster_parent = np.full(num_clusters, -1, dtype=np.int64)
+    cluster_parent[children[is_cluster_row] - n] = parents[is_cluster_row] - n
+    child_clusters = [[] for _ in range(num_clusters)]
+    for child, parent in zip(children[is_cluster_row] - n, parents[is_cluster_row] - n):
+        child_clusters[parent].append(child)
+
+    selected = np.ones(num_clusters, dtype=bool)
+    selected[0] = False  # the root is never a cluster (allow_single_cluster=False)
+    # Children always carry larger labels than their parents
+    for cluster in range(num_clusters - 1, 0, -1):
+        subtree_stability = sum(stability[child] for child in child_clusters[cluster])
+        if subtree_stability > stability[cluster]:
+            selected[cluster] = False
+            stability[cluster] = subtree_stability
+        else:
+            to_process = list(child_clusters[cluster])
+            while to_process:
+                sub_cluster = to_process.pop()
+                selected[sub_cluster] = False
+                to_process.extend(child_clusters[sub_cluster])
+
+    return selected, cluster_parent
+
+
+def label_points(condensed: np.ndarray, n: int, selected: np.ndarray, cluster_parent: np.ndarray) -> np.ndarray:
+    """Label each point with its selected ancestor cluster, or -1 for noise."""
+    num_clusters = len(selected)
+    selected_ancestor = np.full(num_clusters, -1, dtype=np.int64)
+    label_of = np.full(num_clusters, -1, dtype=np.int64)
+    label_of[selected] = np.arange(int(selected.sum()))
+    for cluster in range(1, num_clusters):
+        if selected[cluster]:
+            selected_ancestor[cluster] = label_of[cluster]
+        else:
+            selected_ancestor[cluster] = selected_ancestor[cluster_parent[cluster]]
+
+    labels = np.full(n, -1, dtype=np.int64)
+    point_rows = condensed[:, 1] < n
+    points = condensed[point_rows, 1].astype(np.int64)
+    parents = condensed[point_rows, 0].astype(np.int64) - n
+    labels[points] = selected_ancestor[parents]
+    return labels
+
+
+def weighted_hdbscan(
+    coords: np.ndarray,
+    sample_weight: np.ndarray,
+    min_cluster_size: int = 5,
+    min_samples: Optional[int] = None,
+    metric: str = "haversine",
+) -> np.ndarray:
+    """
+    Cluster weighted points with HDBSCAN*.
+
+    Args:
+        coords (ndarray): Unique points (radians for haversine).
+        sample_weight (ndarray): Multiplicity of every point.
+        min_cluster_size (int): Minimum summed weight of a cluster.
+        min_samples (int): Weight a neighbourhood needs for a core point
+            (defaults to min_cluster_size).
+        metric (str): Any BallTree metric.
+
+    Returns:
+        ndarray: Cluster label per point, -1 for noise.
+    """
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    weights = np.asarray(sample_weight, dtype=np.float64)
+    n = len(coords)
+    if n < 2:
+        return np.full(n, -1, dtype=np.int64)
+
+    min_samples = min_samples if min_samples is not None else min_cluster_size
+    core_distances = weighted_core_distances(coords, weights, min_samples, metric)
+    edges = mutual_reachability_mst(coords, core_distances, metric)
+    hierarchy, mass = single_linkage(edges, weights)
+    condensed = condense_tree(hierarchy, mass, min_cluster_size, core_distances)
+    if len(condensed) == 0:
+        return np.full(n, -1, dtype=np.int64)
+    selected, cluster_parent = select_clusters(condensed, n)
+    return label_points(condensed, n, selected, cluster_parent)
@@ -0,0 +1,212 @@
+import os
+import sys
+import argparse
+import logging
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from etl_profiler import db_time, etl_run, record_rows, stage
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, root)
+from server.utils.feature_snapshot import open_snapshot, write_snapshot
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+CRIME_CSV = os.path.join(root, "raw_data", "Crime_Incidents_in_2023.csv")
+GRID_PATH = os.path.join(root, "raw_data", "crime_grid", "crime_grid.npz")
+
+CELL_METERS = 100
+BANDWIDTH_METERS = 300
+METERS_PER_DEGREE_LAT = 111_320
+
+OFFENSES = [
+    "HOMICIDE",
+    "SEX ABUSE",
+    "ASSAULT W/DANGEROUS WEAPON",
+    "ROBBERY",
+    "BURGLARY",
+    "ARSON",
+    "MOTOR VEHICLE THEFT",
+    "THEFT F/AUTO",
+    "THEFT/OTHER",
+]
+VIOLENT_OFFENSES = OFFENSES[:4]
+SHIFTS = ["DAY", "EVENING", "MIDNIGHT"]
+
+# The incident data only covers DC; other listings get no value rather than a misleading zero
+COVERAGE_STATES = {"DC"}
+
+
+class CrimeGrid(NamedTuple):
+    """Incident counts and smoothed densities per (offense, shift, row, col); row 0 is the southern edge."""
+    counts: np.ndarray
+    density: np.ndarray
+    south: float
+    west: float
+    cell_lat: float
+    cell_lon: float
+
+    def cells(self, lat, lon):
+        """(row, col, inside) for each point; a direct index, no search."""
+        rows = np.floor((np.asarray(lat) - self.south) / self.cell_lat).astype(np.int64)
+        cols = np.floor((np.asarray(lon) - self.west) / self.cell_lon).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.counts.shape[2]) & (cols >= 0) & (cols < self.counts.shape[3])
+        return np.where(inside, rows, 0), np.where(inside, cols, 0), inside
+
+
+def load_incidents(path: str = CRIME_CSV) -> pd.DataFrame:
+    df = pd.read_csv(path, usecols=["OFFENSE", "SHIFT", "LATITUDE", "LONGITUDE"], encoding="utf-8-sig")
+    df = df.dropna(subset=["LATITUDE", "LONGITUDE"])
+    df = df[df["OFFENSE"].isin(OFFENSES) & df["SHIFT"].isin(SHIFTS)]
+    logging.info(f"Loaded {len(df)} incidents from {path}")
+    return df.reset_index(drop=True)
+
+
+def _gaussian_kernel(sigma_cells: float) -> np.ndarray:
+    radius = max(1, int(np.ceil(3 * sigma_cells)))
+    x = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (x / sigma_cells) ** 2)
+    return kernel / kernel.sum()
+
+
+def _smooth(grid: np.ndarray, sigma_cells: float) -> np.ndarray:
+    """Separable gaussian blur over the last two axes, one shifted add per kernel tap."""
+    kernel = _gaussian_kernel(sigma_cells)
+    radius = len(kernel) // 2
+    out = grid
+    for axis in (-2, -1):
+        pad = [(0, 0)] * grid.ndim
+        pad[axis] = (radius, radius)
+        padded = np.pad(out, pad)
+        n = out.shape[axis]
+        out = sum(w * np.take(padded, np.arange(i, i + n), axis=axis) for i, w in enumerate(kernel))
+    return out
+
+
+def build_grid(
+    incidents: pd.DataFrame, cell_meters: float = CELL_METERS, bandwidth_meters: float = BANDWIDTH_METERS
+) -> CrimeGrid:
+    """
+    Bin incidents into a lat/lon grid of roughly ``cell_meters`` cells with one
+    layer per offense and shift, and smooth each layer with a gaussian kernel.
+
+    Densities are incidents per km² over the period the data covers.
+    """
+    lat, lon = incidents["LATITUDE"].to_numpy(), incidents["LONGITUDE"].to_numpy()
+    cell_lat = cell_meters / METERS_PER_DEGREE_LAT
+    cell_lon = cell_meters / (METERS_PER_DEGREE_LAT * np.cos(np.radians(lat.mean())))
+    # Margin so the kernel's tails fit on the grid
+    margin = int(np.ceil(3 * bandwidth_meters / cell_meters))
+    south, west = lat.min() - margin * cell_lat, lon.min() - margin * cell_lon
+    ny = int(np.ceil((lat.max() - south) / cell_lat)) + margin + 1
+    nx = int(np.ceil((lon.max() - west) / cell_lon)) + margin + 1
+
+    offense = pd.Categorical(incidents["OFFENSE"], categories=OFFENSES).codes
+    shift = pd.Categorical(incidents["SHIFT"], categories=SHIFTS).codes
+    rows = np.floor((lat - south) / cell_lat).astype(np.int64)
+    cols = np.floor((lon - west) / cell_lon).astype(np.int64)
+    counts = np.zeros((len(OFFENSES), len(SHIFTS), ny, nx), dtype=np.float32)
+    np.add.at(counts, (offense, shift, rows, cols), 1)
+
+    cell_km2 = (cell_meters / 1000) ** 2
+    density = (_smooth(counts, bandwidth_meters / cell_meters) / cell_km2).astype(np.float32)
+    logging.info(f"Built a {ny}x{nx} crime grid ({cell_meters} m cells, {bandwidth_meters} m bandwidth)")
+    return CrimeGrid(counts, density, float(south), float(west), float(cell_lat), float(cell_lon))
+
+
+def save_grid(grid: CrimeGrid, path: str = GRID_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(
+        path,
+        counts=grid.counts,
+        density=grid.density,
+        origin=np.array([grid.south, grid.west, grid.cell_lat, grid.cell_lon]),
+        offenses=np.array(OFFENSES),
+        shifts=np.array(SHIFTS),
+    )
+    logging.info(f"Saved crime grid to {path}")
+
+
+def load_grid(path: str = GRID_PATH) -> CrimeGrid:
+    with np.load(path) as data:
+        south, west, cell_lat, cell_lon = data["origin"].tolist()
+        return CrimeGrid(data["counts"], data["density"], south, west, cell_lat, cell_lon)
+
+
+def listing_densities(grid: CrimeGrid, listings: pd.DataFrame) -> pd.DataFrame:
+    """Crime and violent crime density at each listing's cell; NaN outside the covered area."""
+    rows, cols, inside = grid.cells(listings["latitude"], listings["longitude"])
+    inside &= listings["state"].isin(COVERAGE_STATES).to_numpy()
+    total = grid.density.sum(axis=(0, 1))
+    violent = grid.density[: len(VIOLENT_OFFENSES)].sum(axis=(0, 1))
+    return pd.DataFrame({
+        "listing_db_id": listings["listing_db_id"].to_numpy(),
+        "crime_density": np.where(inside, total[rows, cols], np.nan).round(2),
+        "violent_crime_density": np.where(inside, violent[rows, cols], np.nan).round(2),
+    })
+
+
+def publish(df_crime: pd.DataFrame, snapshot):
+    """Write the densities to Postgres and republish the snapshot with them."""
+    # Imported here so the grid can be built without a database
+    from utils.db_engine import DBEngine
+
+    with stage("write_db"), db_time():
+        df_crime.to_sql(
+            "listing_crime_density",
+            DBEngine().get_engine(),
+            if_exists="replace",
+            index=False,
+            method="multi",
+            chunksize=1000,
+        )
+        record_rows(written=len(df_crime))
+
+    with stage("publish_snapshot"):
+        table = snapshot.table
+        by_listing = df_crime.set_index("listing_db_id")
+        ids = table.column("listing_db_id").to_pandas()
+        for column in ("crime_density", "violent_crime_density"):
+            table = table.set_column(
+                table.schema.get_field_index(column),
+                table.schema.field(column),
+                pa.array(ids.map(by_listing[column]), type=pa.float64(), from_pandas=True),
+            )
+        write_snapshot(table, metadata={"source": "crime_density", "features_version": snapshot.manifest["version"]})
+        record_rows(written=table.num_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid crime incidents and attach a density feature to every listing.")
+    parser.add_argument("--csv", default=CRIME_CSV, help="DC crime incidents CSV.")
+    parser.add_argument("--cell-meters", type=float, default=CELL_METERS, help="Grid cell size.")
+    parser.add_argument("--bandwidth-meters", type=float, default=BANDWIDTH_METERS, help="Gaussian kernel sigma.")
+    parser.add_argument("--grid-only", action="store_true", help="Build and save the grid, skip listings.")
+    args = parser.parse_args()
+
+    with etl_run("crime_density"):
+        with stage("load_incidents"):
+            incidents = load_incidents(args.csv)
+            record_rows(read=len(incidents))
+        with stage("build_grid"):
+            grid = build_grid(incidents, args.cell_meters, args.bandwidth_meters)
+            save_grid(grid)
+        if args.grid_only:
+            return
+
+        with stage("lookup"):
+            snapshot = open_snapshot()
+            if snapshot is None:
+                raise SystemExit("No feature snapshot found; run build_feature_snapshot.py first.")
+            listings = snapshot.table.select(["listing_db_id", "latitude", "longitude", "state"]).to_pandas()
+            df_crime = listing_densities(grid, listings)
+            record_rows(read=len(listings), written=int(df_crime["crime_density"].notna().sum()))
+        publish(df_crime, snapshot)
+
+
+if __name__ == "__main__":
+    main()
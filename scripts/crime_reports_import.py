@@ -1,58 +1,166 @@
+import io
 import os
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pandas as pd
 import psycopg2
-from psycopg2.extras import execute_values
-import json
 from dotenv import load_dotenv
-import csv
-from datetime import datetime
+from etl_profiler import db_time, etl_run, record_rows, stage
 
+CRIME_CSV = "../raw_data/Crime_Incidents_in_2023.csv"
+CHUNK_ROWS = 50_000
+WORKERS = min(4, os.cpu_count() or 1)
 
-def import_crime_reports():
-    load_dotenv()
+COLUMNS = ["CCN", "REPORT_DAT", "SHIFT", "METHOD", "OFFENSE", "LATITUDE", "LONGITUDE"]
+# REPORT_DAT looks like 2023/03/24 06:36:26+00
+REPORT_DAT_FORMAT = "%Y/%m/%d %H:%M:%S+00"
+
+STAGE_SQL = """
+    CREATE TEMP TABLE crime_reports_stage (
+        ccn text, name text, date timestamp without time zone, shift text, method text,
+        lat double precision, lon double precision
+    ) ON COMMIT DROP;
+"""
+
+UPSERT_SQL = """
+    -- A report whose date changed lives in another partition; drop it there first
+    DELETE FROM public.crime_reports c
+    USING crime_reports_stage s
+    WHERE c.ccn = s.ccn AND c.date <> s.date;
 
-    # Database connection
-    conn = psycopg2.connect(
+    INSERT INTO public.crime_reports (ccn, name, date, shift, method, lat, lon, geom)
+    SELECT ccn, name, date, shift, method, lat, lon, ST_SetSRID(ST_MakePoint(lon, lat), 4326)
+    FROM crime_reports_stage
+    ORDER BY ccn
+    ON CONFLICT (ccn, date) DO UPDATE SET
+        name = EXCLUDED.name,
+        shift = EXCLUDED.shift,
+        method = EXCLUDED.method,
+        lat = EXCLUDED.lat,
+        lon = EXCLUDED.lon,
+        geom = EXCLUDED.geom;
+"""
+
+
+def _connect():
+    return psycopg2.connect(
         host=os.getenv("db_host"),  # update as needed
         dbname=os.getenv("db_name"),  # update as needed
         user=os.getenv("db_user"),  # update as needed
         password=os.getenv("db_password"),  # update as needed,
     )
-    cur = conn.cursor()
 
-    # Prepare INSERT query
-    query = """
-        INSERT INTO crime_reports (name, date, lat, lon, geom)
-        VALUES %s
-    """
-    with open("../raw_data/Crime_Incidents_in_2023.csv", "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        ##REPORT_DAT 2023/03/24 06:36:26+00
-        values = list(
-            map(
-                lambda row: (
-                    row["OFFENSE"],
-                    datetime.strptime(row["REPORT_DAT"], "%Y/%m/%d %H:%M:%S+00"),
-                    row["LATITUDE"],
-                    row["LONGITUDE"],
-                    row["LONGITUDE"],
-                    row["LATITUDE"],
-                ),
-                filter(
-                    lambda row: row["LATITUDE"]
-                    and row["LONGITUDE"],  # Filter out rows with null lat/lon
-                    reader,
-                ),
-            )
-        )
-        print(f"Number of records: {len(values)}")
-        execute_values(
-            cur,
-            query,
-            [(v[0], v[1], v[2], v[3], v[4], v[5]) for v in values],
-            template="(%s, %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326))",
-        )
-        print("Batch insert executed")
 
+def read_chunks(path: str, chunk_rows: int = CHUNK_ROWS):
+    """Raw CSV chunks with only the columns we load, all as strings."""
+    return pd.read_csv(path, usecols=COLUMNS, dtype=str, chunksize=chunk_rows, encoding="utf-8-sig")
+
+
+def parse_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Typed rows ready for the stage table; rows without CCN, date or location are dropped."""
+    df = pd.DataFrame({
+        "ccn": chunk["CCN"].str.strip(),
+        "name": chunk["OFFENSE"],
+        "date": pd.to_datetime(chunk["REPORT_DAT"], format=REPORT_DAT_FORMAT, errors="coerce"),
+        "shift": chunk["SHIFT"],
+        "method": chunk["METHOD"],
+        "lat": pd.to_numeric(chunk["LATITUDE"], errors="coerce"),
+        "lon": pd.to_numeric(chunk["LONGITUDE"], errors="coerce"),
+    })
+    df = df.dropna(subset=["ccn", "date", "lat", "lon"])
+    # The export repeats a CCN when a report is amended; the last row wins
+    return df.drop_duplicates(subset="ccn", keep="last")
+
+
+def partition_by_ccn(df: pd.DataFrame, parts: int) -> List[pd.DataFrame]:
+    """Split ``df`` into ``parts`` frames; a CCN always lands in the same part, in every chunk."""
+    shard = pd.util.hash_pandas_object(df["ccn"], index=False).to_numpy() % parts
+    return [df[shard == part] for part in range(parts)]
+
+
+def ensure_partitions(conn, dates: pd.Series):
+    months = dates.dt.to_period("M").unique()
+    with conn.cursor() as cur:
+        for month in months:
+            cur.execute("SELECT public.ensure_crime_reports_partition(%s);", (month.start_time.date(),))
+    # Own transaction, so the partition lock is not held while loading
     conn.commit()
-    cur.close()
-    conn.close()
+
+
+def load_chunk(df: pd.DataFrame) -> int:
+    """Upsert one parsed chunk on its own connection; returns the rows inserted or updated."""
+    if df.empty:
+        return 0
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S")
+    buffer.seek(0)
+
+    conn = _connect()
+    try:
+        with db_time():
+            ensure_partitions(conn, df["date"])
+            with conn.cursor() as cur:
+                cur.execute(STAGE_SQL)
+                cur.copy_expert(
+                    "COPY crime_reports_stage (ccn, name, date, shift, method, lat, lon) FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+                cur.execute(UPSERT_SQL)
+                upserted = cur.rowcount
+            conn.commit()
+    finally:
+        conn.close()
+    return upserted
+
+
+def import_crime_reports(path: str = CRIME_CSV, chunk_rows: int = CHUNK_ROWS, workers: int = WORKERS):
+    """
+    Upsert the DC crime incidents CSV into ``crime_reports`` on CCN.
+
+    The file is read in chunks; each chunk is parsed with vectorized pandas
+    and split by CCN hash across ``workers`` loader threads (psycopg2
+    releases the GIL while the server works), with at most two chunks per
+    worker in flight. Each loader runs its parts one at a time in file
+    order, so every row of a CCN goes through the same loader and a later
+    (amended) row is applied after the earlier one, never concurrently
+    with it. Reruns update rows in place instead of duplicating them.
+    """
+    load_dotenv()
+    loaders = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"crime-loader-{i}") for i in range(workers)]
+    read, upserted = 0, 0
+    try:
+        pending = deque()
+        for chunk in read_chunks(path, chunk_rows):
+            read += len(chunk)
+            record_rows(read=len(chunk))
+            parts = partition_by_ccn(parse_chunk(chunk), workers)
+            pending.append([loader.submit(load_chunk, part) for loader, part in zip(loaders, parts)])
+            if len(pending) >= 2 * workers:
+                upserted += sum(future.result() for future in pending.popleft())
+        for futures in pending:
+            upserted += sum(future.result() for future in futures)
+    finally:
+        for loader in loaders:
+            loader.shutdown()
+    record_rows(written=upserted)
+    logging.info(f"Read {read} crime reports, inserted or updated {upserted}")
+    return upserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upsert DC crime incidents into crime_reports.")
+    parser.add_argument("--csv", default=CRIME_CSV, help="Crime incidents CSV (any number of years).")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows per chunk.")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Parallel chunk loaders.")
+    args = parser.parse_args()
+    with etl_run("crime_reports"), stage("import"):
+        import_crime_reports(args.csv, args.chunk_rows, args.workers)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
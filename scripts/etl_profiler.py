@@ -0,0 +1,413 @@
+"""
+Per-stage instrumentation for the import scripts and API fetchers.
+
+A run groups stages; each stage records wall and CPU time, peak RSS, rows
+read and written, HTTP calls (count, errors, latency percentiles per host)
+and time spent in the database. When the run ends a JSON report is written
+to ``ETL_REPORT_DIR`` (default ``<repo>/etl_reports``) together with a
+comparison against the previous report of the same run.
+
+    with etl_run("import"):
+        with stage("bus_stops"):
+            record_rows(read=len(stops))
+            with db_time():
+                execute_values(...)
+
+Every helper is a no-op outside a run, so instrumented functions can still
+be called on their own.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Relative wall-time increase beyond which a stage is reported as slower
+SLOWDOWN_THRESHOLD = float(os.getenv("ETL_SLOWDOWN_THRESHOLD", "0.2"))
+# Stages shorter than this are too noisy to compare
+MIN_COMPARED_SECONDS = 0.5
+
+_RSS_SAMPLE_SECONDS = 0.05
+
+
+def report_dir() -> str:
+    return os.getenv("ETL_REPORT_DIR") or os.path.join(ROOT, "etl_reports")
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size of this process, in MB."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # No /proc (macOS): fall back to the process high-water mark
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb: Optional[float] = None
+        self.rows_read = 0
+        self.rows_written = 0
+        self.db_calls = 0
+        self.db_seconds = 0.0
+        self.http: Dict[str, Dict] = {}
+        self.status = "ok"
+
+    def observe_rss(self, rss_mb: Optional[float]):
+        if rss_mb is not None and (self.peak_rss_mb is None or rss_mb > self.peak_rss_mb):
+            self.peak_rss_mb = rss_mb
+
+    def add_http(self, host: str, status: Optional[int], seconds: float, cached: bool = False):
+        entry = self.http.setdefault(host, {"requests": 0, "errors": 0, "cached": 0, "latencies": []})
+        if cached:
+            entry["cached"] += 1
+            return
+        entry["requests"] += 1
+        if status is None or status >= 400:
+            entry["errors"] += 1
+        entry["latencies"].append(seconds)
+
+    def to_dict(self) -> Dict:
+        latencies = [s for entry in self.http.values() for s in entry["latencies"]]
+        rows = max(self.rows_read, self.rows_written)
+        return {
+            "name": self.name,
+            "status": self.status,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "peak_rss_mb": round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None,
+            "rows_read": self.rows_read,
+            "rows_written": self.rows_written,
+            "rows_per_second": round(rows / self.wall_seconds, 1) if rows and self.wall_seconds else None,
+            "db": {"calls": self.db_calls, "seconds": round(self.db_seconds, 3)},
+            "http": {
+                "requests": len(latencies),
+                "errors": sum(entry["errors"] for entry in self.http.values()),
+                "cached": sum(entry["cached"] for entry in self.http.values()),
+                "seconds": round(sum(latencies), 3),
+                "p50_ms": _ms(_percentile(latencies, 0.5)),
+                "p95_ms": _ms(_percentile(latencies, 0.95)),
+                "max_ms": _ms(max(latencies) if latencies else None),
+                "by_host": {
+                    host: {
+                        "requests": entry["requests"],
+                        "errors": entry["errors"],
+                        "cached": entry["cached"],
+                        "p50_ms": _ms(_percentile(entry["latencies"], 0.5)),
+                        "p95_ms": _ms(_percentile(entry["latencies"], 0.95)),
+                    }
+                    for host, entry in sorted(self.http.items())
+                },
+            },
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class EtlRun:
+    """One profiled invocation of an import; see ``etl_run``."""
+
+    def __init__(self, name: str, directory: Optional[str] = None):
+        self.name = name
+        self.directory = directory or report_dir()
+        self.stages: List[StageStats] = []
+        self.started_at = datetime.now(timezone.utc)
+        self.status = "ok"
+        self._active: List[StageStats] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._peak_rss_mb: Optional[float] = None
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._sampler = threading.Thread(target=self._sample_rss, name="etl-rss-sampler", daemon=True)
+        self._sampler.start()
+
+    def _sample_rss(self):
+        while not self._stop.wait(_RSS_SAMPLE_SECONDS):
+            self._observe_rss()
+
+    def _observe_rss(self):
+        rss = _rss_mb()
+        with self._lock:
+            if rss is not None and (self._peak_rss_mb is None or rss > self._peak_rss_mb):
+                self._peak_rss_mb = rss
+            for stats in self._active:
+                stats.observe_rss(rss)
+
+    def current(self) -> Optional[StageStats]:
+        with self._lock:
+            return self._active[-1] if self._active else None
+
+    @contextmanager
+    def stage(self, name: str):
+        stats = StageStats(name)
+        with self._lock:
+            self._active.append(stats)
+        self._observe_rss()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield stats
+        except BaseException:
+            stats.status = "failed"
+            raise
+        finally:
+            stats.wall_seconds = time.perf_counter() - wall
+            stats.cpu_seconds = time.process_time() - cpu
+            self._observe_rss()
+            with self._lock:
+                self._active.remove(stats)
+                self.stages.append(stats)
+            logging.info(
+                f"[{self.name}] {name}: {stats.wall_seconds:.2f}s wall, {stats.cpu_seconds:.2f}s cpu, "
+                f"{stats.rows_read} read, {stats.rows_written} written, "
+                f"{sum(e['requests'] for e in stats.http.values())} http "
+                f"({sum(e['cached'] for e in stats.http.values())} cached), {stats.db_seconds:.2f}s db"
+            )
+
+    def finish(self) -> Dict:
+        self._stop.set()
+        self._sampler.join()
+        self._observe_rss()
+        report = {
+            "run": self.name,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "wall_seconds": round(time.perf_counter() - self._wall_started, 3),
+            "cpu_seconds": round(time.process_time() - self._cpu_started, 3),
+            "peak_rss_mb": round(self._peak_rss_mb, 1) if self._peak_rss_mb is not None else None,
+            "argv": sys.argv,
+            "stages": [stats.to_dict() for stats in self.stages],
+        }
+        previous_path = previous_report(self.name, self.directory)
+        if previous_path:
+            with open(previous_path, "r", encoding="utf-8") as f:
+                report["previous"] = os.path.basename(previous_path)
+                report["comparison"] = compare_reports(report, json.load(f))
+        return report
+
+
+_run: Optional[EtlRun] = None
+
+
+@contextmanager
+def etl_run(name: str, directory: Optional[str] = None):
+    """
+    Profile the enclosed stages as run ``name`` and write its report on exit.
+
+    Nested calls join the outer run, so ``import.py`` gets one report even
+    though each import script also opens a run for standalone use.
+    """
+    global _run
+    if _run is not None:
+        yield _run
+        return
+    run = _run = EtlRun(name, directory)
+    try:
+        yield run
+    except BaseException:
+        run.status = "failed"
+        raise
+    finally:
+        _run = None
+        report = run.finish()
+        path = save_report(report, run.directory)
+        logging.info(f"ETL report written to {path}")
+        for line in report.get("comparison", {}).get("slower", []):
+            logging.warning(f"Slower than {report['previous']}: {line}")
+
+
+@contextmanager
+def stage(name: str):
+    """Record the enclosed block as a stage of the current run."""
+    if _run is None:
+        yield StageStats(name)
+        return
+    with _run.stage(name) as stats:
+        yield stats
+
+
+def record_rows(read: int = 0, written: int = 0):
+    stats = _run.current() if _run else None
+    if stats is not None:
+        stats.rows_read += read
+        stats.rows_written += written
+
+
+def record_http(url: str, status: Optional[int], seconds: float, cached: bool = False):
+    """
+    Count one HTTP call; ``status`` None means it failed without a response.
+    ``cached`` calls were served from the response cache and only counted.
+    """
+    stats = _run.current() if _run else None
+    if stats is not None:
+        stats.add_http(urlsplit(url).netloc, status, seconds, cached)
+
+
+class _HttpCall:
+    status: Optional[int] = None
+
+
+@contextmanager
+def http_call(url: str):
+    """
+    Time one HTTP call; set ``.status`` on the yielded object once known.
+
+        with http_call(url) as call:
+            response = requests.get(url)
+            call.status = response.status_code
+    """
+    call = _HttpCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        record_http(url, call.status, time.perf_counter() - started)
+
+
+@contextmanager
+def db_time():
+    """Add the enclosed block to the current stage's database time."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _run.current() if _run else None
+        if stats is not None:
+            stats.db_calls += 1
+            stats.db_seconds += time.perf_counter() - started
+
+
+def save_report(report: Dict, directory: Optional[str] = None) -> str:
+    directory = directory or report_dir()
+    os.makedirs(directory, exist_ok=True)
+    started = datetime.fromisoformat(report["started_at"])
+    path = os.path.join(directory, f"{report['run']}-{started:%Y%m%d-%H%M%S-%f}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    return path
+
+
+def previous_report(name: str, directory: Optional[str] = None) -> Optional[str]:
+    """Most recent successful report of run ``name``, if any."""
+    directory = directory or report_dir()
+    if not os.path.isdir(directory):
+        return None
+    # Timestamped names sort chronologically
+    for filename in sorted(os.listdir(directory), reverse=True):
+        if not (filename.startswith(f"{name}-") and filename.endswith(".json")):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if report.get("run") == name and report.get("status") == "ok":
+            return path
+    return None
+
+
+def _change(old, new) -> Optional[float]:
+    if old is None or new is None or not old:
+        return None
+    return round((new - old) / old, 3)
+
+
+def compare_reports(report: Dict, previous: Dict, threshold: float = SLOWDOWN_THRESHOLD) -> Dict:
+    """
+    Stage-by-stage changes of ``report`` against ``previous``.
+
+    Returns:
+        dict: ``stages`` with relative changes of wall time, rows per
+        second, peak RSS, HTTP p95 and DB time, and ``slower`` as readable
+        lines for stages whose wall time grew by more than ``threshold``.
+    """
+    old_stages = {s["name"]: s for s in previous.get("stages", [])}
+    stages, slower = [], []
+    for new in report["stages"]:
+        old = old_stages.get(new["name"])
+        if old is None:
+            continue
+        stages.append({
+            "name": new["name"],
+            "wall_seconds": _change(old["wall_seconds"], new["wall_seconds"]),
+            "rows_per_second": _change(old.get("rows_per_second"), new.get("rows_per_second")),
+            "peak_rss_mb": _change(old.get("peak_rss_mb"), new.get("peak_rss_mb")),
+            "http_p95_ms": _change(old["http"].get("p95_ms"), new["http"].get("p95_ms")),
+            "db_seconds": _change(old["db"]["seconds"], new["db"]["seconds"]),
+        })
+        if (
+            max(old["wall_seconds"], new["wall_seconds"]) >= MIN_COMPARED_SECONDS
+            and new["wall_seconds"] > old["wall_seconds"] * (1 + threshold)
+        ):
+            rows = f", rows {max(old['rows_read'], old['rows_written'])} -> {max(new['rows_read'], new['rows_written'])}"
+            slower.append(f"{new['name']}: {old['wall_seconds']:.2f}s -> {new['wall_seconds']:.2f}s{rows}")
+    return {"stages": stages, "slower": slower}
+
+
+def _print_report(report: Dict):
+    print(f"{report['run']} ({report['status']}) started {report['started_at']}: "
+          f"{report['wall_seconds']}s wall, {report['cpu_seconds']}s cpu, peak {report['peak_rss_mb']} MB")
+    changes = {s["name"]: s for s in report.get("comparison", {}).get("stages", [])}
+    print(f"{'stage':<24}{'wall s':>9}{'cpu s':>9}{'rows/s':>11}{'rss MB':>9}{'http':>7}{'p95 ms':>9}{'db s':>8}{'vs prev':>9}")
+    for s in report["stages"]:
+        change = changes.get(s["name"], {}).get("wall_seconds")
+        print(
+            f"{s['name']:<24}{s['wall_seconds']:>9}{s['cpu_seconds']:>9}{str(s['rows_per_second']):>11}"
+            f"{str(s['peak_rss_mb']):>9}{s['http']['requests']:>7}{str(s['http']['p95_ms']):>9}"
+            f"{s['db']['seconds']:>8}{'' if change is None else f'{change:+.0%}':>9}"
+        )
+    for line in report.get("comparison", {}).get("slower", []):
+        print(f"slower: {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show ETL run reports.")
+    parser.add_argument("run", help="Run name (e.g. import) or a report file.")
+    parser.add_argument("--against", default=None, help="Compare with this report instead of the stored comparison.")
+    parser.add_argument("--dir", default=report_dir(), help="Report directory.")
+    args = parser.parse_args()
+
+    path = args.run if os.path.isfile(args.run) else previous_report(args.run, args.dir)
+    if path is None:
+        raise SystemExit(f"No report for {args.run} in {args.dir}")
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if args.against:
+        with open(args.against, "r", encoding="utf-8") as f:
+            report["comparison"] = compare_reports(report, json.load(f))
+    _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 import os
 import asyncio
-import aiohttp
 import asyncpg
 import json
+import logging
 from dotenv import load_dotenv
+from etl_profiler import db_time, record_rows
+from http_client import AsyncHttpClient
 
 
 async def fetch_place_id(session, listing_name):
@@ -14,10 +16,10 @@ async def fetch_place_id(session, listing_name):
         "X-Goog-Api-Key": os.getenv("GOOGLE_API_KEY"),
         "X-Goog-FieldMask": "places.id",
     }
-    async with session.post(url, headers=headers, data=payload) as response:
-        response_json = await response.json()
-        if "places" in response_json and response_json["places"]:
-            return response_json["places"][0]["id"]
+    response = await session.post(url, headers=headers, data=payload)
+    response_json = response.json()
+    if "places" in response_json and response_json["places"]:
+        return response_json["places"][0]["id"]
     return None
 
 
@@ -28,9 +30,8 @@ async def fetch_rating(session, place_id):
         "X-Goog-Api-Key": os.getenv("GOOGLE_API_KEY"),
         "X-Goog-FieldMask": "rating",
     }
-    async with session.get(url, headers=headers) as response:
-        json_response = await response.json()
-        return json_response.get("rating")
+    response = await session.get(url, headers=headers)
+    return response.json().get("rating")
 
 
 async def import_google_reviews_score():
@@ -46,14 +47,16 @@ async def import_google_reviews_score():
     )
 
     async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT DISTINCT listing_db_id, listing_name FROM rental_listings;
-            """
-        )
-        print(f"Number of listings: {len(rows)}")
+        with db_time():
+            rows = await conn.fetch(
+                """
+                SELECT DISTINCT listing_db_id, listing_name FROM rental_listings;
+                """
+            )
+        logging.info(f"Number of listings: {len(rows)}")
+        record_rows(read=len(rows))
 
-    async with aiohttp.ClientSession() as session:
+    async with AsyncHttpClient(limit=10) as session:
         tasks = []
         for row in rows:
             listing_id = row["listing_db_id"]
@@ -63,7 +66,7 @@ async def import_google_reviews_score():
         await asyncio.gather(*tasks)
 
     await pool.close()
-    print("Google reviews score imported successfully.")
+    logging.info("Google reviews score imported successfully.")
 
 
 async def process_listing(session, pool, listing_id, listing_name):
@@ -78,14 +81,16 @@ async def process_listing(session, pool, listing_id, listing_name):
         return
 
     # Insert into database using a connection from the pool
-    async with pool.acquire() as conn:
-        await conn.execute(
-            """
-            INSERT INTO place_review (place_name, place_id, listing_id, rating)
-            VALUES ($1, $2, $3, $4)
-            """,
-            listing_name,
-            place_id,
-            listing_id,
-            rating,
-        )
+    with db_time():
+        async with pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO place_review (place_name, place_id, listing_id, rating)
+                VALUES ($1, $2, $3, $4)
+                """,
+                listing_name,
+                place_id,
+                listing_id,
+                rating,
+            )
+    record_rows(written=1)
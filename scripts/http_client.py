@@ -0,0 +1,317 @@
+"""
+Shared HTTP client for the external data fetchers (RentCast, OpenWeatherMap,
+EPA ArcGIS, Google Places).
+
+Sessions are pooled and every call gets a timeout and retries with backoff
+on connection errors, 429 and 5xx. Responses can be kept in an on-disk
+cache addressed by a hash of the request, controlled by ``HTTP_CACHE_MODE``:
+
+    off      always fetch, never touch the cache (default)
+    record   always fetch and (re)write the cache
+    replay   serve from the cache, fetch and record on a miss
+    offline  serve from the cache only; a miss raises ``OfflineCacheMiss``
+
+API keys (query parameters and headers) are neither part of the cache key
+nor written to disk, so recorded fixtures can be shared and replayed
+without credentials. Calls are counted in the current ETL run report.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import base64
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from etl_profiler import ROOT, record_http
+
+MODES = ("off", "record", "replay", "offline")
+
+DEFAULT_TIMEOUT = (5, 30)  # connect, read seconds
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Query parameters carrying API keys; never part of the cache key or the stored request.
+# Headers are only keyed on KEY_HEADERS and never stored, so header keys need no list.
+SECRET_PARAMS = frozenset({"appid", "key", "api_key", "apikey", "token"})
+# Request headers that change the response and so belong in the key
+KEY_HEADERS = ("accept", "x-goog-fieldmask")
+
+
+class OfflineCacheMiss(requests.ConnectionError):
+    """Raised in offline mode for a request that was never recorded."""
+
+
+def cache_mode() -> str:
+    mode = os.getenv("HTTP_CACHE_MODE", "off").lower()
+    if mode not in MODES:
+        raise ValueError(f"HTTP_CACHE_MODE must be one of {', '.join(MODES)}, got {mode!r}")
+    return mode
+
+
+def cache_dir() -> str:
+    return os.getenv("HTTP_CACHE_DIR") or os.path.join(ROOT, "raw_data", "http_cache")
+
+
+def _redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def _body_bytes(data=None, json_body=None) -> bytes:
+    if json_body is not None:
+        return json.dumps(json_body, sort_keys=True).encode()
+    if data is None:
+        return b""
+    return data.encode() if isinstance(data, str) else bytes(data)
+
+
+def request_key(method: str, url: str, headers: Optional[Dict] = None, body: bytes = b"") -> str:
+    """Content address of a request: method, redacted URL, body and the headers in ``KEY_HEADERS``."""
+    lowered = {k.lower(): str(v) for k, v in (headers or {}).items()}
+    digest = hashlib.sha256()
+    digest.update(method.upper().encode())
+    digest.update(b"\0" + _redact_url(url).encode())
+    for name in KEY_HEADERS:
+        digest.update(b"\0" + f"{name}:{lowered.get(name, '')}".encode())
+    digest.update(b"\0" + body)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Recorded responses under ``<dir>/<host>/<key[:2]>/<key>.json``."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or cache_dir()
+
+    def path(self, url: str, key: str) -> str:
+        host = urlsplit(url).netloc.replace(":", "_") or "_"
+        return os.path.join(self.directory, host, key[:2], f"{key}.json")
+
+    def load(self, url: str, key: str) -> Optional[requests.Response]:
+        try:
+            with open(self.path(url, key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers.update(entry.get("headers", {}))
+        response._content = base64.b64decode(entry["body"])
+        response.url = url
+        response.encoding = entry.get("encoding")
+        response.from_cache = True
+        return response
+
+    def store(self, method: str, url: str, key: str, body: bytes, status: int, headers: Dict, content: bytes, encoding):
+        path = self.path(url, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "request": {"method": method.upper(), "url": _redact_url(url), "body": body.decode("utf-8", "replace")},
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() == "content-type"},
+            "encoding": encoding,
+            "body": base64.b64encode(content).decode("ascii"),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        # Write then rename so concurrent recorders never leave half a file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+
+def _cacheable(status: int) -> bool:
+    return status < 400
+
+
+class HttpClient:
+    """
+    Pooled ``requests`` session with timeouts, retries and the response cache.
+
+    Returns ordinary ``requests.Response`` objects; cached ones have
+    ``from_cache = True``. ``min_interval`` spaces out network calls (cache
+    hits are never throttled).
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        directory: Optional[str] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        pool_size: int = 10,
+        min_interval: float = 0.0,
+    ):
+        self.mode = mode or cache_mode()
+        self.cache = ResponseCache(directory)
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self._last_call = 0.0
+        self._throttle = threading.Lock()
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            # The POSTs we make are read-only searches
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, params=None, headers=None, data=None, json=None, timeout=None) -> requests.Response:
+        prepared = requests.Request(method, url, params=params).prepare()
+        body = _body_bytes(data, json)
+        key = request_key(method, prepared.url, headers, body)
+
+        if self.mode in ("replay", "offline"):
+            cached = self.cache.load(prepared.url, key)
+            if cached is not None:
+                record_http(prepared.url, cached.status_code, 0.0, cached=True)
+                return cached
+            if self.mode == "offline":
+                raise OfflineCacheMiss(f"No recorded response for {method} {_redact_url(prepared.url)}")
+
+        self._wait_turn()
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, url, params=params, headers=headers, data=data, json=json, timeout=timeout or self.timeout
+            )
+        except requests.RequestException:
+            record_http(prepared.url, None, time.perf_counter() - started)
+            raise
+        record_http(prepared.url, response.status_code, time.perf_counter() - started)
+        response.from_cache = False
+
+        if self.mode in ("record", "replay") and _cacheable(response.status_code):
+            self.cache.store(
+                method, prepared.url, key, body, response.status_code, response.headers, response.content, response.encoding
+            )
+        return response
+
+    def _wait_turn(self):
+        if not self.min_interval:
+            return
+        with self._throttle:
+            delay = self._last_call + self.min_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._last_call = time.monotonic()
+
+
+class AsyncHttpClient:
+    """
+    aiohttp counterpart of ``HttpClient`` sharing its cache layout.
+
+    ``limit`` caps concurrent connections. Responses are fully read and
+    returned as ``requests.Response`` objects so callers handle both
+    clients the same way.
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        directory: Optional[str] = None,
+        timeout: float = sum(DEFAULT_TIMEOUT),
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        limit: int = 10,
+    ):
+        self.mode = mode or cache_mode()
+        self.cache = ResponseCache(directory)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.limit = limit
+        self.session = None
+
+    async def __aenter__(self):
+        import aiohttp
+
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.limit),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+    async def get(self, url: str, **kwargs) -> requests.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> requests.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def request(self, method: str, url: str, params=None, headers=None, data=None, json=None) -> requests.Response:
+        import aiohttp
+
+        prepared = requests.Request(method, url, params=params).prepare()
+        body = _body_bytes(data, json)
+        key = request_key(method, prepared.url, headers, body)
+
+        if self.mode in ("replay", "offline"):
+            cached = self.cache.load(prepared.url, key)
+            if cached is not None:
+                record_http(prepared.url, cached.status_code, 0.0, cached=True)
+                return cached
+            if self.mode == "offline":
+                raise OfflineCacheMiss(f"No recorded response for {method} {_redact_url(prepared.url)}")
+
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                async with self.session.request(method, prepared.url, headers=headers, data=data, json=json) as raw:
+                    content = await raw.read()
+                    status, raw_headers, encoding = raw.status, dict(raw.headers), raw.charset
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                record_http(prepared.url, None, time.perf_counter() - started)
+                if attempt == self.retries:
+                    raise requests.ConnectionError(f"{method} {_redact_url(prepared.url)} failed: {e!r}") from e
+            else:
+                record_http(prepared.url, status, time.perf_counter() - started)
+                if status not in RETRY_STATUSES or attempt == self.retries:
+                    break
+            await asyncio.sleep(self.backoff * 2**attempt * (1 + random.random() / 4))
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(raw_headers)
+        response._content = content
+        response.url = prepared.url
+        response.encoding = encoding
+        response.from_cache = False
+
+        if self.mode in ("record", "replay") and _cacheable(status):
+            self.cache.store(method, prepared.url, key, body, status, raw_headers, content, encoding)
+        return response
@@ -1,15 +1,23 @@
 ## call bus_stops_import.py, openstreet_map.py, and bus_stops_import.py
 
 import asyncio
+import logging
 import bus_stops_import
 import openstreet_parks_import
 import crime_reports_import
+from etl_profiler import etl_run, stage
 from google_reviews_score_import import import_google_reviews_score
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-if __name__ == "__main__":
-    bus_stops_import.import_bus_stops()
-    openstreet_parks_import.import_open_street_parks()
-    crime_reports_import.import_crime_reports()
-    asyncio.run(import_google_reviews_score())
 
+if __name__ == "__main__":
+    with etl_run("import"):
+        with stage("bus_stops"):
+            bus_stops_import.import_bus_stops()
+        with stage("parks"):
+            openstreet_parks_import.import_open_street_parks()
+        with stage("crime_reports"):
+            crime_reports_import.import_crime_reports()
+        with stage("google_reviews"):
+            asyncio.run(import_google_reviews_score())
@@ -0,0 +1,131 @@
+import os
+import re
+import hashlib
+import argparse
+import logging
+from typing import Dict, List, NamedTuple
+
+from utils.db_connection import DatabaseConnection
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "sql", "migrations")
+
+# Serializes concurrent runners (e.g. two deploys starting at once)
+MIGRATION_LOCK_KEY = 5614_0001
+
+_FILENAME_PATTERN = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+
+
+class Migration(NamedTuple):
+    version: str
+    name: str
+    path: str
+    checksum: str
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Migrations in ``directory`` named ``NNNN_description.sql``, in version order."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME_PATTERN.match(filename)
+        if not match:
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        migrations.append(Migration(match.group(1), match.group(2), path, checksum))
+
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def _applied_migrations(cur) -> Dict[str, str]:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS public.schema_migrations (
+            version text NOT NULL,
+            name text NOT NULL,
+            checksum text NOT NULL,
+            applied_at timestamp with time zone NOT NULL DEFAULT now(),
+            CONSTRAINT schema_migrations_pkey PRIMARY KEY (version)
+        );
+        """
+    )
+    cur.execute("SELECT version, checksum FROM public.schema_migrations;")
+    return dict(cur.fetchall())
+
+
+def migrate(conn, directory: str = MIGRATIONS_DIR, dry_run: bool = False) -> List[str]:
+    """
+    Apply pending migrations, each in its own transaction.
+
+    Applied migrations are recorded in ``schema_migrations`` with the
+    checksum of their file; editing an applied migration is an error, add
+    a new one instead.
+
+    Args:
+        conn: Open psycopg2 connection.
+        directory (str): Directory holding the ``.sql`` migrations.
+        dry_run (bool): Only report the pending migrations.
+
+    Returns:
+        list: Versions applied (or pending, with ``dry_run``).
+    """
+    migrations = discover_migrations(directory)
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_KEY,))
+        try:
+            applied = _applied_migrations(cur)
+            conn.commit()
+
+            for migration in migrations:
+                if migration.version in applied and applied[migration.version] != migration.checksum:
+                    raise RuntimeError(
+                        f"Migration {migration.version}_{migration.name} changed after it was applied."
+                    )
+
+            pending = [migration for migration in migrations if migration.version not in applied]
+            if dry_run:
+                for migration in pending:
+                    logging.info(f"Pending: {migration.version}_{migration.name}")
+                return [migration.version for migration in pending]
+
+            for migration in pending:
+                with open(migration.path, "r", encoding="utf-8") as f:
+                    statements = f.read()
+                try:
+                    cur.execute(statements)
+                    cur.execute(
+                        "INSERT INTO public.schema_migrations (version, name, checksum) VALUES (%s, %s, %s);",
+                        (migration.version, migration.name, migration.checksum),
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    logging.error(f"Migration {migration.version}_{migration.name} failed; rolled back.")
+                    raise
+                logging.info(f"Applied {migration.version}_{migration.name}")
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_KEY,))
+            conn.commit()
+
+    if not pending:
+        logging.info("Database schema is up to date.")
+    return [migration.version for migration in pending]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the SQL migrations in sql/migrations.")
+    parser.add_argument("--dir", default=MIGRATIONS_DIR, help="Directory holding the migrations.")
+    parser.add_argument("--dry-run", action="store_true", help="List pending migrations without applying them.")
+    args = parser.parse_args()
+
+    with DatabaseConnection() as conn:
+        migrate(conn, args.dir, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@ import os
 import psycopg2
 from psycopg2.extras import execute_values
 import json
+import logging
 from dotenv import load_dotenv
+from etl_profiler import db_time, record_rows
 
 
 def import_open_street_parks():
@@ -27,7 +29,8 @@ def import_open_street_parks():
     with open("../raw_data/openstreet_parks.json", "r", encoding="utf-8") as f:
         data = json.load(f)
         elements = data["elements"]
-        print(f"Number of Parks: {len(elements)}")
+        logging.info(f"Number of Parks: {len(elements)}")
+        record_rows(read=len(elements))
         # Prepare data for batch insert
         # print(elements)
         values = [
@@ -44,17 +47,19 @@ def import_open_street_parks():
             and ele.get("lat") is not None
             and ele.get("lon") is not None
         ]
-        print(f"Number of Parks with valid data: {len(values)}")
-        print("Prepared data for batch insert")
+        logging.info(f"Number of Parks with valid data: {len(values)}")
         # Use execute_values for batch insert
-        execute_values(
-            cur,
-            query,
-            [(v[0], v[1], v[2], v[3], v[4], v[5]) for v in values],
-            template="(%s, %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326))",
-        )
-        print("Batch insert executed")
+        with db_time():
+            execute_values(
+                cur,
+                query,
+                [(v[0], v[1], v[2], v[3], v[4], v[5]) for v in values],
+                template="(%s, %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326))",
+            )
+        record_rows(written=len(values))
+        logging.info(f"Inserted {len(values)} parks")
 
-    conn.commit()
+    with db_time():
+        conn.commit()
     cur.close()
     conn.close()
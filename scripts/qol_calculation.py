@@ -1,172 +1,32 @@
-from itertools import count
+import os
+import sys
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
 
 from utils.db_engine import DBEngine
+from etl_profiler import db_time, etl_run, record_rows, stage
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, root)
+from server.utils.feature_snapshot import open_snapshot, write_snapshot
 
 db = DBEngine()
 engine = db.get_engine()
 
-def load_rental_listings():
-    load_sql = """
-    SELECT rl.listing_db_id, rl.latitude, rl.longitude, rl.price, aq.aqi, gn.nwi_score
-    FROM rental_listings rl
-    JOIN listing_clusters lc on rl.listing_db_id = lc.listing_db_id
-    JOIN cluster_air_quality aq on lc.cluster_id = aq.cluster_id
-    JOIN listings_geo lg on rl.listing_db_id = lg.listing_db_id
-    JOIN geo_nwi gn on lg.geo_id = gn.geo_id
-
-    WHERE
-      rl.state = 'DC'
-      OR
-      (rl.state = 'MD' AND rl.county IN ('Montgomery', 'Prince George''s'))
-      OR
-      (rl.state = 'VA' AND (rl.county IN ('Arlington', 'Fairfax', 'Loudoun')
-                         OR rl.city IN ('Alexandria', 'Fairfax', 'Falls Church')
-                        )
-      )
-    ORDER BY lc.listing_db_id;
-    """
-
-    rental_units = pd.read_sql(load_sql, engine)
-    return rental_units
-
-def load_nearest_bus_stops():
-    load_sql = """
-    SELECT
-      rl.listing_db_id,
-        ROUND((ST_Distance(rl.geom::geography, bs.geom::geography) / 1609.34)::numeric, 2) AS nearest_bus_stop_miles
-    FROM
-      public.rental_listings rl
-    JOIN LATERAL (
-      SELECT bs.id, bs.name, bs.geom
-      FROM public.bus_stops bs
-      ORDER BY rl.geom <-> bs.geom  -- KNN search: uses spatial index!
-      LIMIT 1
-    ) bs ON TRUE
-    WHERE
-      state = 'DC'
-      OR
-      (state = 'MD' AND county IN ('Montgomery', 'Prince George''s'))
-      OR
-      (state = 'VA' AND (county IN ('Arlington', 'Fairfax', 'Loudoun')
-                         -- Assuming independent cities are stored in the 'county' or a similar field, adjust as needed:
-                         OR city IN ('Alexandria', 'Fairfax', 'Falls Church')
-                        )
-      );
-    """
-
-    nearest_bus_stops = pd.read_sql(load_sql, engine)
-    return nearest_bus_stops
-
-def load_count_bus_stops():
-    load_sql = """
-    SELECT
-      rl.listing_db_id,
-      COUNT(bs.id) AS nearby_bus_stops
-    FROM
-      public.rental_listings rl
-    LEFT JOIN
-      public.bus_stops bs
-      ON ST_DWithin(rl.geom, bs.geom, 0.0145)
-    WHERE
-      state = 'DC'
-      OR
-      (state = 'MD' AND county IN ('Montgomery', 'Prince George''s'))
-      OR
-      (state = 'VA' AND (county IN ('Arlington', 'Fairfax', 'Loudoun')
-                         -- Assuming independent cities are stored in the 'county' or a similar field, adjust as needed:
-                         OR city IN ('Alexandria', 'Fairfax', 'Falls Church')
-                        )
-      )
-    GROUP BY
-      rl.listing_db_id,
-      rl.listing_name
-    ORDER BY
-      nearby_bus_stops DESC;
-    """
-    count_bus_stops = pd.read_sql(load_sql, engine)
-    return count_bus_stops
-
-def load_count_parks():
-    load_sql = """
-    SELECT
-      rl.listing_db_id,
-      COUNT(os.id) AS nearby_parks
-    FROM
-      rental_listings rl
-    LEFT JOIN
-      open_street os
-      ON ST_DWithin(rl.geom, os.geom, 0.0145)
-    WHERE
-      state = 'DC'
-      OR
-      (state = 'MD' AND county IN ('Montgomery', 'Prince George''s'))
-      OR
-      (state = 'VA' AND (county IN ('Arlington', 'Fairfax', 'Loudoun')
-                         -- Assuming independent cities are stored in the 'county' or a similar field, adjust as needed:
-                         OR city IN ('Alexandria', 'Fairfax', 'Falls Church')
-                        )
-      )
-    GROUP BY
-      rl.listing_db_id
-    ORDER BY
-      nearby_parks DESC;
-    """
-    count_parks = pd.read_sql(load_sql, engine)
-    return count_parks
-
-def load_nearest_parks():
-    load_sql = """
-    SELECT
-      rl.listing_db_id,
-      ROUND((ST_Distance(rl.geom::geography, os.geom::geography) / 1609.34)::numeric, 2) AS nearest_park_miles
-    FROM
-      rental_listings rl
-    JOIN LATERAL (
-      SELECT os.id, os.name, os.geom
-      FROM open_street os
-      WHERE os.leisure = 'park'
-      ORDER BY rl.geom <-> os.geom  -- fast KNN using index
-      LIMIT 1
-    ) os ON TRUE
-    WHERE
-      state = 'DC'
-      OR
-      (state = 'MD' AND county IN ('Montgomery', 'Prince George''s'))
-      OR
-      (state = 'VA' AND (county IN ('Arlington', 'Fairfax', 'Loudoun')
-                         -- Assuming independent cities are stored in the 'county' or a similar field, adjust as needed:
-                         OR city IN ('Alexandria', 'Fairfax', 'Falls Church')
-                        )
-      );
-    """
-    nearest_parks = pd.read_sql(load_sql, engine)
-    return nearest_parks
-
-
-
-def merge_dataframes():
-    rental_df = load_rental_listings()
-    nearest_bus_df = load_nearest_bus_stops()
-    count_bus_df = load_count_bus_stops()
-    count_parks_df = load_count_parks()
-    nearest_parks_df = load_nearest_parks()
-    # Merge all dataframes on listing_db_id
-    merged_df = rental_df.merge(nearest_bus_df, on="listing_db_id", how="left")
-    merged_df = merged_df.merge(count_bus_df, on="listing_db_id", how="left")
-    merged_df = merged_df.merge(count_parks_df, on="listing_db_id", how="left")
-    merged_df = merged_df.merge(nearest_parks_df, on="listing_db_id", how="left")
-    return merged_df
-
-
-
-def compute_qol():
+def load_features(snapshot):
+    """Listing features from the snapshot, restricted to listings with cluster, air quality and walkability data."""
+    df = snapshot.table.to_pandas()
+    return df.dropna(subset=["cluster_id", "aqi", "nwi_score"]).reset_index(drop=True)
+
+
+
+def compute_qol(snapshot):
     # Load the data
-    df = merge_dataframes()
+    df = load_features(snapshot)
 
     # Log transforms
     df["price"] = np.log1p(df["price"])
@@ -183,6 +43,16 @@ def compute_qol():
         "nearby_parks",
         "nearest_park_miles"
     ]
+    # Route richness, once transit_routes.py has published it
+    if df["nearby_routes"].notna().any():
+        df["nearby_routes"] = df["nearby_routes"].fillna(0)
+        features.append("nearby_routes")
+    # Safety, once crime_density.py has published it. The incident data covers DC only, so listings
+    # elsewhere get the median DC density: no evidence either way rather than a misleading zero.
+    if df["crime_density"].notna().any():
+        df["crime_density"] = np.log1p(df["crime_density"])
+        df["crime_density"] = df["crime_density"].fillna(df["crime_density"].median())
+        features.append("crime_density")
     X = df[features]
 
     # Standardize the features
@@ -194,6 +64,8 @@ def compute_qol():
     df_scaled["aqi"] *= -1
     df_scaled["nearest_bus_stop_miles"] *= -1
     df_scaled["nearest_park_miles"] *= -1
+    if "crime_density" in features:
+        df_scaled["crime_density"] *= -1
 
     # Perform PCA
     pca = PCA(n_components=len(features))
@@ -213,16 +85,42 @@ def compute_qol():
 
 
 def main():
-    df_qol = compute_qol()
+    with etl_run("qol"):
+        publish_qol()
+
+
+def publish_qol():
+    with stage("load_snapshot"):
+        snapshot = open_snapshot()
+        if snapshot is None:
+            raise SystemExit("No feature snapshot found; run build_feature_snapshot.py first.")
+        record_rows(read=snapshot.table.num_rows)
+    with stage("compute"):
+        df_qol = compute_qol(snapshot)
     # Save the QoL scores to the database
-    df_qol.to_sql(
-        "listings_qol",
-        engine,
-        if_exists="replace",
-        index=False,
-        method="multi",
-        chunksize=1000
-    )
+    with stage("write_db"), db_time():
+        df_qol.to_sql(
+            "listings_qol",
+            engine,
+            if_exists="replace",
+            index=False,
+            method="multi",
+            chunksize=1000
+        )
+        record_rows(written=len(df_qol))
+
+    # Publish the scores with the features they were computed from
+    with stage("publish_snapshot"):
+        table = snapshot.table
+        qol_by_listing = df_qol.set_index("listing_db_id")["qol_score"]
+        qol_scores = table.column("listing_db_id").to_pandas().map(qol_by_listing)
+        table = table.set_column(
+            table.schema.get_field_index("qol_score"),
+            table.schema.field("qol_score"),
+            pa.array(qol_scores, type=pa.float64(), from_pandas=True),
+        )
+        write_snapshot(table, metadata={"source": "qol_calculation", "features_version": snapshot.manifest["version"]})
+        record_rows(written=table.num_rows)
 
 
 
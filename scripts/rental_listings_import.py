@@ -2,6 +2,7 @@ import logging
 import json
 import psycopg2
 from utils.db_connection import DatabaseConnection
+from etl_profiler import db_time, etl_run, record_rows, stage
 
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -17,6 +18,7 @@ def import_rental_listings(json_path: str):
         with open(json_path, "r", encoding="utf-8") as f:
             data = json.load(f)
         logging.info(f"Successfully loaded {len(data)} records from JSON file.")
+        record_rows(read=len(data))
 
     except FileNotFoundError:
         logging.error(f"Error: JSON file not found at '{json_path}'")
@@ -104,14 +106,16 @@ def import_rental_listings(json_path: str):
     try:
         with db_connector as conn:
             with conn.cursor() as cur:
-                psycopg2.extras.execute_values(
-                    cur,
-                    sql_insert,
-                    values,
-                    page_size=1000
-                )
-                inserted_count = cur.rowcount
-                conn.commit()
+                with db_time():
+                    psycopg2.extras.execute_values(
+                        cur,
+                        sql_insert,
+                        values,
+                        page_size=1000
+                    )
+                    inserted_count = cur.rowcount
+                    conn.commit()
+                record_rows(written=len(values))
                 logging.info(f"Inserted {inserted_count} records into the database.")
 
     except psycopg2.Error as db_err:
@@ -131,7 +135,8 @@ def import_rental_listings(json_path: str):
 
 def main():
     path = "../raw_data/dmv_rental_listings.json"
-    import_rental_listings(path)
+    with etl_run("rental_listings"), stage("import"):
+        import_rental_listings(path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,353 @@
+"""
+Synthetic raw data for scale-testing the import scripts, QoL job, clustering and API.
+
+Writes the same files the real fetchers produce, in the same shapes:
+
+- ``dmv_rental_listings.json``: RentCast long-term rental listings
+- ``bus_stops.json``: WMATA ``{"Stops": [...]}``
+- ``openstreet_parks.json``: Overpass ``{"elements": [...]}`` leisure nodes
+- ``Crime_Incidents_in_2023.csv``: DC open data crime incidents
+
+Records are generated in NumPy chunks and streamed to disk, so memory stays
+flat at any scale. Points are drawn around DMV centers (``--skew`` sets the
+share clustered versus spread uniformly over the DMV, ``--spread`` scales
+cluster radii, i.e. density), and ``--duplicate-rate`` of listings reuse
+another listing's exact coordinates, as units in one building do.
+"""
+
+import os
+import csv
+import json
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from benchmark.seed import AREAS
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_OUTPUT_DIR = "../raw_data/synthetic"
+
+# Approximate sizes of the real raw data; --scale multiplies these
+REAL_COUNTS = {"listings": 4_000, "bus_stops": 9_261, "parks": 1_500, "crimes": 8_809}
+
+CHUNK_SIZE = 50_000
+
+# lat/lon box the uniform (non-clustered) share is spread over
+DMV_BBOX = (38.70, 39.15, -77.45, -76.85)
+
+# The crime file only covers DC
+CRIME_AREA = "Washington"
+
+ZIP_PREFIXES = {
+    "Washington": "200", "Arlington": "222", "Alexandria": "223", "Fairfax": "220",
+    "Bethesda": "208", "Silver Spring": "209", "Hyattsville": "207", "Baltimore": "212",
+}
+
+STREETS = np.array([
+    "Connecticut Ave NW", "Wisconsin Ave NW", "Georgia Ave NW", "14th St NW", "16th St NW",
+    "Rhode Island Ave NE", "Pennsylvania Ave SE", "Wilson Blvd", "Columbia Pike", "King St",
+    "Duke St", "Lee Hwy", "Old Georgetown Rd", "Colesville Rd", "Baltimore Ave",
+    "Arlington Blvd", "Glebe Rd", "Massachusetts Ave NW", "H St NE", "Minnesota Ave SE",
+])
+PROPERTY_TYPES = np.array(["Apartment", "Condo", "Townhouse", "Single Family", "Multi-Family"])
+PROPERTY_TYPE_SHARES = [0.55, 0.2, 0.12, 0.1, 0.03]
+LEISURE_TYPES = np.array(["park", "garden", "playground", "pitch", "nature_reserve"])
+LEISURE_SHARES = [0.6, 0.12, 0.15, 0.1, 0.03]
+OFFENSES = np.array([
+    "THEFT/OTHER", "THEFT F/AUTO", "MOTOR VEHICLE THEFT", "ROBBERY",
+    "ASSAULT W/DANGEROUS WEAPON", "BURGLARY", "SEX ABUSE", "HOMICIDE", "ARSON",
+])
+OFFENSE_SHARES = [0.42, 0.25, 0.12, 0.08, 0.07, 0.04, 0.01, 0.008, 0.002]
+CRIME_METHODS = np.array(["OTHERS", "GUN", "KNIFE"])
+CRIME_METHOD_SHARES = [0.88, 0.09, 0.03]
+
+CRIME_COLUMNS = [
+    "X", "Y", "CCN", "REPORT_DAT", "SHIFT", "METHOD", "OFFENSE", "BLOCK", "XBLOCK", "YBLOCK", "WARD", "ANC",
+    "DISTRICT", "PSA", "NEIGHBORHOOD_CLUSTER", "BLOCK_GROUP", "CENSUS_TRACT", "VOTING_PRECINCT",
+    "LATITUDE", "LONGITUDE", "BID", "START_DATE", "END_DATE", "OBJECTID", "OCTO_RECORD_ID",
+]
+
+# Listing dates count back from here so a seed always gives the same files
+REFERENCE_DATE = datetime(2025, 4, 1)
+
+
+class JsonArrayWriter:
+    """Streams items into a JSON array, optionally wrapped as ``{key: [...]}`` in a larger object."""
+
+    def __init__(self, path: str, key: str = None, header: Dict = None):
+        self.path = path
+        self.key = key
+        self.header = header or {}
+        self.count = 0
+
+    def __enter__(self):
+        self._file = open(self.path, "w", encoding="utf-8")
+        if self.key is None:
+            self._file.write("[")
+        else:
+            prefix = json.dumps(self.header)[:-1] + (", " if self.header else "")
+            self._file.write(f'{prefix}"{self.key}": [')
+        return self
+
+    def write(self, item: Dict):
+        self._file.write(("," if self.count else "") + "\n" + json.dumps(item))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.write("\n]" + ("" if self.key is None else "}") + "\n")
+        self._file.close()
+        return False
+
+
+def _chunks(total: int, size: int = CHUNK_SIZE) -> Iterator[Tuple[int, int]]:
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def sample_points(rng: np.random.Generator, n: int, skew: float, spread: float, area_names=None):
+    """
+    ``n`` points as (lat, lon, area index).
+
+    A ``skew`` share is Gaussian around the area centers (radius scaled by
+    ``spread``); the rest is uniform over the DMV box and takes the area of
+    the nearest center. ``area_names`` restricts both to those areas.
+    """
+    areas = [a for a in AREAS if area_names is None or a[0] in area_names]
+    indices = np.array([AREAS.index(a) for a in areas])
+    centers = np.array([[a[3], a[4]] for a in areas])
+    radii_km = np.array([a[5] for a in areas]) * spread
+    shares = np.array([a[6] for a in areas])
+
+    area = rng.choice(len(areas), size=n, p=shares / shares.sum())
+    lat_sd = radii_km[area] / 111.32
+    lat = centers[area, 0] + rng.normal(0, 1, n) * lat_sd
+    lon = centers[area, 1] + rng.normal(0, 1, n) * lat_sd / np.cos(np.radians(centers[area, 0]))
+
+    uniform = rng.random(n) >= skew
+    if uniform.any():
+        if area_names is None:
+            south, north, west, east = DMV_BBOX
+        else:
+            # Uniform over the chosen areas' extent (three radii around their centers)
+            pad = radii_km.max() * 3 / 111.32
+            south, north = centers[:, 0].min() - pad, centers[:, 0].max() + pad
+            west, east = centers[:, 1].min() - pad, centers[:, 1].max() + pad
+        count = int(uniform.sum())
+        lat[uniform] = rng.uniform(south, north, count)
+        lon[uniform] = rng.uniform(west, east, count)
+        nearest = ((centers[None, :, 0] - lat[uniform, None]) ** 2 + (centers[None, :, 1] - lon[uniform, None]) ** 2)
+        area[uniform] = nearest.argmin(axis=1)
+    return np.round(lat, 6), np.round(lon, 6), indices[area]
+
+
+def write_listings(path: str, count: int, rng: np.random.Generator, skew: float, spread: float, duplicate_rate: float) -> int:
+    with JsonArrayWriter(path) as writer:
+        for start, n in _chunks(count):
+            lat, lon, area = sample_points(rng, n, skew, spread)
+            numbers = rng.integers(100, 9999, n)
+            streets = rng.integers(0, len(STREETS), n)
+
+            # Units in one building: copy another listing's coordinates and street address
+            duplicate = rng.random(n) < duplicate_rate
+            sources = np.flatnonzero(~duplicate)
+            if duplicate.any() and len(sources):
+                picked = rng.choice(sources, int(duplicate.sum()))
+                lat[duplicate], lon[duplicate] = lat[picked], lon[picked]
+                area[duplicate], numbers[duplicate], streets[duplicate] = area[picked], numbers[picked], streets[picked]
+
+            bedrooms = rng.choice([0, 1, 1, 2, 2, 3, 4], n)
+            bathrooms = np.maximum(1.0, np.round(bedrooms * rng.uniform(0.5, 1.0, n) * 2) / 2)
+            square_feet = (450 + bedrooms * 380 + rng.normal(0, 120, n)).astype(int)
+            price = (1200 + bedrooms * 550 + rng.gamma(2.0, 250, n)).astype(int)
+            property_types = rng.choice(PROPERTY_TYPES, n, p=PROPERTY_TYPE_SHARES)
+            year_built = rng.integers(1900, 2025, n)
+            days_on_market = rng.integers(0, 120, n)
+            zips = rng.integers(0, 100, n)
+            with_office = rng.random(n) < 0.6
+
+            for i in range(n):
+                seq = start + i + 1
+                city, county, state = AREAS[area[i]][:3]
+                zip_code = f"{ZIP_PREFIXES[city]}{zips[i]:02d}"
+                line_1 = f"{numbers[i]} {STREETS[streets[i]]}"
+                line_2 = f"Apt {seq}"
+                listed = REFERENCE_DATE - timedelta(days=int(days_on_market[i]))
+                item = {
+                    "id": f"{line_1}, {line_2}, {city}, {state} {zip_code}".replace(" ", "-"),
+                    "formattedAddress": f"{line_1}, {line_2}, {city}, {state} {zip_code}",
+                    "addressLine1": line_1,
+                    "addressLine2": line_2,
+                    "city": city,
+                    "state": state,
+                    "zipCode": zip_code,
+                    "county": county,
+                    "latitude": float(lat[i]),
+                    "longitude": float(lon[i]),
+                    "propertyType": str(property_types[i]),
+                    "bedrooms": int(bedrooms[i]),
+                    "bathrooms": float(bathrooms[i]),
+                    "squareFootage": int(square_feet[i]),
+                    "yearBuilt": int(year_built[i]),
+                    "status": "Active",
+                    "price": int(price[i]),
+                    "listingType": "Standard",
+                    "listedDate": f"{listed:%Y-%m-%d}T00:00:00.000Z",
+                    "removedDate": None,
+                    "createdDate": f"{listed:%Y-%m-%d}T00:00:00.000Z",
+                    "lastSeenDate": f"{REFERENCE_DATE:%Y-%m-%d}T00:00:00.000Z",
+                    "daysOnMarket": int(days_on_market[i]),
+                }
+                if with_office[i]:
+                    item["listingOffice"] = {"name": f"{city} Residential {area[i] * 10 + zips[i] % 10}"}
+                writer.write(item)
+            logging.info(f"Listings: {start + n}/{count}")
+    return writer.count
+
+
+def write_bus_stops(path: str, count: int, rng: np.random.Generator, skew: float, spread: float) -> int:
+    with JsonArrayWriter(path, key="Stops") as writer:
+        for start, n in _chunks(count):
+            # Stops cover more ground than listings
+            lat, lon, _ = sample_points(rng, n, skew, spread * 1.5)
+            streets = rng.integers(0, len(STREETS), (n, 2))
+            route_counts = rng.integers(1, 5, n)
+            for i in range(n):
+                writer.write({
+                    "StopID": str(1_000_000 + start + i),
+                    "Name": f"{STREETS[streets[i, 0]].upper()} + {STREETS[streets[i, 1]].upper()}",
+                    "Lon": float(lon[i]),
+                    "Lat": float(lat[i]),
+                    "Routes": [f"{chr(65 + (start + i + k) % 26)}{(start + i * 7 + k) % 99}" for k in range(route_counts[i])],
+                })
+    return writer.count
+
+
+def write_parks(path: str, count: int, rng: np.random.Generator, skew: float, spread: float) -> int:
+    header = {"version": 0.6, "generator": "synthetic_data.py", "osm3s": {"copyright": "synthetic"}}
+    with JsonArrayWriter(path, key="elements", header=header) as writer:
+        for start, n in _chunks(count):
+            lat, lon, area = sample_points(rng, n, skew, spread * 1.5)
+            leisure = rng.choice(LEISURE_TYPES, n, p=LEISURE_SHARES)
+            named = rng.random(n) < 0.9
+            tagged = rng.random(n) < 0.98
+            for i in range(n):
+                element = {"type": "node", "id": 9_000_000_000 + start + i, "lat": float(lat[i]), "lon": float(lon[i])}
+                if tagged[i]:
+                    element["tags"] = {"leisure": str(leisure[i])}
+                    if named[i]:
+                        element["tags"]["name"] = f"{AREAS[area[i]][0]} {str(leisure[i]).replace('_', ' ').title()} {start + i}"
+                writer.write(element)
+    return writer.count
+
+
+def write_crimes(path: str, count: int, rng: np.random.Generator, skew: float, spread: float) -> int:
+    written = 0
+    year_start = datetime(2023, 1, 1)
+    # The real export starts with a byte order mark
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CRIME_COLUMNS)
+        for start, n in _chunks(count):
+            lat, lon, _ = sample_points(rng, n, skew, spread, area_names={CRIME_AREA})
+            # Maryland state plane meters, linearized around downtown DC
+            x = np.round(398945 + (lon + 77.0121617883) * 86760).astype(int)
+            y = np.round(136609 + (lat - 38.8973301763) * 111040).astype(int)
+            offenses = rng.choice(OFFENSES, n, p=OFFENSE_SHARES)
+            methods = rng.choice(CRIME_METHODS, n, p=CRIME_METHOD_SHARES)
+            seconds = rng.integers(0, 365 * 86400, n)
+            delays = rng.integers(600, 3 * 86400, n)
+            blocks = rng.integers(1, 60, n) * 100
+            streets = rng.integers(0, len(STREETS), n)
+            missing_location = rng.random(n) < 0.002
+            for i in range(n):
+                started = year_start + timedelta(seconds=int(seconds[i]))
+                reported = started + timedelta(seconds=int(delays[i]))
+                shift = "DAY" if 7 <= reported.hour < 15 else "EVENING" if 15 <= reported.hour < 23 else "MIDNIGHT"
+                ward = 1 + (start + i) % 8
+                writer.writerow([
+                    x[i], y[i], f"23{start + i:06d}", f"{reported:%Y/%m/%d %H:%M:%S}+00", shift, methods[i], offenses[i],
+                    f"{blocks[i]} - {blocks[i] + 99} BLOCK OF {STREETS[streets[i]].upper()}", x[i], y[i], ward,
+                    f"{ward}{chr(65 + (start + i) % 6)}", 1 + (start + i) % 7, 100 + (start + i) % 700,
+                    f"Cluster {1 + (start + i) % 46}", "", "", f"Precinct {1 + (start + i) % 144}",
+                    "" if missing_location[i] else f"{lat[i]:.10f}", "" if missing_location[i] else f"{lon[i]:.10f}",
+                    "", f"{started:%Y/%m/%d %H:%M:%S}+00", f"{started + timedelta(minutes=30):%Y/%m/%d %H:%M:%S}+00",
+                    700_000_000 + start + i, "",
+                ])
+            written += n
+            logging.info(f"Crimes: {written}/{count}")
+    return written
+
+
+def generate(
+    output_dir: str,
+    counts: Dict[str, int],
+    seed: int = 42,
+    skew: float = 0.85,
+    spread: float = 1.0,
+    duplicate_rate: float = 0.15,
+) -> Dict[str, int]:
+    """
+    Write every synthetic file to ``output_dir``.
+
+    Args:
+        output_dir (str): Destination directory (created if missing).
+        counts (dict): Records per dataset: listings, bus_stops, parks, crimes.
+        seed (int): Random seed; the same seed and options give identical files.
+        skew (float): Share of points clustered around DMV centers (0 = uniform).
+        spread (float): Multiplier on cluster radii; below 1 is denser.
+        duplicate_rate (float): Share of listings reusing another listing's coordinates.
+
+    Returns:
+        dict: Records written per dataset.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # One stream per dataset so changing one count does not change the others
+    streams = {name: np.random.default_rng([seed, index]) for index, name in enumerate(REAL_COUNTS)}
+    written = {
+        "listings": write_listings(
+            os.path.join(output_dir, "dmv_rental_listings.json"), counts["listings"], streams["listings"],
+            skew, spread, duplicate_rate,
+        ),
+        "bus_stops": write_bus_stops(
+            os.path.join(output_dir, "bus_stops.json"), counts["bus_stops"], streams["bus_stops"], skew, spread
+        ),
+        "parks": write_parks(
+            os.path.join(output_dir, "openstreet_parks.json"), counts["parks"], streams["parks"], skew, spread
+        ),
+        "crimes": write_crimes(
+            os.path.join(output_dir, "Crime_Incidents_in_2023.csv"), counts["crimes"], streams["crimes"], skew, spread
+        ),
+    }
+    logging.info(f"Wrote {written} to {output_dir}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic raw data shaped like the real sources.")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Destination directory.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier on the real dataset sizes.")
+    for name in REAL_COUNTS:
+        parser.add_argument(
+            f"--{name.replace('_', '-')}", type=int, default=None, help=f"Exact {name.replace('_', ' ')} count."
+        )
+    parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    parser.add_argument("--skew", type=float, default=0.85, help="Share of points clustered around centers (0-1).")
+    parser.add_argument("--spread", type=float, default=1.0, help="Cluster radius multiplier; lower is denser.")
+    parser.add_argument(
+        "--duplicate-rate", type=float, default=0.15, help="Share of listings sharing another's coordinates."
+    )
+    args = parser.parse_args()
+
+    counts = {
+        name: getattr(args, name) if getattr(args, name) is not None else int(round(real * args.scale))
+        for name, real in REAL_COUNTS.items()
+    }
+    generate(args.output_dir, counts, args.seed, args.skew, args.spread, args.duplicate_rate)
+
+
+if __name__ == "__main__":
+    main()
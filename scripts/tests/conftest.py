@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The scripts import each other from the scripts directory and the server package from the repository root
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.dirname(SCRIPTS_DIR))
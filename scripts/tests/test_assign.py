@@ -0,0 +1,107 @@
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+from clustering.assign import ClusterAssigner, assign_new_listings, touched_clusters
+
+CLUSTERS = [(1, 38.90, -77.03), (2, 38.88, -77.10)]
+
+
+def test_assigner_picks_nearest_centroid_within_cap():
+    assigner = ClusterAssigner(np.array([1, 2]), np.array([c[1:] for c in CLUSTERS]))
+    coords = np.array([[38.901, -77.031], [38.881, -77.099], [39.5, -76.0]])
+
+    cluster_ids, distances_km, within = assigner.assign(coords, max_distance_km=1.609)
+
+    assert cluster_ids[:2].tolist() == [1, 2]
+    assert within.tolist() == [True, True, False]
+    assert distances_km[0] == pytest.approx(0.14, abs=0.01)
+
+
+def test_touched_clusters_include_old_and_new():
+    previous = np.array([-1, 1, 2, 3])
+    cluster_ids = np.array([2, 2, 2, 4])
+    within = np.array([True, True, True, False])
+    # 1 lost a listing, 2 gained two, 3 lost one that is now flagged; 4 gained nothing
+    assert touched_clusters(previous, cluster_ids, within) == [1, 2, 3]
+
+
+@pytest.fixture
+def conn():
+    """A scratch schema in ``TEST_DATABASE_URL`` with the tables assign.py touches."""
+    psycopg2 = pytest.importorskip("psycopg2")
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    conn = psycopg2.connect(url)
+    schema = f"test_assign_{uuid.uuid4().hex[:8]}"
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}; SET search_path TO {schema};")
+        cur.execute(
+            """
+            CREATE TABLE rental_listings (listing_db_id integer PRIMARY KEY, latitude double precision,
+                                          longitude double precision, in_scope boolean);
+            CREATE TABLE rental_clusters (cluster_id integer PRIMARY KEY, centroid_lat double precision,
+                                          centroid_lon double precision, member_count integer);
+            CREATE TABLE listing_clusters (listing_db_id integer UNIQUE, cluster_id integer);
+            CREATE TABLE cluster_recluster_queue (listing_db_id integer PRIMARY KEY, nearest_cluster_id integer,
+                                                  distance_km double precision, flagged_at timestamptz DEFAULT now());
+            """
+        )
+    yield conn
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA {schema} CASCADE;")
+    conn.commit()
+    conn.close()
+
+
+def cluster_rows(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT cluster_id, centroid_lat, centroid_lon, member_count FROM rental_clusters ORDER BY 1;")
+        return cur.fetchall()
+
+
+def test_moved_listing_recomputes_both_centroids(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO rental_listings VALUES
+                (1, 38.900, -77.030, true), (2, 38.902, -77.032, true), (3, 38.880, -77.100, true),
+                (4, 38.882, -77.098, true);
+            INSERT INTO listing_clusters VALUES (1, 1), (2, 1), (3, 2);
+            INSERT INTO rental_clusters VALUES (1, 38.901, -77.031, 2), (2, 38.880, -77.100, 1);
+            -- Listing 2 moved next to cluster 2
+            UPDATE rental_listings SET latitude = 38.881, longitude = -77.101 WHERE listing_db_id = 2;
+            """
+        )
+
+    result = assign_new_listings(conn, listing_ids=[2])
+
+    assert result == {"assigned": 2, "flagged": 0}
+    (_, lat1, lon1, n1), (_, lat2, lon2, n2) = cluster_rows(conn)
+    # Cluster 1 is back to listing 1 alone, not 1 minus the moved listing's new position
+    assert (lat1, lon1, n1) == (pytest.approx(38.900), pytest.approx(-77.030), 1)
+    assert (lat2, lon2, n2) == (
+        pytest.approx((38.880 + 38.881 + 38.882) / 3),
+        pytest.approx((-77.100 - 77.101 - 77.098) / 3),
+        3,
+    )
+
+
+def test_emptied_cluster_keeps_its_centroid(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO rental_listings VALUES (1, 39.5, -76.0, true);
+            INSERT INTO listing_clusters VALUES (1, 1);
+            INSERT INTO rental_clusters VALUES (1, 38.9, -77.0, 1);
+            """
+        )
+
+    result = assign_new_listings(conn, listing_ids=[1])
+
+    assert result == {"assigned": 0, "flagged": 1}
+    assert cluster_rows(conn) == [(1, pytest.approx(38.9), pytest.approx(-77.0), 0)]
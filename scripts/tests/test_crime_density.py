@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from crime_density import OFFENSES, SHIFTS, build_grid, listing_densities, load_grid, save_grid
+
+
+@pytest.fixture
+def incidents():
+    rng = np.random.default_rng(0)
+    n = 500
+    return pd.DataFrame({
+        "OFFENSE": rng.choice(OFFENSES, n),
+        "SHIFT": rng.choice(SHIFTS, n),
+        "LATITUDE": 38.90 + rng.normal(0, 0.01, n),
+        "LONGITUDE": -77.03 + rng.normal(0, 0.01, n),
+    })
+
+
+def test_every_incident_is_counted_in_its_layer(incidents):
+    grid = build_grid(incidents)
+
+    assert grid.counts.sum() == len(incidents)
+    by_layer = incidents.groupby(["OFFENSE", "SHIFT"]).size()
+    for (offense, shift), count in by_layer.items():
+        assert grid.counts[OFFENSES.index(offense), SHIFTS.index(shift)].sum() == count
+
+
+def test_smoothing_conserves_incidents(incidents):
+    grid = build_grid(incidents, cell_meters=100, bandwidth_meters=300)
+
+    # The margin holds the whole kernel, so no incident is blurred off the grid
+    cell_km2 = 0.1 ** 2
+    np.testing.assert_allclose(grid.density.sum(axis=(2, 3)) * cell_km2, grid.counts.sum(axis=(2, 3)), rtol=1e-4)
+    assert (grid.density >= 0).all()
+
+
+def test_cells_index_the_incident_cell(incidents):
+    grid = build_grid(incidents)
+
+    rows, cols, inside = grid.cells(incidents["LATITUDE"], incidents["LONGITUDE"])
+
+    assert inside.all()
+    assert grid.counts.sum(axis=(0, 1))[rows, cols].min() >= 1
+
+
+def test_listing_densities_are_nan_outside_coverage(incidents):
+    grid = build_grid(incidents)
+    listings = pd.DataFrame({
+        "listing_db_id": [1, 2, 3],
+        "latitude": [38.90, 38.90, 40.0],
+        "longitude": [-77.03, -77.03, -75.0],
+        # Same point but in Maryland; the last one is in DC but off the grid
+        "state": ["DC", "MD", "DC"],
+    })
+
+    df = listing_densities(grid, listings)
+
+    assert df["listing_db_id"].tolist() == [1, 2, 3]
+    assert df.loc[0, "crime_density"] > df.loc[0, "violent_crime_density"] > 0
+    assert df.loc[1:, ["crime_density", "violent_crime_density"]].isna().all().all()
+
+
+def test_grid_round_trips_through_npz(incidents, tmp_path):
+    grid = build_grid(incidents)
+    path = str(tmp_path / "crime_grid.npz")
+
+    save_grid(grid, path)
+    loaded = load_grid(path)
+
+    np.testing.assert_array_equal(loaded.density, grid.density)
+    assert (loaded.south, loaded.west, loaded.cell_lat, loaded.cell_lon) == (
+        grid.south, grid.west, grid.cell_lat, grid.cell_lon
+    )
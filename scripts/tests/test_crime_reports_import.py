@@ -0,0 +1,62 @@
+import threading
+
+import pandas as pd
+
+import crime_reports_import
+from crime_reports_import import COLUMNS, import_crime_reports, parse_chunk, partition_by_ccn, read_chunks
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False)
+
+
+def row(ccn, date, offense="THEFT/OTHER", lat="38.9", lon="-77.0"):
+    return [ccn, date, "DAY", "OTHERS", offense, lat, lon]
+
+
+def test_parse_chunk_keeps_the_last_valid_row_per_ccn(tmp_path):
+    path = tmp_path / "crime.csv"
+    write_csv(path, [
+        row("23000001", "2023/01/05 10:00:00+00"),
+        row("23000002", "not a date"),
+        row("23000003", "2023/01/07 12:00:00+00", lat=""),
+        row(None, "2023/01/08 12:00:00+00"),
+        row("23000001", "2023/02/01 09:30:00+00", offense="ROBBERY"),
+    ])
+
+    df = parse_chunk(next(iter(read_chunks(str(path)))))
+
+    assert df["ccn"].tolist() == ["23000001"]
+    assert df.iloc[0]["name"] == "ROBBERY"
+    assert df.iloc[0]["date"] == pd.Timestamp("2023-02-01 09:30:00")
+
+
+def test_partition_by_ccn_is_stable_across_chunks():
+    first = pd.DataFrame({"ccn": [f"2300{i:04d}" for i in range(100)]})
+    second = first.iloc[::-1].reset_index(drop=True)
+
+    parts = [partition_by_ccn(df, 4) for df in (first, second)]
+
+    assert sum(len(part) for part in parts[0]) == 100
+    for a, b in zip(*parts):
+        assert set(a["ccn"]) == set(b["ccn"])
+
+
+def test_rows_of_a_ccn_are_loaded_in_file_order_by_one_loader(tmp_path, monkeypatch):
+    path = tmp_path / "crime.csv"
+    rows = [row(f"2300{i:04d}", "2023/01/05 10:00:00+00") for i in range(40)]
+    # Amended in a later chunk, with a report date in another month
+    rows += [row("23000001", "2023/02/01 09:30:00+00", offense="ROBBERY")]
+    write_csv(path, rows)
+    loads = []
+
+    def load_chunk(df):
+        loads.extend((threading.current_thread().name, ccn, name) for ccn, name in zip(df["ccn"], df["name"]))
+        return len(df)
+
+    monkeypatch.setattr(crime_reports_import, "load_chunk", load_chunk)
+
+    assert import_crime_reports(str(path), chunk_rows=10, workers=3) == 41
+    amended = [(thread, name) for thread, ccn, name in loads if ccn == "23000001"]
+    assert [name for _, name in amended] == ["THEFT/OTHER", "ROBBERY"]
+    assert len({thread for thread, _ in amended}) == 1
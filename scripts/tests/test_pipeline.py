@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from clustering.pipeline import assign_noise_to_nearest_centroid
+
+
+def listings(clusters):
+    return pd.DataFrame({
+        "listing_db_id": [1, 2, 3, 4],
+        "latitude": [38.900, 38.901, 38.905, 39.500],
+        "longitude": [-77.030, -77.031, -77.030, -76.000],
+        "cluster": clusters,
+    })
+
+
+def test_noise_within_the_cap_joins_the_nearest_cluster():
+    df = listings([0, 0, -1, -1])
+
+    assign_noise_to_nearest_centroid(df, max_distance_km=5.0, n_jobs=1)
+
+    assert df["cluster"].tolist() == [0, 0, 0, -1]
+    # The far listing keeps its nearest cluster and distance for the re-cluster queue
+    assert df["nearest_cluster"].tolist() == [0, 0, 0, 0]
+    assert df.loc[2, "centroid_distance_km"] < 1 < 80 < df.loc[3, "centroid_distance_km"]
+    assert df.loc[:1, "centroid_distance_km"].tolist() == [0.0, 0.0]
+
+
+def test_noise_without_centroids_stays_unassigned():
+    df = listings([-1, -1, -1, -1])
+
+    assign_noise_to_nearest_centroid(df, n_jobs=1)
+
+    assert (df["cluster"] == -1).all()
+    assert (df["nearest_cluster"] == -1).all()
+    assert np.isnan(df["centroid_distance_km"]).all()
@@ -0,0 +1,88 @@
+import os
+import uuid
+
+import pandas as pd
+import pytest
+
+from clustering.publish import publish_clusters
+
+CLUSTERS = pd.DataFrame({"cluster_id": [1, 2], "centroid_lat": [38.90, 38.88], "centroid_lon": [-77.03, -77.10],
+                         "member_count": [2, 1]})
+ASSIGNMENTS = pd.DataFrame({"listing_db_id": [1, 2, 3], "cluster_id": [1, 1, 2]})
+
+
+@pytest.fixture
+def conn():
+    """A scratch schema in ``TEST_DATABASE_URL`` with the tables publish.py swaps and keeps."""
+    psycopg2 = pytest.importorskip("psycopg2")
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    conn = psycopg2.connect(url)
+    schema = f"test_publish_{uuid.uuid4().hex[:8]}"
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}; SET search_path TO {schema};")
+        cur.execute(
+            """
+            CREATE TABLE rental_clusters (cluster_id integer PRIMARY KEY, centroid_lat double precision,
+                                          centroid_lon double precision, member_count integer);
+            CREATE TABLE listing_clusters (assignment_id serial PRIMARY KEY, listing_db_id integer UNIQUE,
+                                           cluster_id integer);
+            CREATE INDEX listing_clusters_cluster_id_idx ON listing_clusters (cluster_id);
+            CREATE TABLE cluster_air_quality (aq_id serial PRIMARY KEY, cluster_id integer NOT NULL, aqi integer,
+                                              category text);
+            CREATE TABLE cluster_model_versions (version serial PRIMARY KEY, created_at timestamptz DEFAULT now(),
+                                                 data_hash text, n_clusters integer NOT NULL,
+                                                 n_listings integer NOT NULL, params jsonb,
+                                                 is_current boolean NOT NULL DEFAULT false);
+            CREATE TABLE cluster_recluster_queue (listing_db_id integer PRIMARY KEY, nearest_cluster_id integer,
+                                                  distance_km double precision, flagged_at timestamptz DEFAULT now());
+            INSERT INTO rental_clusters VALUES (7, 38.901, -77.031, 3);
+            INSERT INTO cluster_air_quality (cluster_id, aqi, category) VALUES (7, 2, 'Fair');
+            """
+        )
+    conn.commit()
+    yield conn
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA {schema} CASCADE;")
+    conn.commit()
+    conn.close()
+
+
+def fetch(conn, query):
+    with conn.cursor() as cur:
+        cur.execute(query)
+        return cur.fetchall()
+
+
+def test_publish_swaps_tables_and_rekeys_air_quality(conn):
+    version = publish_clusters(conn, ASSIGNMENTS, CLUSTERS, {"data_hash": "abc", "params": {}})
+
+    assert fetch(conn, "SELECT listing_db_id, cluster_id FROM listing_clusters ORDER BY 1;") == [(1, 1), (2, 1), (3, 2)]
+    assert fetch(conn, "SELECT cluster_id FROM rental_clusters ORDER BY 1;") == [(1,), (2,)]
+    # Cluster 1 sits on the old cluster 7; cluster 2 is ~6 km away, beyond the re-key cap
+    assert fetch(conn, "SELECT cluster_id, aqi FROM cluster_air_quality;") == [(1, 2)]
+    assert fetch(conn, "SELECT version FROM cluster_model_versions WHERE is_current;") == [(version,)]
+
+
+def test_publish_keeps_queue_entries_it_did_not_assign(conn):
+    with conn.cursor() as cur:
+        # Listing 3 is published now; 9 was flagged after the run read its input
+        cur.execute("INSERT INTO cluster_recluster_queue (listing_db_id, nearest_cluster_id, distance_km) "
+                    "VALUES (3, 7, 4.2), (9, 7, 8.0);")
+    conn.commit()
+
+    publish_clusters(conn, ASSIGNMENTS, CLUSTERS, {"data_hash": "abc", "params": {}})
+
+    assert fetch(conn, "SELECT listing_db_id FROM cluster_recluster_queue;") == [(9,)]
+
+
+def test_publish_queues_unassigned_listings(conn):
+    unassigned = pd.DataFrame({"listing_db_id": [4, 5], "nearest_cluster_id": pd.array([2, None], dtype="Int64"),
+                               "distance_km": [12.5, None]})
+
+    publish_clusters(conn, ASSIGNMENTS, CLUSTERS, {"data_hash": "abc", "params": {}}, unassigned)
+
+    queued = fetch(conn, "SELECT listing_db_id, nearest_cluster_id, distance_km FROM cluster_recluster_queue ORDER BY 1;")
+    assert queued == [(4, 2, 12.5), (5, None, None)]
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from transit_routes import EARTH_RADIUS_MILES, nearest_stop_per_route, route_features
+
+# About 0.69 miles per 0.01 degree of latitude
+STOP_ROUTES = pd.DataFrame(
+    [
+        (10, 38.900, -77.030, "30N"),
+        (10, 38.900, -77.030, "D6"),
+        (11, 38.905, -77.030, "30N"),
+        (12, 38.922, -77.030, "X2"),
+    ],
+    columns=["stop_id", "lat", "lon", "line"],
+)
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+def test_nearest_stop_per_route_keeps_the_closest_stop():
+    listings = pd.DataFrame({"listing_db_id": [1, 2], "latitude": [38.906, 38.700], "longitude": [-77.030, -77.030]})
+
+    nearest = nearest_stop_per_route(listings, STOP_ROUTES)
+
+    # Listing 2 is ~14 miles south of every stop
+    assert nearest["listing_db_id"].unique().tolist() == [1]
+    by_line = nearest.set_index("line")
+    assert by_line.loc["30N", "stop_id"] == 11
+    assert by_line.loc["D6", "stop_id"] == 10
+    # Stop 12 is just outside the mile
+    assert "X2" not in by_line.index
+    assert by_line.loc["30N", "distance_miles"] == pytest.approx(0.07, abs=0.01)
+
+
+def test_nearest_stop_per_route_matches_brute_force():
+    rng = np.random.default_rng(1)
+    stops = pd.DataFrame({
+        "stop_id": np.arange(40),
+        "lat": 38.9 + rng.uniform(-0.05, 0.05, 40),
+        "lon": -77.0 + rng.uniform(-0.05, 0.05, 40),
+    })
+    stop_routes = stops.merge(pd.DataFrame({"line": ["A", "B", "C"]}), how="cross").sample(frac=0.5, random_state=1)
+    listings = pd.DataFrame({
+        "listing_db_id": np.arange(100, 130),
+        "latitude": 38.9 + rng.uniform(-0.05, 0.05, 30),
+        "longitude": -77.0 + rng.uniform(-0.05, 0.05, 30),
+    })
+
+    nearest = nearest_stop_per_route(listings, stop_routes, radius_miles=1.0)
+
+    pairs = listings.merge(stop_routes, how="cross")
+    pairs["distance_miles"] = haversine_miles(pairs["latitude"], pairs["longitude"], pairs["lat"], pairs["lon"])
+    pairs = pairs[pairs["distance_miles"] <= 1.0]
+    expected = pairs.groupby(["listing_db_id", "line"])["distance_miles"].min().round(2)
+    actual = nearest.set_index(["listing_db_id", "line"])["distance_miles"].sort_index()
+    pd.testing.assert_series_equal(actual, expected, check_exact=False, atol=0.011)
+
+
+def test_nearest_stop_per_route_without_stops_or_listings():
+    listings = pd.DataFrame({"listing_db_id": [1], "latitude": [38.9], "longitude": [-77.03]})
+
+    assert nearest_stop_per_route(listings, STOP_ROUTES.iloc[:0]).empty
+    assert nearest_stop_per_route(listings.iloc[:0], STOP_ROUTES).empty
+
+
+def test_route_features_count_and_order_routes():
+    listings = pd.DataFrame({"listing_db_id": [1, 2, 3]})
+    nearest = pd.DataFrame({
+        "listing_db_id": [1, 1, 1, 3],
+        "line": ["X2", "30N", "D6", "D6"],
+        "stop_id": [12, 11, 10, 10],
+        "distance_miles": [0.9, 0.07, 0.07, 0.5],
+    })
+
+    features = route_features(listings, nearest).set_index("listing_db_id")
+
+    # Nearest first, ties by name
+    assert features.loc[1, "nearby_route_names"] == "30N, D6, X2"
+    assert features["nearby_routes"].tolist() == [3, 0, 1]
+    assert pd.isna(features.loc[2, "nearby_route_names"])
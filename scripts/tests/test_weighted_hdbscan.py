@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from sklearn.cluster import HDBSCAN
+from sklearn.metrics import adjusted_rand_score
+
+from clustering.weighted_hdbscan import (
+    EXACT_MST_MAX_POINTS,
+    collapse_coordinates,
+    mutual_reachability_mst,
+    prim_mst,
+    weighted_core_distances,
+    weighted_hdbscan,
+)
+
+
+def blobs(n_per_blob=60, n_noise=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform([38.8, -77.2], [39.0, -76.9], (6, 2))
+    points = [center + rng.normal(0, 0.004, (n_per_blob, 2)) for center in centers]
+    points.append(rng.uniform([38.8, -77.2], [39.0, -76.9], (n_noise, 2)))
+    return np.radians(np.vstack(points))
+
+
+def same_partition(a, b):
+    """Equal up to renaming the cluster labels (noise must stay noise)."""
+    pairs = set(zip(a.tolist(), b.tolist()))
+    return len(pairs) == len(set(a.tolist())) == len(set(b.tolist())) and all((x == -1) == (y == -1) for x, y in pairs)
+
+
+@pytest.mark.parametrize("min_cluster_size, min_samples", [(15, 10), (10, 5), (25, None)])
+def test_unit_weights_match_sklearn(min_cluster_size, min_samples):
+    coords = blobs()
+    expected = HDBSCAN(min_cluster_size=min_cluster_size, min_samples=min_samples, metric="haversine", copy=True)
+    labels = weighted_hdbscan(coords, np.ones(len(coords)), min_cluster_size, min_samples)
+    assert same_partition(labels, expected.fit_predict(coords))
+
+
+def test_duplicates_as_weights_match_expanded_points():
+    rng = np.random.default_rng(1)
+    coords = blobs()
+    # Every point repeated 1-3 times, as units of one building share a coordinate
+    expanded = np.repeat(coords, rng.integers(1, 4, len(coords)), axis=0)
+    unique, inverse, counts = collapse_coordinates(expanded)
+
+    weighted = weighted_hdbscan(unique, counts, 20, 10)[inverse]
+    expected = HDBSCAN(min_cluster_size=20, min_samples=10, metric="haversine", copy=True).fit_predict(expanded)
+    # Duplicates tie at distance zero in sklearn, so a few border points may fall the other way
+    assert adjusted_rand_score(weighted, expected) > 0.95
+
+
+def test_weights_count_towards_min_cluster_size():
+    coords = blobs(n_per_blob=8, n_noise=0)
+    assert (weighted_hdbscan(coords, np.ones(len(coords)), 20, 5) == -1).all()
+    assert (weighted_hdbscan(coords, np.full(len(coords), 3.0), 20, 5) >= 0).any()
+
+
+def test_sparse_tree_spans_and_matches_exact_on_dense_data():
+    rng = np.random.default_rng(2)
+    centers = rng.uniform([38.8, -77.2], [39.0, -76.9], (5, 2))
+    coords = np.radians(np.vstack([center + rng.normal(0, 0.003, (600, 2)) for center in centers]))
+    assert len(coords) > EXACT_MST_MAX_POINTS
+    weights = np.ones(len(coords))
+    core_distances = weighted_core_distances(coords, weights, 10, "haversine")
+
+    sparse = mutual_reachability_mst(coords, core_distances, "haversine")
+    assert len(sparse) == len(coords) - 1
+    # Spanning: every point is reached
+    assert set(sparse[:, :2].astype(int).ravel()) == set(range(len(coords)))
+
+    exact = prim_mst(coords, core_distances, "haversine")
+    assert sparse[:, 2].sum() == pytest.approx(exact[:, 2].sum(), rel=1e-3)
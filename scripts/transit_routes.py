@@ -0,0 +1,135 @@
+import os
+import sys
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from sklearn.neighbors import BallTree
+
+from etl_profiler import db_time, etl_run, record_rows, stage
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, root)
+from server.utils.feature_snapshot import open_snapshot, write_snapshot
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Same one-mile radius as the stop and park counts
+RADIUS_MILES = 1.0
+EARTH_RADIUS_MILES = 3958.8
+
+STOP_ROUTES_SQL = """
+    SELECT bs.id AS stop_id, bs.lat, bs.lon, r.line
+    FROM bus_stops bs
+    JOIN bus_stop_routes r ON r.stop_id = bs.id;
+"""
+
+
+def load_stop_routes(engine) -> pd.DataFrame:
+    with db_time():
+        df = pd.read_sql(STOP_ROUTES_SQL, engine)
+    # Variants of a line at the same stop count once
+    return df.drop_duplicates(subset=["stop_id", "line"]).reset_index(drop=True)
+
+
+def nearest_stop_per_route(listings: pd.DataFrame, stop_routes: pd.DataFrame, radius_miles: float = RADIUS_MILES) -> pd.DataFrame:
+    """
+    For every listing, each route with a stop within ``radius_miles`` and the
+    nearest such stop.
+
+    One ball-tree radius query over all listings finds the (listing, stop)
+    pairs; routes are attached with a merge and reduced with a groupby, so
+    there is no per-listing Python work.
+
+    Returns:
+        pd.DataFrame: listing_db_id, line, stop_id, distance_miles.
+    """
+    stops = stop_routes.drop_duplicates("stop_id")[["stop_id", "lat", "lon"]].reset_index(drop=True)
+    if stops.empty or listings.empty:
+        return pd.DataFrame(columns=["listing_db_id", "line", "stop_id", "distance_miles"])
+
+    tree = BallTree(np.radians(stops[["lat", "lon"]].to_numpy()), metric="haversine")
+    indices, distances = tree.query_radius(
+        np.radians(listings[["latitude", "longitude"]].to_numpy()),
+        r=radius_miles / EARTH_RADIUS_MILES,
+        return_distance=True,
+    )
+    counts = np.fromiter((len(i) for i in indices), dtype=np.int64, count=len(indices))
+    pairs = pd.DataFrame({
+        "listing_db_id": np.repeat(listings["listing_db_id"].to_numpy(), counts),
+        "stop_id": stops["stop_id"].to_numpy()[np.concatenate(indices).astype(np.int64)] if counts.sum() else [],
+        "distance_miles": np.concatenate(distances) * EARTH_RADIUS_MILES if counts.sum() else [],
+    })
+
+    routes = pairs.merge(stop_routes[["stop_id", "line"]], on="stop_id")
+    nearest = routes.sort_values(["listing_db_id", "line", "distance_miles"]).drop_duplicates(["listing_db_id", "line"])
+    nearest["distance_miles"] = nearest["distance_miles"].round(2)
+    return nearest[["listing_db_id", "line", "stop_id", "distance_miles"]].reset_index(drop=True)
+
+
+def route_features(listings: pd.DataFrame, nearest: pd.DataFrame) -> pd.DataFrame:
+    """Per listing: number of distinct routes in reach and their names, nearest first."""
+    ordered = nearest.sort_values(["listing_db_id", "distance_miles", "line"])
+    grouped = ordered.groupby("listing_db_id")["line"]
+    features = pd.DataFrame({"nearby_routes": grouped.size(), "nearby_route_names": grouped.agg(", ".join)})
+    features = features.reindex(listings["listing_db_id"].to_numpy())
+    # Listings with no route in reach have zero routes, not an unknown number
+    features["nearby_routes"] = features["nearby_routes"].fillna(0).astype(np.int32)
+    return features.rename_axis("listing_db_id").reset_index()
+
+
+def publish(nearest: pd.DataFrame, features: pd.DataFrame, snapshot, engine):
+    """Write the listing routes to Postgres and republish the snapshot with the route features."""
+    with stage("write_db"), db_time():
+        nearest.to_sql(
+            "listing_transit_routes",
+            engine,
+            if_exists="replace",
+            index=False,
+            method="multi",
+            chunksize=1000,
+        )
+        record_rows(written=len(nearest))
+
+    with stage("publish_snapshot"):
+        table = snapshot.table
+        by_listing = features.set_index("listing_db_id")
+        ids = table.column("listing_db_id").to_pandas()
+        for column, type_ in (("nearby_routes", pa.int32()), ("nearby_route_names", pa.string())):
+            table = table.set_column(
+                table.schema.get_field_index(column),
+                table.schema.field(column),
+                pa.array(ids.map(by_listing[column]), type=type_, from_pandas=True),
+            )
+        write_snapshot(table, metadata={"source": "transit_routes", "features_version": snapshot.manifest["version"]})
+        record_rows(written=table.num_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the bus routes within reach of every listing.")
+    parser.add_argument("--radius-miles", type=float, default=RADIUS_MILES, help="Search radius.")
+    args = parser.parse_args()
+
+    # Imported here so the spatial join can be used without a database
+    from utils.db_engine import DBEngine
+
+    engine = DBEngine().get_engine()
+    with etl_run("transit_routes"):
+        with stage("load"):
+            snapshot = open_snapshot()
+            if snapshot is None:
+                raise SystemExit("No feature snapshot found; run build_feature_snapshot.py first.")
+            listings = snapshot.table.select(["listing_db_id", "latitude", "longitude"]).to_pandas()
+            stop_routes = load_stop_routes(engine)
+            record_rows(read=len(listings) + len(stop_routes))
+        with stage("spatial_join"):
+            nearest = nearest_stop_per_route(listings, stop_routes, args.radius_miles)
+            features = route_features(listings, nearest)
+            record_rows(read=len(listings), written=len(nearest))
+        publish(nearest, features, snapshot, engine)
+
+
+if __name__ == "__main__":
+    main()
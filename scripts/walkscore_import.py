@@ -2,11 +2,15 @@ import requests
 import logging
 import psycopg2
 from utils.db_connection import DatabaseConnection
+from etl_profiler import db_time, etl_run, record_rows, stage
+from http_client import HttpClient
 import pyproj
-import time
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Avoid too many API calls in a short time (replayed responses are not throttled)
+client = HttpClient(min_interval=0.01)
+
 def fetch_listing_batch(connection, batch_size, last_id):
     """Fetch rental listings from the database in batches."""
     sql = """
@@ -23,8 +27,9 @@ def fetch_listing_batch(connection, batch_size, last_id):
     try:
         with connection as conn:
             with conn.cursor() as cur:
-                cur.execute(sql, (last_id, batch_size))
-                rows = cur.fetchall()
+                with db_time():
+                    cur.execute(sql, (last_id, batch_size))
+                    rows = cur.fetchall()
                 if not rows:
                     logging.info("No more listings to process.")
                     return []
@@ -51,7 +56,7 @@ def get_walkability_index(lat, lon):
             "f": "json"
         }
 
-        response = requests.get(url, params=params)
+        response = client.get(url, params=params)
         response.raise_for_status()
         data = response.json()
 
@@ -80,8 +85,10 @@ def bulk_insert_geo_nwi(connection, data_list):
     try:
         with connection as conn:
             with conn.cursor() as cur:
-                psycopg2.extras.execute_values(cur, sql, data_list)
-                conn.commit()
+                with db_time():
+                    psycopg2.extras.execute_values(cur, sql, data_list)
+                    conn.commit()
+                record_rows(written=len(data_list))
                 logging.info(f"Inserted {len(data_list)} records into geo_nwi.")
 
     except psycopg2.Error as db_err:
@@ -97,8 +104,10 @@ def bulk_insert_assignments(connection, data_list):
     try:
         with connection as conn:
             with conn.cursor() as cur:
-                psycopg2.extras.execute_values(cur, sql, data_list)
-                conn.commit()
+                with db_time():
+                    psycopg2.extras.execute_values(cur, sql, data_list)
+                    conn.commit()
+                record_rows(written=len(data_list))
                 logging.info(f"Inserted {len(data_list)} records into walkability_assignments.")
 
     except psycopg2.Error as db_err:
@@ -123,6 +132,7 @@ def process_all_listings():
                 if not batch: break
 
                 logging.info(f"Processing batch of {len(batch)} listings after ID {last_processed_id}...")
+                record_rows(read=len(batch))
 
                 for listing_id, lat, lon in batch:
                     api_result = get_walkability_index(lat, lon)
@@ -139,9 +149,6 @@ def process_all_listings():
                     else:
                         logging.error(f"Failed to fetch walkability index for listing ID {listing_id} with lat {lat} and lon {lon}")
 
-                    # Avoid too many API calls in a short time
-                    time.sleep(0.01)
-
                 # Bulk insert after processing each batch
                 geo_nwi_list = list(walkability_data.items())
                 bulk_insert_geo_nwi(conn, geo_nwi_list)
@@ -157,7 +164,8 @@ def process_all_listings():
 
 
 def main():
-    process_all_listings()
+    with etl_run("walkscore"), stage("walkability"):
+        process_all_listings()
 
 if __name__ == "__main__":
     main()
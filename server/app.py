@@ -4,6 +4,13 @@ from fastapi.staticfiles import StaticFiles
 from .routes.rental_score import router as rental_score_router
 from .routes.bus_stop_list import router as bus_list_router
 from .routes.park_list import router as park_list_router
+from .routes.cache_stats import router as cache_stats_router
+from .routes.metrics import router as metrics_router
+from .routes.admin import router as admin_router
+from .routes.search import router as search_router
+from .utils.metrics import record_request_metrics
+from .utils.profiling import profile_requests
+from .utils.startup import lifespan, log_time_to_first_byte
 from fastapi.middleware.cors import CORSMiddleware
 
 # get args from cmd
@@ -15,13 +22,20 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Rental Score API", version="0.0.1")
+    app = FastAPI(title="Rental Score API", version="0.0.1", lifespan=lifespan)
+    app.middleware("http")(log_time_to_first_byte)
+    app.middleware("http")(record_request_metrics)
+    app.middleware("http")(profile_requests)
 
     # Include routers
 
     app.include_router(rental_score_router)
     app.include_router(bus_list_router)
     app.include_router(park_list_router)
+    app.include_router(cache_stats_router)
+    app.include_router(metrics_router)
+    app.include_router(admin_router)
+    app.include_router(search_router)
 
     # Mount static files for the frontend
     if IS_DEV:
@@ -0,0 +1,15 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class SearchResultModel(BaseModel):
+    id: int
+    name: str
+    address: Optional[str]
+    city: Optional[str]
+    state: str
+    zipCode: Optional[str]
+    lat: float
+    long: float
+    score: float
@@ -0,0 +1,45 @@
+import os
+import hmac
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+from ..utils.profiling import list_profiles, list_slow_queries, profile_path
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(default=None)):
+    # Closed unless ADMIN_TOKEN is set; the routes do not exist as far as an unconfigured server is concerned
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/profiles", response_model=List[Dict])
+async def get_profiles(limit: int = Query(50, gt=0, le=500)) -> List[Dict]:
+    return list_profiles(limit)
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    path = profile_path(profile_id, ".json")
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No profile found with ID: {profile_id}")
+    return FileResponse(path, media_type="application/json")
+
+
+@router.get("/profiles/{profile_id}/folded")
+async def get_profile_stacks(profile_id: str):
+    # Collapsed stacks, ready for flamegraph.pl or speedscope
+    path = profile_path(profile_id, ".folded")
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No profile found with ID: {profile_id}")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
+
+
+@router.get("/slowQueries", response_model=List[Dict])
+async def get_slow_queries(limit: int = Query(50, gt=0, le=500)) -> List[Dict]:
+    return list_slow_queries(limit)
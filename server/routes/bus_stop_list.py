@@ -1,15 +1,35 @@
 from typing import Dict, List
 from fastapi import APIRouter, HTTPException
 from ..utils.db_connection import DatabaseConnection
+from ..utils.feature_snapshot import get_reader
+from ..utils.metrics import timed_query
+from ..utils.response_cache import ResponseCache
 from psycopg2.extras import RealDictCursor
 
 # Fix the prefix - there's a typo in "listing_is" that should be "listing_id"
 router = APIRouter(prefix="/api/busStopsInOneMiles", tags=["busStopsInOneMiles"])
 
+# Listings outside the snapshot fall back to a spatial query; cache it per listing
+bus_stops_cache = ResponseCache.from_env("bus_stops", ttl=3600, stale_ttl=86400)
+
 
 # Add a proper path parameter in the route
 @router.get("/{listing_id}", response_model=Dict)
 async def get_bus_stops_within_miles(listing_id: str) -> Dict:
+    # In-scope listings are answered from the feature snapshot
+    found, names = get_reader().lookup(listing_id, "nearby_bus_stop_names")
+    if found:
+        if not names:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No bus stops found for listing ID: {listing_id}",
+            )
+        return {"nearby_bus_stops": names}
+
+    return await bus_stops_cache.get(listing_id, lambda: _query_bus_stops(listing_id))
+
+
+def _query_bus_stops(listing_id: str) -> Dict:
     try:
         # 1) Open connection + real-dict cursor
         with DatabaseConnection() as conn:
@@ -21,14 +41,13 @@ async def get_bus_stops_within_miles(listing_id: str) -> Dict:
                     public.rental_listings rl
                     JOIN
                     public.bus_stops bs
-                    ON ST_DWithin(rl.geom, bs.geom, 0.0145)
+                    ON ST_DWithin(rl.geog, bs.geog, 1609.34)
                     WHERE rl.listing_db_id = %s
                     GROUP BY
                     rl.listing_db_id;
                     """
                 # Use parameterized query for security
-                cur.execute(sql, (listing_id,))
-                records: Dict = cur.fetchone()
+                records: Dict = timed_query(cur, "nearby_bus_stops", sql, (listing_id,), one=True)
 
                 if not records:
                     raise HTTPException(
@@ -37,6 +56,8 @@ async def get_bus_stops_within_miles(listing_id: str) -> Dict:
                     )
 
         return records
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching bus stops: {str(e)}"
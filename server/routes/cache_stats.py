@@ -0,0 +1,11 @@
+from typing import Dict
+from fastapi import APIRouter
+from ..utils.response_cache import CACHES
+
+router = APIRouter(prefix="/api/cacheStats", tags=["cacheStats"])
+
+
+@router.get("", response_model=Dict)
+async def get_cache_stats() -> Dict:
+    # Hits, stale hits, misses and coalesced waits per cached route
+    return {name: cache.snapshot_stats() for name, cache in CACHES.items()}
@@ -0,0 +1,51 @@
+from typing import List
+
+from fastapi import APIRouter, Response
+from ..utils.metrics import CONTENT_TYPE, format_value, render_metrics
+from ..utils.response_cache import CACHES
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+def cache_lines() -> List[str]:
+    lines = [
+        "# HELP response_cache_requests_total Cached route lookups by outcome.",
+        "# TYPE response_cache_requests_total counter",
+    ]
+    for name, cache in sorted(CACHES.items()):
+        for result in ("hits", "stale_hits", "misses", "coalesced"):
+            lines.append(f'response_cache_requests_total{{cache="{name}",result="{result}"}} {cache.stats[result]}')
+    lines += [
+        "# HELP response_cache_hit_ratio Share of lookups answered from cache (fresh or stale).",
+        "# TYPE response_cache_hit_ratio gauge",
+    ]
+    for name, cache in sorted(CACHES.items()):
+        ratio = cache.snapshot_stats()["hit_ratio"]
+        lines.append(f'response_cache_hit_ratio{{cache="{name}"}} {format_value(float(ratio or 0.0))}')
+    lines += [
+        "# HELP response_cache_revalidations_total Background recomputations of stale entries.",
+        "# TYPE response_cache_revalidations_total counter",
+    ]
+    for name, cache in sorted(CACHES.items()):
+        lines.append(f'response_cache_revalidations_total{{cache="{name}"}} {cache.stats["revalidations"]}')
+    lines += [
+        "# HELP response_cache_failures_total Computations that ended in a 4xx answer (rejections) or raised (errors).",
+        "# TYPE response_cache_failures_total counter",
+    ]
+    for name, cache in sorted(CACHES.items()):
+        for result in ("rejections", "errors"):
+            lines.append(f'response_cache_failures_total{{cache="{name}",result="{result}"}} {cache.stats[result]}')
+    lines += [
+        "# HELP response_cache_entries Entries currently held per cache.",
+        "# TYPE response_cache_entries gauge",
+    ]
+    for name, cache in sorted(CACHES.items()):
+        lines.append(f'response_cache_entries{{cache="{name}"}} {cache.snapshot_stats()["entries"]}')
+    return lines
+
+
+
+@router.get("")
+async def get_metrics() -> Response:
+    # Prometheus text exposition format for this worker
+    return Response(content=render_metrics(cache_lines()), media_type=CONTENT_TYPE)
@@ -1,15 +1,35 @@
 from typing import Dict, List
 from fastapi import APIRouter, HTTPException
 from ..utils.db_connection import DatabaseConnection
+from ..utils.feature_snapshot import get_reader
+from ..utils.metrics import timed_query
+from ..utils.response_cache import ResponseCache
 from psycopg2.extras import RealDictCursor
 
 # Fix the prefix - there's a typo in "listing_is" that should be "listing_id"
 router = APIRouter(prefix="/api/parksInOneMiles", tags=["parksInOneMiles"])
 
+# Listings outside the snapshot fall back to a spatial query; cache it per listing
+parks_cache = ResponseCache.from_env("parks", ttl=3600, stale_ttl=86400)
+
 
 # Add a proper path parameter in the route
 @router.get("/{listing_id}", response_model=Dict)
 async def get_parks_within_miles(listing_id: str) -> Dict:
+    # In-scope listings are answered from the feature snapshot
+    found, names = get_reader().lookup(listing_id, "nearby_park_names")
+    if found:
+        if not names:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No parks found for listing ID: {listing_id}",
+            )
+        return {"nearby_parks": names}
+
+    return await parks_cache.get(listing_id, lambda: _query_parks(listing_id))
+
+
+def _query_parks(listing_id: str) -> Dict:
     try:
         # 1) Open connection + real-dict cursor
         with DatabaseConnection() as conn:
@@ -21,23 +41,26 @@ async def get_parks_within_miles(listing_id: str) -> Dict:
                     public.rental_listings rl
                     JOIN
                     public.open_street os
-                    ON ST_DWithin(rl.geom, os.geom, 0.0145)
+                    ON ST_DWithin(rl.geog, os.geog, 1609.34)
+                    -- Parks only, as in the feature snapshot
+                    AND os.leisure = 'park'
                     WHERE rl.listing_db_id = %s
                     GROUP BY
                     rl.listing_id;
                     """
                 # Use parameterized query for security
-                cur.execute(sql, (listing_id,))
-                records: Dict = cur.fetchone()
+                records: Dict = timed_query(cur, "nearby_parks", sql, (listing_id,), one=True)
 
                 if not records:
                     raise HTTPException(
                         status_code=404,
-                        detail=f"No bus stops found for listing ID: {listing_id}",
+                        detail=f"No parks found for listing ID: {listing_id}",
                     )
 
         return records
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
-            status_code=500, detail=f"Error fetching bus stops: {str(e)}"
+            status_code=500, detail=f"Error fetching parks: {str(e)}"
         )
@@ -1,21 +1,39 @@
 from ..models.rental_score_model import RentalScoreModel
 from typing import List
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
+from pydantic import TypeAdapter
 from ..utils.convert_qol import QualityOfLifeConverter
+from ..utils.feature_snapshot import get_reader
+from ..utils.profiling import span
+from ..utils.response_cache import ResponseCache
 
 router = APIRouter(prefix="/api/rentalScore", tags=["rentalScore"])
 
+# Serialized response per snapshot version; a new snapshot is a new key
+rental_score_cache = ResponseCache.from_env("rental_score", ttl=300, stale_ttl=3600, max_entries=4)
+
+_rental_scores_adapter = TypeAdapter(List[RentalScoreModel])
 
-@router.get("", response_model=List[RentalScoreModel])
-async def get_rental_score():
 
+def _render_rental_scores() -> bytes:
     converter = QualityOfLifeConverter()
     all_scores = converter.fetch_rental_scores()
     if not all_scores:
         raise HTTPException(status_code=404, detail="No records found")
-    return all_scores
+    # Validated once per computation, as response_model would on every request
+    with span("validation"):
+        models = _rental_scores_adapter.validate_python(all_scores)
+    with span("serialization"):
+        return _rental_scores_adapter.dump_json(models)
 
 
+@router.get("", response_model=List[RentalScoreModel])
+async def get_rental_score():
+    snapshot = get_reader().current()
+    key = snapshot.manifest["version"] if snapshot is not None else "postgres"
+    body = await rental_score_cache.get(key, _render_rental_scores)
+    return Response(content=body, media_type="application/json")
+
 # @router.get("", response_model=List[RentalScoreModel])
 # async def get_rental_score(
 #     skip: int = Query(0, ge=0, description="Number of records to skip"),
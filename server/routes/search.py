@@ -0,0 +1,45 @@
+import asyncio
+from typing import Dict, List
+from fastapi import APIRouter, HTTPException, Query
+from ..models.search_result_model import SearchResultModel
+from ..utils.feature_snapshot import get_reader
+from ..utils.profiling import span
+from ..utils.search_index import get_search_index
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+# API field -> feature snapshot column
+RESULT_COLUMNS = {
+    "id": "listing_db_id",
+    "name": "listing_name",
+    "address": "address",
+    "city": "city",
+    "state": "state",
+    "zipCode": "zip_code",
+    "lat": "latitude",
+    "long": "longitude",
+}
+
+
+@router.get("", response_model=List[SearchResultModel])
+async def search_listings(
+    q: str = Query(..., min_length=1, max_length=200, description="Address, listing name, city or zip code"),
+    limit: int = Query(10, gt=0, le=50, description="Max results to return"),
+) -> List[Dict]:
+    snapshot = get_reader().current()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Search is unavailable until a feature snapshot is published")
+
+    # Built once per snapshot version, off the event loop
+    with span("search_index"):
+        index = await asyncio.to_thread(get_search_index, snapshot)
+    with span("search"):
+        rows, scores = index.search(q, limit)
+
+    hits = snapshot.table.select(list(RESULT_COLUMNS.values())).take(rows).to_pydict()
+    results = [dict(zip(RESULT_COLUMNS, values)) for values in zip(*hits.values())]
+    for result, score in zip(results, scores.tolist()):
+        result["name"] = result["name"] or ""
+        result["state"] = result["state"] or ""
+        result["score"] = round(score, 3)
+    return results
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The server is imported as the ``server`` package from the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)))
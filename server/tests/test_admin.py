@@ -0,0 +1,20 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from server.routes.admin import router
+
+client = TestClient(FastAPI(routes=router.routes))
+
+
+def test_closed_without_admin_token(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/api/admin/slowQueries").status_code == 404
+    assert client.get("/api/admin/slowQueries", headers={"X-Admin-Token": ""}).status_code == 404
+
+
+def test_requires_matching_token(monkeypatch, tmp_path):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    assert client.get("/api/admin/slowQueries").status_code == 403
+    assert client.get("/api/admin/slowQueries", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/api/admin/slowQueries", headers={"X-Admin-Token": "secret"}).status_code == 200
@@ -0,0 +1,45 @@
+import numpy as np
+import pyarrow as pa
+
+from server.utils.feature_snapshot import SNAPSHOT_SCHEMA
+from server.utils.listing_store import ListingStore
+
+
+def snapshot_table():
+    columns = {field.name: pa.nulls(3, field.type) for field in SNAPSHOT_SCHEMA}
+    columns.update({
+        "listing_db_id": pa.array([1, 2, 3], pa.int32()),
+        "latitude": pa.array([38.90, 38.91, 38.92]),
+        "longitude": pa.array([-77.03, -77.02, -77.01]),
+        "listing_name": pa.array(["Flats", None, "Lofts"]),
+        "price": pa.array([1500, None, 2500], pa.int32()),
+        "nearby_bus_stops": pa.array([4, 0, 12], pa.int32()),
+        "qol_score": pa.array([0.0, 0.5, 1.0]),
+    })
+    return pa.table(columns, schema=SNAPSHOT_SCHEMA)
+
+
+def test_null_free_columns_are_views_of_the_snapshot():
+    table = snapshot_table()
+
+    store = ListingStore.from_arrow(table)
+
+    for field, column in (("id", "listing_db_id"), ("lat", "latitude"), ("busStopsNumber", "nearby_bus_stops")):
+        assert field in store.shared
+        address = table.column(column).chunk(0).buffers()[1].address
+        assert store.numeric[field].__array_interface__["data"][0] == address
+        assert not store.numeric[field].flags.writeable
+    # Filled, converted or computed columns are private copies
+    assert {"price", "bedroom", "qolScore"}.isdisjoint(store.shared)
+
+
+def test_records_fill_missing_values():
+    store = ListingStore.from_arrow(snapshot_table())
+
+    records = store.to_records()
+
+    assert [record["id"] for record in records] == [1, 2, 3]
+    assert [record["price"] for record in records] == [1500.0, 0.0, 2500.0]
+    assert [record["name"] for record in records] == ["Flats", "", "Lofts"]
+    assert [record["qolScore"] for record in records] == [0.0, 50.0, 100.0]
+    assert np.isclose(records[0]["lat"], 38.90)
@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from server.routes.metrics import router
+from server.utils.metrics import Counter, render_metrics
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+
+def test_snapshot_module_imports_without_fastapi():
+    # The scripts and the dashboard use the snapshot module but do not install fastapi
+    code = (
+        "import sys; sys.modules['fastapi'] = None; "
+        "import server.utils.feature_snapshot, server.utils.db_connection"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+
+
+def test_metrics_route_renders_registry_and_cache_stats():
+    counter = Counter("test_metrics_total", "Test counter.", ("kind",))
+    counter.inc(kind="a")
+
+    response = TestClient(FastAPI(routes=router.routes)).get("/metrics")
+
+    assert response.status_code == 200
+    assert 'test_metrics_total{kind="a"} 1' in response.text
+    assert "# TYPE response_cache_requests_total counter" in response.text
+    assert render_metrics(["extra 1"]).endswith("extra 1\n")
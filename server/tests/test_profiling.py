@@ -0,0 +1,80 @@
+import contextvars
+import threading
+import time
+
+from server.utils import profiling
+from server.utils.profiling import RequestProfile, StackSampler, capture_slow_query, span
+
+
+class FakeCursor:
+    """Records the statements run on its connection's cursors."""
+
+    def __init__(self):
+        self.executed = []
+        self.connection = self
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+    def fetchall(self):
+        return [("Seq Scan on bus_stops",)]
+
+
+def test_slow_query_plan_is_explained_once_per_cooldown(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 100.0)
+    monkeypatch.setattr(profiling, "_slow_query_captured", {})
+    cur = FakeCursor()
+
+    capture_slow_query(cur, "nearby_bus_stops", "SELECT 1", None, 50.0)
+    for _ in range(3):
+        capture_slow_query(cur, "nearby_bus_stops", "SELECT 1", None, 500.0)
+    capture_slow_query(cur, "nearby_parks", "SELECT 2", None, 500.0)
+
+    # Planned only, never re-executed with ANALYZE
+    assert cur.executed == ["EXPLAIN SELECT 1", "EXPLAIN SELECT 2"]
+    assert len(list((tmp_path / profiling.SLOW_QUERY_SUBDIR).iterdir())) == 2
+
+
+def test_sampler_records_only_the_request_threads():
+    profile = RequestProfile("GET", "/api/test")
+    stop = threading.Event()
+
+    def unrelated_work():
+        stop.wait(5)
+
+    def request_work():
+        with span("query:test"):
+            stop.wait(5)
+
+    token = profiling._current_profile.set(profile)
+    try:
+        other = threading.Thread(target=unrelated_work, name="unrelated")
+        # Threads inherit no context; copy it, as asyncio.to_thread does
+        context = contextvars.copy_context()
+        worker = threading.Thread(target=context.run, args=(request_work,), name="request-worker")
+        other.start()
+        worker.start()
+        sampler = StackSampler(0.005, profile)
+        sampler.start()
+        time.sleep(0.1)
+        stacks = sampler.stop()
+    finally:
+        stop.set()
+        profiling._current_profile.reset(token)
+    other.join()
+    worker.join()
+
+    roots = {stack.split(";")[0] for stack in stacks}
+    assert "request-worker" in roots
+    assert "unrelated" not in roots
+    assert not any("unrelated_work" in stack for stack in stacks)
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from server.utils.response_cache import ResponseCache
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResponseCache("test_coalesce", ttl=60, stale_ttl=60)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"stops": len(calls)}
+
+    async def lookups():
+        pending = [asyncio.create_task(cache.get("listing", compute)) for _ in range(10)]
+        # Every caller is waiting before the computation may finish
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*pending)
+
+    results = asyncio.run(lookups())
+
+    assert results == [{"stops": 1}] * 10
+    assert len(calls) == 1
+    assert (cache.stats["misses"], cache.stats["coalesced"]) == (1, 9)
+
+
+def test_stale_entry_is_served_during_one_revalidation():
+    # A zero TTL makes every stored entry stale straight away
+    cache = ResponseCache("test_stale", ttl=0, stale_ttl=60)
+    versions = iter(["old", "new"])
+    revalidating, release = threading.Event(), threading.Event()
+
+    def compute():
+        value = next(versions)
+        if value == "new":
+            revalidating.set()
+            release.wait(5)
+        return value
+
+    async def lookups():
+        first = await cache.get("listing", compute)
+        stale = [await cache.get("listing", compute) for _ in range(3)]
+        await asyncio.to_thread(revalidating.wait, 5)
+        release.set()
+        await asyncio.gather(*cache._background)
+        return first, stale, dict(cache.stats), cache._entries["listing"][0]
+
+    first, stale, stats, stored = asyncio.run(lookups())
+
+    assert first == "old"
+    # Answered from the stale entry without waiting for the recomputation
+    assert stale == ["old"] * 3
+    assert (stats["stale_hits"], stats["revalidations"]) == (3, 1)
+    assert stored == "new"
+
+
+def test_not_found_is_cached_as_a_rejection():
+    cache = ResponseCache("test_not_found", ttl=60, stale_ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        raise HTTPException(status_code=404, detail="No parks found")
+
+    async def lookup():
+        with pytest.raises(HTTPException) as raised:
+            await cache.get("listing", compute)
+        return raised.value.status_code
+
+    assert [asyncio.run(lookup()) for _ in range(3)] == [404, 404, 404]
+    assert len(calls) == 1
+    assert cache.stats["rejections"] == 1
+    assert cache.stats["errors"] == 0
+
+
+def test_failures_are_errors_and_not_cached():
+    cache = ResponseCache("test_failures", ttl=60, stale_ttl=60)
+
+    def compute():
+        raise HTTPException(status_code=500, detail="Error fetching parks")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            asyncio.run(cache.get("listing", compute))
+    assert cache.stats["errors"] == 2
+    assert cache.stats["misses"] == 2
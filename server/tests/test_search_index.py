@@ -0,0 +1,87 @@
+import pyarrow as pa
+import pytest
+
+from server.utils.search_index import EXACT_WEIGHT, PREFIX_WEIGHT, SEARCH_COLUMNS, SearchIndex, tokenize, trigrams
+
+LISTINGS = [
+    ("Capitol Hill Flats", "123 Maryland Ave NE", "Washington", "20002"),
+    ("Columbia Heights Lofts", "1400 Irving St NW", "Washington", "20010"),
+    ("Silver Spring Commons", "8200 Colesville Rd", "Silver Spring", "20910"),
+    (None, "900 Maryland Ave SW", "Washington", "20024"),
+    ("Arlington Towers", "1011 Arlington Blvd", "Arlington", "22209"),
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    table = pa.table({
+        column: pa.array(values, pa.string()) for column, values in zip(SEARCH_COLUMNS, zip(*LISTINGS))
+    })
+    return SearchIndex.from_arrow(table)
+
+
+def test_tokenize_and_trigrams():
+    assert tokenize("1400 Irving St. NW, #2") == ["1400", "irving", "st", "nw", "2"]
+    assert tokenize(None) == []
+    assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+
+
+def test_exact_token_outranks_prefix(index):
+    rows, scores = index.search("arlington")
+
+    # "washington" is a similar spelling, ranked below the exact match
+    assert rows[0] == 4
+    # listing name, address and city all contain the token, but a row scores it once
+    assert scores[0] == EXACT_WEIGHT
+    assert (scores[1:] < PREFIX_WEIGHT).all()
+    rows, scores = index.search("arl")
+    assert rows.tolist() == [4]
+    assert scores[0] == pytest.approx(PREFIX_WEIGHT)
+
+
+def test_prefix_matches_every_token_with_it(index):
+    rows, _ = index.search("2000")
+
+    assert sorted(rows.tolist()) == [0]
+    rows, _ = index.search("200")
+    assert sorted(rows.tolist()) == [0, 1, 3]
+
+
+def test_all_query_tokens_must_match(index):
+    rows, _ = index.search("maryland ave")
+    assert sorted(rows.tolist()) == [0, 3]
+
+    rows, _ = index.search("maryland sw")
+    assert rows.tolist() == [3]
+
+    assert len(index.search("maryland irving")[0]) == 0
+
+
+def test_typos_match_by_trigram_similarity(index):
+    rows, scores = index.search("colombia")
+
+    assert rows.tolist() == [1]
+    assert 0 < scores[0] < PREFIX_WEIGHT
+    # Numbers are never fuzzy: 20011 is a different zip code, not a typo
+    assert len(index.search("20011")[0]) == 0
+
+
+def test_ranking_and_limit(index):
+    rows, scores = index.search("washington", limit=2)
+
+    assert len(rows) == 2
+    # Equal scores come back in row order
+    assert rows.tolist() == [0, 1]
+    assert (scores == EXACT_WEIGHT).all()
+
+    rows, scores = index.search("silver spring")
+    assert rows.tolist() == [2]
+    assert scores[0] == pytest.approx(2 * EXACT_WEIGHT)
+
+
+def test_empty_query_and_empty_index(index):
+    assert len(index.search("  ,. ")[0]) == 0
+
+    empty = SearchIndex.from_arrow(pa.table({column: pa.array([], pa.string()) for column in SEARCH_COLUMNS}))
+    assert len(empty) == 0
+    assert len(empty.search("washington")[0]) == 0
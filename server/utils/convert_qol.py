@@ -1,171 +1,160 @@
-import os
-import decimal
 from typing import List, Dict
-from psycopg2.extras import RealDictCursor
 from .db_connection import DatabaseConnection
+from .feature_snapshot import get_reader
+from .listing_store import ListingStore
+from .metrics import timed_query
+from .profiling import span
 
 
+# Main rental-score query; also EXPLAINed by utils.query_plan_check
+RENTAL_SCORES_SQL = """
+WITH RentalBase AS (
+  SELECT
+    rl.listing_db_id,
+    COALESCE(rl.listing_name,'')   AS name,
+    rl.formatted_address          AS address,
+    rl.latitude                     AS lat,
+    rl.longitude                    AS long,
+    COALESCE(rl.price,0)            AS price,
+    COALESCE(rl.bedrooms,0)         AS bedroom,
+    COALESCE(rl.bathrooms,0)        AS bathroom,
+    COALESCE(rl.state,'')           AS state,
+    COALESCE(aq.aqi,0)              AS "airQualityScore",
+    COALESCE(gn.nwi_score,0)        AS "walkScore",
+    COALESCE(pr.rating,0)           AS "reviewScore",
+    COALESCE(lq.qol_score,0)        AS "qolScore"
+  FROM rental_listings rl
+  LEFT JOIN listing_clusters lc    ON rl.listing_db_id = lc.listing_db_id
+  LEFT JOIN cluster_air_quality aq ON lc.cluster_id     = aq.cluster_id
+  LEFT JOIN listings_geo lg        ON rl.listing_db_id = lg.listing_db_id
+  LEFT JOIN geo_nwi gn             ON lg.geo_id         = gn.geo_id
+  LEFT JOIN place_review pr        ON rl.listing_db_id = pr.listing_id
+  LEFT JOIN listings_qol lq        ON rl.listing_db_id = lq.listing_db_id
+  WHERE rl.in_scope
+),
+NearestBus AS (
+  SELECT
+    rl.listing_db_id,
+    COALESCE(
+      ROUND((ST_Distance(rl.geog, bs.geog)/1609.34)::NUMERIC,2)
+    ,0) AS "nearestBusStopMiles"
+  FROM rental_listings rl
+  LEFT JOIN LATERAL (
+    SELECT bs.id, bs.geom, bs.geog
+    FROM bus_stops bs
+    ORDER BY rl.geom <-> bs.geom
+    LIMIT 1
+  ) bs ON TRUE
+  WHERE rl.in_scope
+),
+BusStopCount AS (
+  SELECT
+    rl.listing_db_id,
+    COUNT(DISTINCT bs.id) AS "busStopsNumber"
+  FROM rental_listings rl
+  LEFT JOIN bus_stops bs
+    ON ST_DWithin(rl.geog, bs.geog, 1609.34)
+  WHERE rl.in_scope
+  GROUP BY rl.listing_db_id
+),
+ParkCount AS (
+  SELECT
+    rl.listing_db_id,
+    COUNT(DISTINCT os.id) AS "openStreetNumber"
+  FROM rental_listings rl
+  LEFT JOIN open_street os
+    ON ST_DWithin(rl.geog, os.geog, 1609.34) AND os.leisure='park'
+  WHERE rl.in_scope
+  GROUP BY rl.listing_db_id
+),
+NearestPark AS (
+  SELECT
+    rl.listing_db_id,
+    COALESCE(
+      ROUND((ST_Distance(rl.geog, os.geog)/1609.34)::NUMERIC,2)
+    ,0) AS "nearestParkMiles"
+  FROM rental_listings rl
+  LEFT JOIN LATERAL (
+    SELECT os.id, os.geom, os.geog
+    FROM open_street os
+    WHERE os.leisure='park'
+    ORDER BY rl.geom <-> os.geom
+    LIMIT 1
+  ) os ON TRUE
+  WHERE rl.in_scope
+)
+SELECT
+  rb.listing_db_id                    AS id,
+  rb.name,
+  rb.address,
+  rb.lat,
+  rb.long,
+  rb.price,
+  rb.bedroom,
+  rb.bathroom,
+  rb.state,
+  rb."airQualityScore",
+  rb."qolScore",
+  rb."walkScore",
+  rb."reviewScore",
+  COALESCE(bsc."busStopsNumber",0)     AS "busStopsNumber",
+  COALESCE(pc."openStreetNumber",0)    AS "openStreetNumber",
+  COALESCE(nb."nearestBusStopMiles",0) AS "nearestBusStopDistance",
+  COALESCE(np."nearestParkMiles",0)    AS "nearestParkDistance"
+FROM RentalBase rb
+LEFT JOIN NearestBus nb    ON rb.listing_db_id = nb.listing_db_id
+LEFT JOIN BusStopCount bsc ON rb.listing_db_id = bsc.listing_db_id
+LEFT JOIN ParkCount pc     ON rb.listing_db_id = pc.listing_db_id
+LEFT JOIN NearestPark np   ON rb.listing_db_id = np.listing_db_id
+ORDER BY rb.listing_db_id;
+"""
+
 class QualityOfLifeConverter:
+    # Store built from the current snapshot, shared by all converters in this process
+    _snapshot_store = (None, None)
+
     def __init__(self):
         pass
 
-    def _normalize_qol_score(
-        self, score: float, min_score: float, max_score: float
-    ) -> float:
-        """Normalize a score to 0–1 scale."""
-        if max_score == min_score:
-            return 0.0
-        return (score - min_score) / (max_score - min_score)
-
-    def _convert_decimals(self, value):
-        """Convert decimal.Decimal to float for JSON serialization."""
-        return float(value) if isinstance(value, decimal.Decimal) else value
-
-    def fetch_rental_scores(self) -> List[Dict]:
-        sql_main = """
-        WITH RentalBase AS (
-          SELECT
-            rl.listing_db_id,
-            COALESCE(rl.listing_name,'')   AS name,
-            rl.formatted_address          AS address,
-            rl.latitude                     AS lat,
-            rl.longitude                    AS long,
-            COALESCE(rl.price,0)            AS price,
-            COALESCE(rl.bedrooms,0)         AS bedroom,
-            COALESCE(rl.bathrooms,0)        AS bathroom,
-            COALESCE(rl.state,'')           AS state,
-            COALESCE(aq.aqi,0)              AS "airQualityScore",
-            COALESCE(gn.nwi_score,0)        AS "walkScore",
-            COALESCE(pr.rating,0)           AS "reviewScore",
-            COALESCE(lq.qol_score,0)        AS "qolScore"
-          FROM rental_listings rl
-          LEFT JOIN listing_clusters lc    ON rl.listing_db_id = lc.listing_db_id
-          LEFT JOIN cluster_air_quality aq ON lc.cluster_id     = aq.cluster_id
-          LEFT JOIN listings_geo lg        ON rl.listing_db_id = lg.listing_db_id
-          LEFT JOIN geo_nwi gn             ON lg.geo_id         = gn.geo_id
-          LEFT JOIN place_review pr        ON rl.listing_db_id = pr.listing_id
-          LEFT JOIN listings_qol lq        ON rl.listing_db_id = lq.listing_db_id
-          WHERE rl.state IN ('DC','MD','VA')
-            AND (
-              rl.state = 'DC'
-              OR (rl.state = 'MD' AND rl.county IN ('Montgomery','Prince George''s'))
-              OR (rl.state = 'VA' AND (
-                rl.county IN ('Arlington','Fairfax','Loudoun') OR
-                rl.city   IN ('Alexandria','Fairfax','Falls Church')
-              ))
-            )
-        ),
-        NearestBus AS (
-          SELECT
-            rl.listing_db_id,
-            COALESCE(
-              ROUND((ST_Distance(rl.geom::geography, bs.geom::geography)/1609.34)::NUMERIC,2)
-            ,0) AS "nearestBusStopMiles"
-          FROM rental_listings rl
-          LEFT JOIN LATERAL (
-            SELECT bs.id, bs.geom
-            FROM bus_stops bs
-            ORDER BY rl.geom <-> bs.geom
-            LIMIT 1
-          ) bs ON TRUE
-          WHERE rl.state IN ('DC','MD','VA')
-        ),
-        BusStopCount AS (
-          SELECT
-            rl.listing_db_id,
-            COUNT(DISTINCT bs.id) AS "busStopsNumber"
-          FROM rental_listings rl
-          LEFT JOIN bus_stops bs
-            ON ST_DWithin(rl.geom, bs.geom, 0.0145)
-          WHERE rl.state IN ('DC','MD','VA')
-          GROUP BY rl.listing_db_id
-        ),
-        ParkCount AS (
-          SELECT
-            rl.listing_db_id,
-            COUNT(DISTINCT os.id) AS "openStreetNumber"
-          FROM rental_listings rl
-          LEFT JOIN open_street os
-            ON ST_DWithin(rl.geom, os.geom, 0.0145) AND os.leisure='park'
-          WHERE rl.state IN ('DC','MD','VA')
-          GROUP BY rl.listing_db_id
-        ),
-        NearestPark AS (
-          SELECT
-            rl.listing_db_id,
-            COALESCE(
-              ROUND((ST_Distance(rl.geom::geography, os.geom::geography)/1609.34)::NUMERIC,2)
-            ,0) AS "nearestParkMiles"
-          FROM rental_listings rl
-          LEFT JOIN LATERAL (
-            SELECT os.id, os.geom
-            FROM open_street os
-            WHERE os.leisure='park'
-            ORDER BY rl.geom <-> os.geom
-            LIMIT 1
-          ) os ON TRUE
-          WHERE rl.state IN ('DC','MD','VA')
-        )
-        SELECT
-          rb.listing_db_id                    AS id,
-          rb.name,
-          rb.address,
-          rb.lat,
-          rb.long,
-          rb.price,
-          rb.bedroom,
-          rb.bathroom,
-          rb.state,
-          rb."airQualityScore",
-          rb."qolScore",
-          rb."walkScore",
-          rb."reviewScore",
-          COALESCE(bsc."busStopsNumber",0)     AS "busStopsNumber",
-          COALESCE(pc."openStreetNumber",0)    AS "openStreetNumber",
-          COALESCE(nb."nearestBusStopMiles",0) AS "nearestBusStopDistance",
-          COALESCE(np."nearestParkMiles",0)    AS "nearestParkDistance"
-        FROM RentalBase rb
-        LEFT JOIN NearestBus nb    ON rb.listing_db_id = nb.listing_db_id
-        LEFT JOIN BusStopCount bsc ON rb.listing_db_id = bsc.listing_db_id
-        LEFT JOIN ParkCount pc     ON rb.listing_db_id = pc.listing_db_id
-        LEFT JOIN NearestPark np   ON rb.listing_db_id = np.listing_db_id
-        ORDER BY rb.listing_db_id;
-        """
+    def fetch_listing_store(self) -> ListingStore:
+        # Serve from the feature snapshot when one is published
+        snapshot = get_reader().current()
+        if snapshot is not None:
+            version, store = QualityOfLifeConverter._snapshot_store
+            if version != snapshot.manifest["version"]:
+                with span("snapshot_to_store"):
+                    store = ListingStore.from_arrow(snapshot.table)
+                QualityOfLifeConverter._snapshot_store = (snapshot.manifest["version"], store)
+            return store
 
         try:
-            # 1) Open connection + real‐dict cursor
+            # 1) Open connection + plain cursor; rows go straight into columns
             with DatabaseConnection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                    # 2) Fetch min/max QoL with distinct aliases
-                    cur.execute(
+                with conn.cursor() as cur:
+                    # 2) Fetch min/max QoL
+                    bounds = timed_query(
+                        cur,
+                        "qol_min_max",
                         "SELECT "
                         "COALESCE(MIN(qol_score),0) AS min_qol, "
                         "COALESCE(MAX(qol_score),1) AS max_qol "
-                        "FROM listings_qol WHERE qol_score IS NOT NULL;"
+                        "FROM listings_qol WHERE qol_score IS NOT NULL;",
+                        one=True,
                     )
-                    row = cur.fetchone()
-                    min_qol, max_qol = float(row["min_qol"]), float(row["max_qol"])
+                    min_qol, max_qol = (float(value) for value in bounds)
 
                     # 3) Execute main rental‐score query
-                    cur.execute(sql_main)
-                    records: List[Dict] = cur.fetchall()
+                    rows = timed_query(cur, "rental_scores", RENTAL_SCORES_SQL)
+                    columns = [column.name for column in cur.description]
 
-            # 4) Post‐process each record
-            for rec in records:
-                # decimal → float
-                for k, v in rec.items():
-                    rec[k] = self._convert_decimals(v)
-                # normalize QoL
-                rec["qolScore"] = round(
-                    (
-                        self._normalize_qol_score(
-                            rec.get("qolScore", 0), min_qol, max_qol
-                        )
-                    )
-                    * 100,
-                    2,
-                )
-            return records
+            # 4) Decimal → float and QoL normalization happen column-wise
+            with span("decimal_conversion"):
+                return ListingStore.from_rows(columns, rows, min_qol, max_qol)
 
         except Exception as e:
             raise RuntimeError(f"Failed to fetch or process data: {e}")
+
+    def fetch_rental_scores(self) -> List[Dict]:
+        store = self.fetch_listing_store()
+        with span("to_records"):
+            return store.to_records()
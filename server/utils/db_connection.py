@@ -2,8 +2,12 @@ import os
 import psycopg2
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv
+import time
 import logging
 
+from .profiling import span
+from .metrics import DB_CONNECT_DURATION, DB_CONNECTION_ERRORS, DB_CONNECTIONS_OPEN, DB_CONNECTIONS_OPENED
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 class DatabaseConnection:
@@ -21,21 +25,28 @@ class DatabaseConnection:
             raise ValueError("Database connection parameters are not set in the environment variables.")
 
     def __enter__(self):
+        started = time.perf_counter()
         try:
-            self.__connection = psycopg2.connect(
-                host=self.db_host,
-                database=self.db_name,
-                user=self.db_user,
-                password=self.db_password,
-                port=self.db_port
-
-            )
+            with span("db_acquire"):
+                self.__connection = psycopg2.connect(
+                    host=self.db_host,
+                    database=self.db_name,
+                    user=self.db_user,
+                    password=self.db_password,
+                    port=self.db_port
+
+                )
+            DB_CONNECT_DURATION.observe(time.perf_counter() - started)
+            DB_CONNECTIONS_OPENED.inc()
+            DB_CONNECTIONS_OPEN.inc()
             return self.__connection
 
         except psycopg2.OperationalError as e:
+            DB_CONNECTION_ERRORS.inc()
             logging.error(f"Database connection error: {e}")
             raise
         except Exception as e:
+            DB_CONNECTION_ERRORS.inc()
             logging.error(f"An unexpected error occurred: {e}")
             raise
 
@@ -53,6 +64,7 @@ class DatabaseConnection:
             finally:
                 try:
                     self.__connection.close()
+                    DB_CONNECTIONS_OPEN.dec()
                     logging.info("Database connection closed.")
                 except psycopg2.Error as e:
                     logging.error(f"Error closing the database connection: {e}")
@@ -0,0 +1,460 @@
+"""
+Versioned, column-typed snapshot of every in-scope listing's features.
+
+The snapshot is an uncompressed Arrow IPC file plus a ``manifest.json``
+naming the current file. Readers memory-map the file, so loading it is
+zero-copy and takes milliseconds; writers publish a new version with an
+atomic rename and then swap the manifest, so a reader always sees one
+complete, consistent version.
+
+The server, the QoL job and the Streamlit dashboard all read the same
+snapshot (the latter two import this module with the repository root on
+``sys.path``). Server workers map the same file, so the listing data sits
+once in the page cache however many workers there are; only the worker
+holding the refresher lock rebuilds it, the others pick up new versions
+from the manifest.
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+
+from .metrics import timed_query
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only, no locking
+    fcntl = None
+
+# Bump when columns are added, removed or change type
+SCHEMA_VERSION = 5
+
+SNAPSHOT_SCHEMA = pa.schema(
+    [
+        pa.field("listing_db_id", pa.int32(), nullable=False),
+        pa.field("listing_name", pa.string()),
+        pa.field("address", pa.string()),
+        pa.field("city", pa.string()),
+        pa.field("county", pa.string()),
+        pa.field("state", pa.string()),
+        pa.field("zip_code", pa.string()),
+        pa.field("region_id", pa.int32()),
+        pa.field("latitude", pa.float64(), nullable=False),
+        pa.field("longitude", pa.float64(), nullable=False),
+        pa.field("price", pa.int32()),
+        pa.field("bedrooms", pa.int32()),
+        pa.field("bathrooms", pa.float64()),
+        pa.field("cluster_id", pa.int32()),
+        pa.field("aqi", pa.int32()),
+        pa.field("nwi_score", pa.float64()),
+        pa.field("review_score", pa.float64()),
+        pa.field("nearest_bus_stop_miles", pa.float64()),
+        pa.field("nearby_bus_stops", pa.int32()),
+        pa.field("nearby_bus_stop_names", pa.string()),
+        pa.field("nearby_routes", pa.int32()),
+        pa.field("nearby_route_names", pa.string()),
+        pa.field("nearby_parks", pa.int32()),
+        pa.field("nearby_park_names", pa.string()),
+        pa.field("nearest_park_miles", pa.float64()),
+        pa.field("crime_density", pa.float64()),
+        pa.field("violent_crime_density", pa.float64()),
+        pa.field("qol_score", pa.float64()),
+    ]
+)
+
+MANIFEST_NAME = "manifest.json"
+PUBLISH_LOCK_NAME = "publish.lock"
+REFRESHER_LOCK_NAME = "refresher.lock"
+
+# Older files are kept for readers that still have them mapped
+KEEP_VERSIONS = 3
+
+# Listings are partitioned by id range so readers can tell which ranges changed between versions
+PARTITION_ID_SPAN = 1000
+
+FEATURES_SQL = """
+WITH base AS (
+  SELECT DISTINCT ON (rl.listing_db_id)
+    rl.listing_db_id,
+    rl.listing_name,
+    rl.formatted_address           AS address,
+    rl.city,
+    rl.county,
+    rl.state,
+    rl.zip_code,
+    rl.region_id,
+    rl.latitude,
+    rl.longitude,
+    rl.price,
+    rl.bedrooms,
+    rl.bathrooms::double precision AS bathrooms,
+    lc.cluster_id,
+    aq.aqi,
+    gn.nwi_score::double precision AS nwi_score,
+    pr.rating::double precision    AS review_score,
+    {crime_columns},
+    {route_columns},
+    {qol_column}                   AS qol_score,
+    rl.geom,
+    rl.geog
+  FROM rental_listings rl
+  LEFT JOIN listing_clusters lc    ON rl.listing_db_id = lc.listing_db_id
+  LEFT JOIN cluster_air_quality aq ON lc.cluster_id     = aq.cluster_id
+  LEFT JOIN listings_geo lg        ON rl.listing_db_id = lg.listing_db_id
+  LEFT JOIN geo_nwi gn             ON lg.geo_id         = gn.geo_id
+  LEFT JOIN place_review pr        ON rl.listing_db_id = pr.listing_id
+  {crime_join}
+  {route_join}
+  {qol_join}
+  WHERE rl.in_scope
+  -- One row per listing: the newest air quality, tract and review rows win
+  ORDER BY rl.listing_db_id, aq.aq_id DESC NULLS LAST, lg.assignment_id DESC NULLS LAST, pr.id DESC NULLS LAST
+)
+SELECT
+  b.listing_db_id, b.listing_name, b.address, b.city, b.county, b.state, b.zip_code, b.region_id,
+  b.latitude, b.longitude, b.price, b.bedrooms, b.bathrooms,
+  b.cluster_id, b.aqi, b.nwi_score, b.review_score,
+  nb.nearest_bus_stop_miles, bsc.nearby_bus_stops, bsc.nearby_bus_stop_names,
+  b.nearby_routes, b.nearby_route_names,
+  pc.nearby_parks, pc.nearby_park_names, np.nearest_park_miles,
+  b.crime_density, b.violent_crime_density,
+  b.qol_score
+FROM base b
+LEFT JOIN LATERAL (
+  SELECT ROUND((ST_Distance(b.geog, bs.geog) / 1609.34)::numeric, 2)::double precision AS nearest_bus_stop_miles
+  FROM bus_stops bs
+  ORDER BY b.geom <-> bs.geom
+  LIMIT 1
+) nb ON TRUE
+LEFT JOIN LATERAL (
+  SELECT COUNT(*)::integer AS nearby_bus_stops, STRING_AGG(bs.name, ', ') AS nearby_bus_stop_names
+  FROM bus_stops bs
+  WHERE ST_DWithin(b.geog, bs.geog, 1609.34)
+) bsc ON TRUE
+LEFT JOIN LATERAL (
+  SELECT COUNT(*)::integer AS nearby_parks, STRING_AGG(os.name, ', ') AS nearby_park_names
+  FROM open_street os
+  WHERE os.leisure = 'park' AND ST_DWithin(b.geog, os.geog, 1609.34)
+) pc ON TRUE
+LEFT JOIN LATERAL (
+  SELECT ROUND((ST_Distance(b.geog, os.geog) / 1609.34)::numeric, 2)::double precision AS nearest_park_miles
+  FROM open_street os
+  WHERE os.leisure = 'park'
+  ORDER BY b.geom <-> os.geom
+  LIMIT 1
+) np ON TRUE
+ORDER BY b.listing_db_id;
+"""
+
+# Routes within reach, nearest first, from the transit routes job
+ROUTES_JOIN = """LEFT JOIN (
+    SELECT listing_db_id, COUNT(*)::integer AS nearby_routes,
+           STRING_AGG(line, ', ' ORDER BY distance_miles, line) AS nearby_route_names
+    FROM listing_transit_routes
+    GROUP BY listing_db_id
+  ) tr ON rl.listing_db_id = tr.listing_db_id"""
+
+
+class Snapshot(NamedTuple):
+    table: pa.Table
+    manifest: Dict
+
+
+def snapshot_dir() -> str:
+    """Snapshot directory: ``FEATURE_SNAPSHOT_DIR`` or ``<repo>/snapshots``."""
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "snapshots")
+    return os.path.abspath(os.getenv("FEATURE_SNAPSHOT_DIR", default))
+
+
+def build_feature_table(conn) -> pa.Table:
+    """Run ``FEATURES_SQL`` on a psycopg2 connection and return it as a typed table."""
+    with conn.cursor() as cur:
+        # listings_qol, listing_crime_density and listing_transit_routes are created by jobs that need a snapshot first
+        cur.execute(
+            "SELECT to_regclass('public.listings_qol') IS NOT NULL, "
+            "to_regclass('public.listing_crime_density') IS NOT NULL, "
+            "to_regclass('public.listing_transit_routes') IS NOT NULL;"
+        )
+        has_qol, has_crime, has_routes = cur.fetchone()
+        rows = timed_query(
+            cur,
+            "feature_snapshot",
+            FEATURES_SQL.format(
+                qol_column="lq.qol_score::double precision" if has_qol else "NULL::double precision",
+                qol_join="LEFT JOIN listings_qol lq ON rl.listing_db_id = lq.listing_db_id" if has_qol else "",
+                crime_columns=(
+                    "cd.crime_density, cd.violent_crime_density"
+                    if has_crime
+                    else "NULL::double precision AS crime_density, NULL::double precision AS violent_crime_density"
+                ),
+                crime_join=(
+                    "LEFT JOIN listing_crime_density cd ON rl.listing_db_id = cd.listing_db_id" if has_crime else ""
+                ),
+                route_columns=(
+                    "COALESCE(tr.nearby_routes, 0) AS nearby_routes, tr.nearby_route_names"
+                    if has_routes
+                    else "NULL::integer AS nearby_routes, NULL::text AS nearby_route_names"
+                ),
+                route_join=ROUTES_JOIN if has_routes else "",
+            ),
+        )
+
+    columns = list(zip(*rows)) if rows else [[] for _ in SNAPSHOT_SCHEMA]
+    arrays = [pa.array(column, type=field.type) for column, field in zip(columns, SNAPSHOT_SCHEMA)]
+    return pa.Table.from_arrays(arrays, schema=SNAPSHOT_SCHEMA)
+
+
+def _write_json_atomic(path: str, payload: Dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_manifest(directory: Optional[str] = None) -> Optional[Dict]:
+    """The current manifest, or None when no snapshot has been published."""
+    path = os.path.join(directory or snapshot_dir(), MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _publish_lock(directory: str):
+    """Serialize writers (server refresher, QoL job, CLI) so versions are never reused."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, PUBLISH_LOCK_NAME), "a+") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def try_acquire_refresher_lock(directory: Optional[str] = None):
+    """
+    Non-blocking attempt to become the one process that refreshes the snapshot.
+
+    Returns the open lock file (keep it open to stay the refresher; the OS
+    releases it when the process exits) or None if another process holds it.
+    """
+    directory = directory or snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(os.path.join(directory, REFRESHER_LOCK_NAME), "a+")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def _partitions(table: pa.Table, span: int = PARTITION_ID_SPAN) -> List[Dict]:
+    """
+    Manifest entries of ``table`` (sorted by id) split into id ranges of ``span``.
+
+    Each entry has the range, its row offset and count, and a hash of the
+    rows' Arrow data, which stays the same while the range is unchanged.
+    """
+    ids = table.column("listing_db_id").to_numpy()
+    if not len(ids):
+        return []
+    buckets = ids // span
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.append(starts[1:], len(ids))
+    partitions = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table.slice(start, end - start))
+        bucket = int(buckets[start])
+        partitions.append({
+            "id_from": bucket * span,
+            "id_to": (bucket + 1) * span - 1,
+            "offset": start,
+            "rows": end - start,
+            "hash": hashlib.blake2b(sink.getvalue(), digest_size=16).hexdigest(),
+        })
+    return partitions
+
+
+def partition_slices(snapshot: Snapshot) -> List[Tuple[Dict, pa.Table]]:
+    """
+    (manifest entry, zero-copy slice) per partition of ``snapshot``.
+
+    Snapshots published before partitioning come back as one partition
+    without a hash.
+    """
+    partitions = snapshot.manifest.get("partitions")
+    if partitions is None:
+        return [({"offset": 0, "rows": snapshot.table.num_rows, "hash": None}, snapshot.table)]
+    return [(entry, snapshot.table.slice(entry["offset"], entry["rows"])) for entry in partitions]
+
+
+def _prune(directory: str, current_version: int, keep: int):
+    for filename in os.listdir(directory):
+        if not (filename.startswith("features-v") and filename.endswith(".arrow")):
+            continue
+        version = int(filename[len("features-v") : -len(".arrow")])
+        if version <= current_version - keep:
+            os.remove(os.path.join(directory, filename))
+
+
+def write_snapshot(
+    table: pa.Table,
+    directory: Optional[str] = None,
+    metadata: Optional[Dict] = None,
+    keep: int = KEEP_VERSIONS,
+) -> Dict:
+    """
+    Publish ``table`` as the next snapshot version.
+
+    Args:
+        table (pa.Table): Features matching ``SNAPSHOT_SCHEMA``.
+        directory (str): Snapshot directory (default: ``snapshot_dir()``).
+        metadata (dict): Extra fields recorded in the manifest.
+        keep (int): Number of versions kept on disk.
+
+    Returns:
+        dict: The new manifest.
+    """
+    directory = directory or snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    # One record batch sorted by id: readers binary-search a zero-copy view of the ids
+    table = table.select(SNAPSHOT_SCHEMA.names).cast(SNAPSHOT_SCHEMA)
+    table = table.sort_by("listing_db_id").combine_chunks()
+    partitions = _partitions(table)
+
+    with _publish_lock(directory):
+        previous = read_manifest(directory)
+        version = previous["version"] + 1 if previous else 1
+        filename = f"features-v{version:06d}.arrow"
+        path = os.path.join(directory, filename)
+
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+        os.replace(tmp_path, path)
+
+        manifest = {
+            "format": "arrow-ipc",
+            "schema_version": SCHEMA_VERSION,
+            "version": version,
+            "file": filename,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "num_rows": table.num_rows,
+            "partition_id_span": PARTITION_ID_SPAN,
+            "partitions": partitions,
+            **(metadata or {}),
+        }
+        _write_json_atomic(os.path.join(directory, MANIFEST_NAME), manifest)
+        _prune(directory, version, keep)
+    logging.info(f"Published feature snapshot v{version} ({table.num_rows} listings) to {directory}")
+    return manifest
+
+
+def open_snapshot(directory: Optional[str] = None) -> Optional[Snapshot]:
+    """Memory-map the current snapshot; None when there is none."""
+    directory = directory or snapshot_dir()
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    if manifest.get("schema_version") != SCHEMA_VERSION:
+        logging.warning(
+            f"Feature snapshot schema v{manifest.get('schema_version')} does not match v{SCHEMA_VERSION}; ignoring it."
+        )
+        return None
+    source = pa.memory_map(os.path.join(directory, manifest["file"]), "r")
+    table = pa.ipc.open_file(source).read_all()
+    return Snapshot(table, manifest)
+
+
+def build_snapshot(directory: Optional[str] = None, source: str = "postgres") -> Dict:
+    """Compute all listing features in Postgres and publish them as a new snapshot."""
+    # Imported here so snapshot readers do not need database drivers
+    from .db_connection import DatabaseConnection
+
+    started = time.perf_counter()
+    with DatabaseConnection() as conn:
+        table = build_feature_table(conn)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return write_snapshot(table, directory, metadata={"source": source, "build_ms": round(elapsed_ms, 1)})
+
+
+class SnapshotReader:
+    """Keeps the current snapshot mapped and re-maps it when the manifest changes."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or snapshot_dir()
+        self._snapshot: Optional[Snapshot] = None
+        self._manifest_mtime: Optional[float] = None
+        self._ids: np.ndarray = np.empty(0, dtype=np.int32)
+
+    def current(self) -> Optional[Snapshot]:
+        try:
+            mtime = os.stat(os.path.join(self.directory, MANIFEST_NAME)).st_mtime_ns
+        except FileNotFoundError:
+            return self._snapshot
+        if mtime != self._manifest_mtime:
+            snapshot = open_snapshot(self.directory)
+            if snapshot is not None:
+                ids = snapshot.table.column("listing_db_id")
+                # View into the mapped file, shared by every worker
+                self._ids = ids.chunk(0).to_numpy() if ids.num_chunks == 1 else ids.to_numpy()
+                self._snapshot = snapshot
+            self._manifest_mtime = mtime
+        return self._snapshot
+
+    def lookup(self, listing_db_id, column: str) -> Tuple[bool, Any]:
+        """(found, value) of ``column`` for one listing in the current snapshot."""
+        snapshot = self.current()
+        if snapshot is None:
+            return False, None
+        try:
+            listing_db_id = int(listing_db_id)
+        except (TypeError, ValueError):
+            return False, None
+        position = int(np.searchsorted(self._ids, listing_db_id))
+        if position >= len(self._ids) or self._ids[position] != listing_db_id:
+            return False, None
+        return True, snapshot.table.column(column)[position].as_py()
+
+
+_reader: Optional[SnapshotReader] = None
+
+
+def get_reader() -> SnapshotReader:
+    """Process-wide reader shared by the routes."""
+    global _reader
+    if _reader is None:
+        _reader = SnapshotReader()
+    return _reader
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the listing feature snapshot from Postgres.")
+    parser.add_argument("--dir", default=snapshot_dir(), help="Snapshot directory.")
+    args = parser.parse_args()
+    build_snapshot(args.dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Struct-of-arrays store of the listings served by the rental score API.
+
+Numeric fields are NumPy columns and the free-text fields are interned:
+one code array per field plus a table of the distinct strings. Missing
+values are filled, QoL is normalized and rounded with whole-column
+operations, and ``ListingRow`` views produce the per-listing dicts only
+when a response is serialized.
+
+Built from a snapshot, null-free numeric columns are views of the mapped
+file, shared by every worker; filled columns, the normalized QoL and the
+string tables are per-process copies (``nbytes``).
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# API field -> (dtype, value used when missing), in response order. Integer dtypes match the
+# snapshot's int32 columns, so those columns can be served straight from the mapped file.
+NUMERIC_FIELDS: Dict[str, Tuple[type, Optional[float]]] = {
+    "id": (np.int32, None),
+    "lat": (np.float64, None),
+    "long": (np.float64, None),
+    "price": (np.float64, 0),
+    "bedroom": (np.float64, 0),
+    "bathroom": (np.float64, 0),
+    "airQualityScore": (np.float64, 0),
+    "qolScore": (np.float64, 0),
+    "walkScore": (np.float64, 0),
+    "reviewScore": (np.float64, 0),
+    "busStopsNumber": (np.int32, 0),
+    "openStreetNumber": (np.int32, 0),
+    "nearestBusStopDistance": (np.float64, 0),
+    "nearestParkDistance": (np.float64, 0),
+}
+
+# API field -> value used when missing
+STRING_FIELDS: Dict[str, Optional[str]] = {
+    "name": "",
+    "address": None,
+    "state": "",
+}
+
+# API field -> feature snapshot column
+SNAPSHOT_COLUMNS = {
+    "id": "listing_db_id",
+    "name": "listing_name",
+    "address": "address",
+    "lat": "latitude",
+    "long": "longitude",
+    "price": "price",
+    "bedroom": "bedrooms",
+    "bathroom": "bathrooms",
+    "state": "state",
+    "airQualityScore": "aqi",
+    "walkScore": "nwi_score",
+    "reviewScore": "review_score",
+    "qolScore": "qol_score",
+    "busStopsNumber": "nearby_bus_stops",
+    "openStreetNumber": "nearby_parks",
+    "nearestBusStopDistance": "nearest_bus_stop_miles",
+    "nearestParkDistance": "nearest_park_miles",
+}
+
+
+def normalize_scores(scores: np.ndarray, min_score: float, max_score: float) -> np.ndarray:
+    """Scale scores to 0-100 between ``min_score`` and ``max_score``, rounded to 2 decimals."""
+    if max_score == min_score:
+        return np.zeros_like(scores, dtype=np.float64)
+    return np.round((scores - min_score) / (max_score - min_score) * 100, 2)
+
+
+def _shareable(column: pa.ChunkedArray, dtype: type) -> bool:
+    """True when ``column`` can be used as a ``dtype`` array without copying it."""
+    return not column.null_count and column.num_chunks == 1 and column.type == pa.from_numpy_dtype(dtype)
+
+
+def _numeric_column(column: pa.ChunkedArray, dtype: type, default: Optional[float]) -> np.ndarray:
+    """
+    ``column`` as a ``dtype`` array: a read-only view of the (memory-mapped)
+    Arrow buffer when it is shareable, otherwise a filled and converted copy.
+    """
+    if _shareable(column, dtype):
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    if default is not None and column.null_count:
+        column = pc.fill_null(column, default)
+    return column.to_numpy().astype(dtype, copy=True)
+
+
+def _intern(values: pa.Array, default: Optional[str]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """(codes, table) for a string column; missing values map to ``default``."""
+    encoded = pc.fill_null(values, default).dictionary_encode() if default is not None else values.dictionary_encode()
+    indices = encoded.indices
+    table = encoded.dictionary.to_pylist()
+    if indices.null_count:
+        # Only a None default leaves nulls; they get their own table entry
+        table.append(None)
+        indices = pc.fill_null(indices, len(table) - 1)
+    return indices.to_numpy(zero_copy_only=False).astype(np.int32, copy=False), table
+
+
+class ListingRow:
+    """Read-only view of one listing in a ``ListingStore``."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "ListingStore", index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, field: str):
+        store = self._store
+        if field in store.numeric:
+            return store.numeric[field][self._index].item()
+        codes, table = store.strings[field]
+        return table[codes[self._index]]
+
+    def as_dict(self) -> Dict:
+        return {field: self[field] for field in self._store.fields}
+
+
+class ListingStore:
+    """Listings as NumPy columns plus interned string tables."""
+
+    def __init__(
+        self,
+        numeric: Dict[str, np.ndarray],
+        strings: Dict[str, Tuple[np.ndarray, List[Optional[str]]]],
+        shared: Sequence[str] = (),
+    ):
+        self.numeric = numeric
+        self.strings = strings
+        # Numeric fields that are views of the snapshot file rather than copies
+        self.shared = frozenset(shared)
+        self.fields = [*SNAPSHOT_COLUMNS]
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> "ListingStore":
+        """Build from a feature snapshot table; QoL is normalized over the snapshot."""
+        numeric = {
+            field: _numeric_column(table.column(SNAPSHOT_COLUMNS[field]), dtype, default)
+            for field, (dtype, default) in NUMERIC_FIELDS.items()
+        }
+        # The normalized QoL below is computed, never a view
+        shared = [
+            field for field, (dtype, _) in NUMERIC_FIELDS.items()
+            if field != "qolScore" and _shareable(table.column(SNAPSHOT_COLUMNS[field]), dtype)
+        ]
+
+        bounds = pc.min_max(table.column("qol_score")).as_py()
+        min_qol = bounds["min"] if bounds["min"] is not None else 0.0
+        max_qol = bounds["max"] if bounds["max"] is not None else 1.0
+        numeric["qolScore"] = normalize_scores(numeric["qolScore"], min_qol, max_qol)
+
+        strings = {
+            field: _intern(table.column(SNAPSHOT_COLUMNS[field]).combine_chunks(), default)
+            for field, default in STRING_FIELDS.items()
+        }
+        return cls(numeric, strings, shared)
+
+    @classmethod
+    def from_rows(
+        cls, columns: Sequence[str], rows: Sequence[tuple], min_qol: float, max_qol: float
+    ) -> "ListingStore":
+        """Build from ``RENTAL_SCORES_SQL`` result tuples (Decimals included)."""
+        values = dict(zip(columns, zip(*rows))) if rows else {column: () for column in columns}
+        numeric = {}
+        for field, (dtype, default) in NUMERIC_FIELDS.items():
+            column = np.array(values[field], dtype=np.float64)
+            if default is not None:
+                column[np.isnan(column)] = default
+            numeric[field] = column.astype(dtype, copy=False)
+        numeric["qolScore"] = normalize_scores(numeric["qolScore"], min_qol, max_qol)
+
+        strings = {
+            field: _intern(pa.array(values[field], type=pa.string()), default)
+            for field, default in STRING_FIELDS.items()
+        }
+        return cls(numeric, strings)
+
+    def __len__(self) -> int:
+        return len(self.numeric["id"])
+
+    def __iter__(self) -> Iterator[ListingRow]:
+        return (ListingRow(self, index) for index in range(len(self)))
+
+    def row(self, index: int) -> ListingRow:
+        return ListingRow(self, index)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by this process: columns copied out of the snapshot and the string tables."""
+        total = sum(column.nbytes for field, column in self.numeric.items() if field not in self.shared)
+        for codes, table in self.strings.values():
+            total += codes.nbytes + sum(len(value) for value in table if value is not None)
+        return total
+
+    def to_records(self) -> List[Dict]:
+        """All listings as dicts, built column-wise for serialization."""
+        columns = []
+        for field in self.fields:
+            if field in self.numeric:
+                columns.append(self.numeric[field].tolist())
+            else:
+                codes, table = self.strings[field]
+                columns.append(np.asarray(table, dtype=object)[codes].tolist())
+        return [dict(zip(self.fields, values)) for values in zip(*columns)]
@@ -0,0 +1,205 @@
+"""
+In-process metrics rendered in the Prometheus text format at ``/metrics``.
+
+Counters, gauges and histograms are kept per worker process; with several
+workers each scrape reports the worker that answered it. Route latency is
+labelled with the route template (not the raw path) to keep label values
+bounded.
+
+Nothing here imports fastapi, so the scripts can use ``timed_query``
+through the snapshot module; the response cache stats are rendered by the
+``/metrics`` route.
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Dict, Iterable, List, Sequence, Tuple
+
+from .profiling import capture_slow_query, span
+
+if TYPE_CHECKING:
+    from fastapi import Request
+
+# Seconds; covers snapshot hits through cold rental-score CTEs
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Bytes; from a single amenity list up to the full rental-score payload
+PAYLOAD_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: Tuple, value) -> Iterable[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {format_value(value)}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key: Tuple, value) -> Iterable[str]:
+        counts, total, count = value
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+            cumulative += bucket_count
+            le = f'le="{format_value(float(bound))}"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+        yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {format_value(total)}"
+        yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+REGISTRY: List[_Metric] = []
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route template, method and status.",
+    ("route", "method", "status"),
+)
+RESPONSE_BYTES = Histogram(
+    "http_response_size_bytes", "Serialized response payload size by route template.",
+    ("route",), buckets=PAYLOAD_BUCKETS,
+)
+SQL_DURATION = Histogram(
+    "sql_query_duration_seconds", "Execution plus fetch time of named SQL queries.", ("query",),
+)
+SQL_ROWS = Counter("sql_rows_returned_total", "Rows returned by named SQL queries.", ("query",))
+SQL_ERRORS = Counter("sql_query_errors_total", "Named SQL queries that raised.", ("query",))
+DB_CONNECT_DURATION = Histogram("db_connect_duration_seconds", "Time to open a Postgres connection.")
+DB_CONNECTIONS_OPENED = Counter("db_connections_opened_total", "Postgres connections opened.")
+DB_CONNECTION_ERRORS = Counter("db_connection_errors_total", "Failed attempts to open a Postgres connection.")
+DB_CONNECTIONS_OPEN = Gauge("db_connections_open", "Postgres connections currently open.")
+
+
+def timed_query(cur, name: str, sql: str, params=None, one: bool = False):
+    """
+    Execute ``sql`` on ``cur`` and fetch its result, recorded under ``name``.
+
+    Returns ``cur.fetchone()`` when ``one`` is set, otherwise ``cur.fetchall()``.
+    """
+    started = time.perf_counter()
+    try:
+        with span(f"query:{name}"):
+            cur.execute(sql, params)
+            result = cur.fetchone() if one else cur.fetchall()
+    except Exception:
+        SQL_ERRORS.inc(query=name)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        SQL_DURATION.observe(duration, query=name)
+    SQL_ROWS.inc((result is not None) if one else len(result), query=name)
+    capture_slow_query(cur, name, sql, params, duration * 1000)
+    return result
+
+
+def render_metrics(extra: Iterable[str] = ()) -> str:
+    """Every registered metric, then ``extra`` lines rendered by the caller."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(extra)
+    return "\n".join(lines) + "\n"
+
+
+def _route_template(request: "Request") -> str:
+    route = request.scope.get("route")
+    # Unmatched paths share one label so scanners cannot blow up cardinality
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def record_request_metrics(request: "Request", call_next):
+    """HTTP middleware: latency per route/method/status and response payload size."""
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        REQUEST_DURATION.observe(
+            time.perf_counter() - started, route=_route_template(request), method=request.method, status=500
+        )
+        raise
+    route = _route_template(request)
+    REQUEST_DURATION.observe(
+        time.perf_counter() - started, route=route, method=request.method, status=response.status_code
+    )
+    length = response.headers.get("content-length")
+    if length:
+        RESPONSE_BYTES.observe(int(length), route=route)
+    return response
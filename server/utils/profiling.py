@@ -0,0 +1,308 @@
+"""
+Opt-in request profiling and slow-query capture.
+
+With ``PROFILE_SAMPLE_RATE`` above zero, that fraction of requests is
+profiled: a sampler thread records the Python stacks of the request's
+thread, and of worker threads while they run one of its spans, every
+``PROFILE_INTERVAL_MS`` while the request is in flight, and ``span()``
+blocks record named timings (DB acquire, query, decimal conversion,
+validation, serialization). Each profiled request is written to
+``PROFILE_DIR`` as ``<id>.folded`` (collapsed stacks for flamegraph.pl or
+speedscope) and ``<id>.json`` (spans and request details).
+
+With ``SLOW_QUERY_MS`` above zero, the plan of a named query slower than
+that is captured with a plain ``EXPLAIN`` (planned, not re-run, so the
+slow request is not slowed further), at most once per query name every
+``SLOW_QUERY_COOLDOWN_S``, and saved under ``PROFILE_DIR/slow-queries``.
+Both are off by default.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from fastapi import Request
+
+# Fraction of requests to profile (0 disables)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# Stack sampling interval for profiled requests
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+# Queries slower than this get their plan captured (0 disables)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+
+# Minimum seconds between two captured plans of the same query
+SLOW_QUERY_COOLDOWN_S = float(os.getenv("SLOW_QUERY_COOLDOWN_S", "60"))
+
+# Most recent files kept per kind before older ones are pruned
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+
+SLOW_QUERY_SUBDIR = "slow-queries"
+
+# Debugging and scrape endpoints are never profiled
+UNPROFILED_PREFIXES = ("/api/admin", "/metrics")
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+_slow_query_lock = threading.Lock()
+# Query name -> monotonic time of its last captured plan
+_slow_query_captured: Dict[str, float] = {}
+
+
+def profile_dir() -> str:
+    """Profile directory: ``PROFILE_DIR`` or ``<repo>/profiles``."""
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "profiles")
+    return os.path.abspath(os.getenv("PROFILE_DIR", default))
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str):
+        self.profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.spans: List[Dict] = []
+        # The thread serving the request, then worker threads by open span count
+        self.thread_id = threading.get_ident()
+        self._threads: Counter = Counter()
+        self._threads_lock = threading.Lock()
+
+    def enter_thread(self):
+        with self._threads_lock:
+            self._threads[threading.get_ident()] += 1
+
+    def leave_thread(self):
+        with self._threads_lock:
+            thread_id = threading.get_ident()
+            self._threads[thread_id] -= 1
+            if self._threads[thread_id] <= 0:
+                del self._threads[thread_id]
+
+    def thread_ids(self) -> set:
+        """Threads currently working for this request."""
+        with self._threads_lock:
+            return {self.thread_id, *self._threads}
+
+    def add_span(self, name: str, started: float, ended: float):
+        # Spans may be added from worker threads; list.append is atomic
+        self.spans.append({
+            "name": name,
+            "start_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round((ended - started) * 1000, 3),
+            "thread": threading.current_thread().name,
+        })
+
+
+@contextmanager
+def span(name: str):
+    """Time the block as ``name`` in the current request profile, if any."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    # Worker threads (asyncio.to_thread) are sampled while they run the span
+    profile.enter_thread()
+    try:
+        yield
+    finally:
+        profile.leave_thread()
+        profile.add_span(name, started, time.perf_counter())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """Counts the collapsed Python stacks of one request's threads at a fixed interval."""
+
+    def __init__(self, interval: float, profile: RequestProfile):
+        self.interval = interval
+        self.profile = profile
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def _run(self):
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            thread_ids = self.profile.thread_ids()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in thread_ids:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.counts[";".join(reversed(stack))] += 1
+
+
+def _prune(directory: str, suffix: str, keep: int):
+    files = sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+    for name in files[:-keep] if keep > 0 else []:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def _write_profile(profile: RequestProfile, stacks: Counter, status: int, duration_ms: float):
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, profile.profile_id)
+    with open(f"{base}.folded", "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    with open(f"{base}.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "profile_id": profile.profile_id,
+            "method": profile.method,
+            "path": profile.path,
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "samples": sum(stacks.values()),
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "spans": sorted(profile.spans, key=lambda s: s["start_ms"]),
+        }, f, indent=2)
+    _prune(directory, ".folded", PROFILE_KEEP)
+    _prune(directory, ".json", PROFILE_KEEP)
+
+
+async def profile_requests(request: "Request", call_next):
+    """HTTP middleware: profile a ``PROFILE_SAMPLE_RATE`` fraction of requests."""
+    if (
+        PROFILE_SAMPLE_RATE <= 0
+        or request.url.path.startswith(UNPROFILED_PREFIXES)
+        or random.random() >= PROFILE_SAMPLE_RATE
+    ):
+        return await call_next(request)
+
+    profile = RequestProfile(request.method, request.url.path)
+    token = _current_profile.set(profile)
+    sampler = StackSampler(PROFILE_INTERVAL_MS / 1000, profile)
+    sampler.start()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Profile-Id"] = profile.profile_id
+        return response
+    finally:
+        stacks = sampler.stop()
+        _current_profile.reset(token)
+        try:
+            _write_profile(profile, stacks, status, (time.perf_counter() - profile.started) * 1000)
+        except OSError as e:
+            logging.warning(f"Could not write request profile {profile.profile_id}: {e}")
+
+
+def _claim_slow_query(name: str) -> bool:
+    """True at most once per ``SLOW_QUERY_COOLDOWN_S`` for each query name."""
+    now = time.monotonic()
+    with _slow_query_lock:
+        last = _slow_query_captured.get(name)
+        if last is not None and now - last < SLOW_QUERY_COOLDOWN_S:
+            return False
+        _slow_query_captured[name] = now
+        return True
+
+
+def capture_slow_query(cur, name: str, sql: str, params, duration_ms: float):
+    """Save the ``EXPLAIN`` plan of a query that ran slower than ``SLOW_QUERY_MS``."""
+    if SLOW_QUERY_MS <= 0 or duration_ms < SLOW_QUERY_MS or not _claim_slow_query(name):
+        return
+    try:
+        # A plain cursor, whatever cursor factory the caller used; only planned, never executed again
+        with cur.connection.cursor() as explain_cur:
+            explain_cur.execute(f"EXPLAIN {sql}", params)
+            plan = "\n".join(row[0] for row in explain_cur.fetchall())
+    except Exception as e:
+        logging.warning(f"Could not capture plan for slow query '{name}': {e}")
+        return
+
+    directory = os.path.join(profile_dir(), SLOW_QUERY_SUBDIR)
+    profile = _current_profile.get()
+    captured_at = datetime.now(timezone.utc)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{captured_at:%Y%m%dT%H%M%S%f}-{name}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "query": name,
+                "captured_at": captured_at.isoformat(),
+                "duration_ms": round(duration_ms, 3),
+                "profile_id": profile.profile_id if profile is not None else None,
+                "params": [str(param) for param in params] if params else [],
+                "sql": sql,
+                "plan": plan,
+            }, f, indent=2)
+        _prune(directory, ".json", PROFILE_KEEP)
+    except OSError as e:
+        logging.warning(f"Could not save plan for slow query '{name}': {e}")
+        return
+    logging.warning(f"Slow query '{name}' took {duration_ms:.0f} ms; plan saved to {path}.")
+
+
+def list_profiles(limit: int = 50) -> List[Dict]:
+    """Summaries of the most recent request profiles, newest first."""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    summaries = []
+    for name in sorted((n for n in os.listdir(directory) if n.endswith(".json")), reverse=True)[:limit]:
+        try:
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summaries.append({key: profile.get(key) for key in ("profile_id", "method", "path", "status", "duration_ms", "samples")})
+    return summaries
+
+
+def list_slow_queries(limit: int = 50) -> List[Dict]:
+    """The most recent slow-query captures, newest first."""
+    directory = os.path.join(profile_dir(), SLOW_QUERY_SUBDIR)
+    if not os.path.isdir(directory):
+        return []
+    captures = []
+    for name in sorted((n for n in os.listdir(directory) if n.endswith(".json")), reverse=True)[:limit]:
+        try:
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                captures.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return captures
+
+
+def profile_path(profile_id: str, suffix: str) -> Optional[str]:
+    """Path of a saved profile file, or None; ids are validated against the directory listing."""
+    directory = profile_dir()
+    name = f"{profile_id}{suffix}"
+    if not os.path.isdir(directory) or name not in os.listdir(directory):
+        return None
+    return os.path.join(directory, name)
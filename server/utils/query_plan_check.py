@@ -0,0 +1,81 @@
+"""
+Check that the rental-score query keeps using the spatial indexes.
+
+Runs EXPLAIN on ``RENTAL_SCORES_SQL`` and fails when the plan falls back
+to a sequential scan of one of the large spatial tables. Run it against a
+database with production-sized data (the planner will happily seq-scan a
+table of ten rows)::
+
+    cd server && uv run python -m utils.query_plan_check
+"""
+
+import sys
+import json
+import argparse
+import logging
+from typing import Dict, Iterator, List, Sequence
+
+from .convert_qol import RENTAL_SCORES_SQL
+from .db_connection import DatabaseConnection
+
+# Tables that must only be reached through an index
+SEQ_SCAN_FORBIDDEN = ("bus_stops", "open_street")
+
+
+def iter_plan_nodes(plan: Dict) -> Iterator[Dict]:
+    """Depth-first walk over an EXPLAIN (FORMAT JSON) plan tree."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+def find_seq_scans(plan: Dict, tables: Sequence[str]) -> List[str]:
+    """Tables among ``tables`` that the plan reads with a sequential scan."""
+    return sorted(
+        {
+            node["Relation Name"]
+            for node in iter_plan_nodes(plan)
+            if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in tables
+        }
+    )
+
+
+def explain(conn, query: str) -> Dict:
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (FORMAT JSON) " + query)
+        result = cur.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+def check_rental_score_plan(conn, forbidden: Sequence[str] = SEQ_SCAN_FORBIDDEN) -> List[str]:
+    """Tables the rental-score query scans sequentially although it should not."""
+    return find_seq_scans(explain(conn, RENTAL_SCORES_SQL), forbidden)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fail when the rental-score query plan uses sequential scans.")
+    parser.add_argument(
+        "--forbid",
+        nargs="+",
+        default=list(SEQ_SCAN_FORBIDDEN),
+        help="Tables that must not be read with a sequential scan.",
+    )
+    args = parser.parse_args()
+
+    with DatabaseConnection() as conn:
+        violations = check_rental_score_plan(conn, args.forbid)
+
+    if violations:
+        logging.error(
+            f"Rental-score query plan sequentially scans: {', '.join(violations)}. "
+            "Are the migrations in sql/migrations applied?"
+        )
+        return 1
+    logging.info("Rental-score query plan uses indexes for all checked tables.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
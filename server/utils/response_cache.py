@@ -0,0 +1,146 @@
+"""
+Single-flight, stale-while-revalidate cache for expensive endpoints.
+
+Concurrent misses for the same key share one computation instead of each
+hitting Postgres. Once an entry is older than its TTL it is still served
+for ``stale_ttl`` seconds while a single background task recomputes it.
+TTLs are set per route through ``CACHE_TTL_<NAME>`` and
+``CACHE_STALE_TTL_<NAME>`` environment variables.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Set
+
+from fastapi import HTTPException
+
+# Every cache by name, for the stats endpoint
+CACHES: Dict[str, "ResponseCache"] = {}
+
+
+class _Rejection(NamedTuple):
+    """A 4xx answer (e.g. no stops near a listing), cached and re-raised like a value."""
+
+    exception: HTTPException
+
+
+def _unwrap(value: Any) -> Any:
+    if isinstance(value, _Rejection):
+        raise value.exception
+    return value
+
+
+class ResponseCache:
+    def __init__(self, name: str, ttl: float, stale_ttl: float, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "revalidations": 0,
+            "rejections": 0,
+            "errors": 0,
+        }
+        CACHES[name] = self
+
+    @classmethod
+    def from_env(cls, name: str, ttl: float, stale_ttl: float, max_entries: int = 1024) -> "ResponseCache":
+        """Cache whose TTLs can be overridden by CACHE_TTL_<NAME> / CACHE_STALE_TTL_<NAME>."""
+        env_name = name.upper()
+        return cls(
+            name,
+            float(os.getenv(f"CACHE_TTL_{env_name}", ttl)),
+            float(os.getenv(f"CACHE_STALE_TTL_{env_name}", stale_ttl)),
+            max_entries,
+        )
+
+    async def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Cached value for ``key``; ``compute`` (blocking) runs in a worker thread when needed.
+
+        Fresh entries are returned directly. Stale entries are returned
+        while one background revalidation runs. On a miss the first caller
+        starts the computation and every concurrent caller awaits the same
+        result (or exception).
+
+        A 4xx ``HTTPException`` from ``compute`` is a normal answer: it is
+        cached like a value and re-raised to every caller, and counted as a
+        rejection rather than an error.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return _unwrap(value)
+            if age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self.stats["revalidations"] += 1
+                    self._start(key, compute)
+                return _unwrap(value)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = self._start(key, compute)
+        # Shielded so one disconnecting client does not cancel the work others wait for
+        return _unwrap(await asyncio.shield(task))
+
+    def _start(self, key: Hashable, compute: Callable[[], Any]) -> asyncio.Task:
+        task = asyncio.create_task(self._compute(key, compute))
+        self._inflight[key] = task
+        self._background.add(task)
+        task.add_done_callback(self._finished)
+        return task
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        try:
+            value = await asyncio.to_thread(compute)
+        except HTTPException as e:
+            if e.status_code >= 500:
+                self.stats["errors"] += 1
+                raise
+            self.stats["rejections"] += 1
+            value = _Rejection(e)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def _finished(self, task: asyncio.Task):
+        self._background.discard(task)
+        # Revalidations have no awaiting caller; log their failures here
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning(f"Cache '{self.name}' computation failed: {task.exception()}")
+
+    def snapshot_stats(self) -> Dict:
+        served = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hit_ratio": round((self.stats["hits"] + self.stats["stale_hits"]) / served, 4) if served else None,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+        }
@@ -0,0 +1,205 @@
+"""
+In-memory search over listing names, addresses, cities and zip codes.
+
+Built once per feature snapshot version. The four fields are lowercased
+and split into tokens; the distinct tokens are kept sorted and their
+listings stored as one CSR posting array, so every token starting with a
+prefix is a single contiguous slice found by two binary searches. Typos
+are matched through a trigram index over the token vocabulary (far smaller
+than the listings), scored like pg_trgm's ``similarity()``.
+
+A query matches the listings containing all of its tokens. Per query token
+a listing scores its best match: the whole token, then a prefix, then a
+similar spelling, and listings are ranked by the sum.
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Snapshot columns that are searched
+SEARCH_COLUMNS = ("listing_name", "address", "city", "zip_code")
+
+NON_TOKEN = r"[^0-9a-z]+"
+
+# Shorter query tokens only match whole tokens; "n" as a prefix matches half the index
+MIN_PREFIX_LENGTH = 2
+# Only alphabetic tokens this long are matched fuzzily; "1234" is not a typo of "1235"
+MIN_FUZZY_LENGTH = 3
+# pg_trgm's default similarity threshold
+FUZZY_THRESHOLD = 0.3
+# Similar tokens considered per query token, most similar first
+MAX_FUZZY_TOKENS = 20
+
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.8
+# Times the trigram similarity; always below PREFIX_WEIGHT
+FUZZY_WEIGHT = 0.6
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return re.sub(NON_TOKEN, " ", (text or "").lower()).split()
+
+
+def trigrams(token: str) -> set:
+    """pg_trgm style trigrams: the token padded with two spaces before and one after."""
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _fuzzy_candidate(token: str) -> bool:
+    return len(token) >= MIN_FUZZY_LENGTH and token.isalpha()
+
+
+class SearchIndex:
+    """Token prefix index plus a trigram index over the tokens of a snapshot's listings."""
+
+    def __init__(
+        self,
+        size: int,
+        vocab: List[str],
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        trigram_tokens: Dict[str, np.ndarray],
+        trigram_counts: np.ndarray,
+    ):
+        self.size = size
+        self.vocab = vocab
+        self.offsets = offsets
+        self.postings = postings
+        self.trigram_tokens = trigram_tokens
+        self.trigram_counts = trigram_counts
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> "SearchIndex":
+        """Index the rows of a feature snapshot table; hits are row positions in it."""
+        size = table.num_rows
+        text = pc.binary_join_element_wise(
+            *(table.column(column).combine_chunks() for column in SEARCH_COLUMNS),
+            " ",
+            null_handling="replace",
+            null_replacement="",
+        )
+        tokens = pc.utf8_split_whitespace(pc.replace_substring_regex(pc.utf8_lower(text), NON_TOKEN, " "))
+        rows = pc.list_parent_indices(tokens).to_numpy().astype(np.int64)
+        encoded = pc.list_flatten(tokens).dictionary_encode()
+
+        # Token ids in sorted order, so a prefix is a contiguous id range
+        vocab = np.array(encoded.dictionary.to_pylist(), dtype=object)
+        order = np.argsort(vocab, kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        token_ids = rank[encoded.indices.to_numpy(zero_copy_only=False)]
+
+        # One posting per (token, row), grouped by token
+        keys = np.sort(token_ids * max(size, 1) + rows)
+        keys = keys[np.diff(keys, prepend=-1) != 0]
+        token_ids, postings = np.divmod(keys, max(size, 1))
+        offsets = np.searchsorted(token_ids, np.arange(len(vocab) + 1))
+        vocab = vocab[order].tolist()
+
+        grams = defaultdict(list)
+        trigram_counts = np.zeros(len(vocab), dtype=np.int32)
+        for token_id, token in enumerate(vocab):
+            if _fuzzy_candidate(token):
+                token_grams = trigrams(token)
+                trigram_counts[token_id] = len(token_grams)
+                for gram in token_grams:
+                    grams[gram].append(token_id)
+        trigram_tokens = {gram: np.array(ids, dtype=np.int32) for gram, ids in grams.items()}
+
+        return cls(size, vocab, offsets, postings.astype(np.int32), trigram_tokens, trigram_counts)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index."""
+        total = self.offsets.nbytes + self.postings.nbytes + self.trigram_counts.nbytes
+        total += sum(len(token) for token in self.vocab)
+        return total + sum(ids.nbytes for ids in self.trigram_tokens.values())
+
+    def _rows(self, first: int, last: int) -> np.ndarray:
+        """Rows containing any token with an id in ``[first, last)``."""
+        return self.postings[self.offsets[first] : self.offsets[last]]
+
+    def similar_tokens(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(token ids, similarity) of the vocabulary tokens most similar to ``token``."""
+        if not _fuzzy_candidate(token):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        grams = trigrams(token)
+        matches = [self.trigram_tokens[gram] for gram in grams if gram in self.trigram_tokens]
+        if not matches:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        shared = np.bincount(np.concatenate(matches), minlength=len(self.vocab))
+        candidates = np.flatnonzero(shared)
+        shared = shared[candidates]
+        similarity = shared / (len(grams) + self.trigram_counts[candidates] - shared)
+        keep = similarity >= FUZZY_THRESHOLD
+        candidates, similarity = candidates[keep], similarity[keep]
+        top = np.argsort(-similarity, kind="stable")[:MAX_FUZZY_TOKENS]
+        return candidates[top], similarity[top]
+
+    def token_scores(self, token: str) -> np.ndarray:
+        """Best match score of ``token`` for every row; 0 where it does not match."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        first = bisect_left(self.vocab, token)
+        exact = first < len(self.vocab) and self.vocab[first] == token
+
+        # Weakest matches first, so a row keeps the score of its best match
+        token_ids, similarity = self.similar_tokens(token)
+        weights = np.round(FUZZY_WEIGHT * similarity, 2)
+        for weight in np.unique(weights):
+            rows = [self._rows(token_id, token_id + 1) for token_id in token_ids[weights == weight]]
+            scores[np.concatenate(rows)] = weight
+        if len(token) >= MIN_PREFIX_LENGTH:
+            # Tokens are ASCII, so this sorts after every token with the prefix
+            last = bisect_left(self.vocab, token + "\x7f", first)
+            scores[self._rows(first, last)] = PREFIX_WEIGHT
+        if exact:
+            scores[self._rows(first, first + 1)] = EXACT_WEIGHT
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """(row positions, scores) of the best ``limit`` rows matching every token of ``query``, best first."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self.size:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        total = np.zeros(self.size, dtype=np.float32)
+        matched = np.ones(self.size, dtype=bool)
+        for token in tokens:
+            scores = self.token_scores(token)
+            matched &= scores > 0
+            total += scores
+
+        rows = np.flatnonzero(matched)
+        if len(rows) > limit:
+            rows = rows[np.argpartition(-total[rows], limit - 1)[:limit]]
+        # Best score first, ties in snapshot (listing id) order
+        rows = rows[np.lexsort((rows, -total[rows]))]
+        return rows, total[rows]
+
+
+_index_lock = threading.Lock()
+# Index of the current snapshot, shared by the routes in this process
+_index: Tuple[Optional[int], Optional[SearchIndex]] = (None, None)
+
+
+def get_search_index(snapshot) -> SearchIndex:
+    """The search index of ``snapshot``, built on first use of each snapshot version."""
+    global _index
+    version = snapshot.manifest["version"]
+    if _index[0] != version:
+        with _index_lock:
+            # Another request may have built it while this one waited
+            if _index[0] != version:
+                _index = (version, SearchIndex.from_arrow(snapshot.table))
+    return _index[1]
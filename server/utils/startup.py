@@ -0,0 +1,124 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+
+from .feature_snapshot import build_snapshot, get_reader, try_acquire_refresher_lock
+from .search_index import get_search_index
+
+# Seconds between background snapshot rebuilds from Postgres (0 disables them)
+SNAPSHOT_REFRESH_SECONDS = int(os.getenv("SNAPSHOT_REFRESH_SECONDS", "3600"))
+
+# Let the first requests after boot go out before hitting Postgres
+STARTUP_REFRESH_DELAY_SECONDS = 5
+
+
+def process_start_time() -> float:
+    """Wall-clock start of this process from /proc; falls back to now elsewhere."""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+async def warm_search_index(snapshot):
+    """Build the search index of ``snapshot`` in a thread so the first search does not wait for it."""
+    started = time.perf_counter()
+    try:
+        index = await asyncio.to_thread(get_search_index, snapshot)
+    except Exception as e:
+        logging.warning(f"Building the search index failed: {e}")
+        return
+    logging.info(
+        f"Search index for snapshot v{snapshot.manifest['version']} ready ({len(index.vocab)} tokens, "
+        f"{index.nbytes / 2**20:.1f} MiB) in {(time.perf_counter() - started) * 1000:.0f} ms."
+    )
+
+
+def _snapshot_age_seconds(manifest) -> float:
+    try:
+        created_at = datetime.fromisoformat(manifest["created_at"])
+    except (KeyError, TypeError, ValueError):
+        return float("inf")
+    return (datetime.now(timezone.utc) - created_at).total_seconds()
+
+
+async def refresh_snapshot_periodically(interval: int, first_delay: float):
+    """
+    Rebuild the feature snapshot from Postgres every ``interval`` seconds.
+
+    With several workers only the one holding the refresher lock queries
+    Postgres; the others re-map whatever it publishes and retry the lock
+    each interval in case the refresher exits.
+    """
+    await asyncio.sleep(first_delay)
+    refresher_lock = None
+    indexed_version = None
+    while True:
+        if refresher_lock is None:
+            refresher_lock = try_acquire_refresher_lock(get_reader().directory)
+            if refresher_lock is not None:
+                logging.info(f"Worker {os.getpid()} is the feature snapshot refresher.")
+        if refresher_lock is not None:
+            try:
+                manifest = await asyncio.to_thread(build_snapshot, get_reader().directory, "server-refresh")
+                logging.info(f"Background refresh published feature snapshot v{manifest['version']}.")
+            except Exception as e:
+                logging.warning(f"Background feature snapshot refresh failed: {e}")
+        snapshot = get_reader().current()
+        if snapshot is not None and snapshot.manifest["version"] != indexed_version:
+            indexed_version = snapshot.manifest["version"]
+            await warm_search_index(snapshot)
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Map the feature snapshot before serving and keep it fresh in the background."""
+    app.state.process_started_at = process_start_time()
+    app.state.first_byte_logged = False
+
+    started = time.perf_counter()
+    snapshot = get_reader().current()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if snapshot is not None:
+        logging.info(
+            f"Mapped feature snapshot v{snapshot.manifest['version']} "
+            f"({snapshot.table.num_rows} listings) in {elapsed_ms:.1f} ms."
+        )
+        # Referenced from app state so the task is not collected mid-build
+        app.state.search_index_task = asyncio.create_task(warm_search_index(snapshot))
+    else:
+        logging.warning("No feature snapshot found; serving from Postgres until one is published.")
+
+    refresh_task = None
+    if SNAPSHOT_REFRESH_SECONDS > 0:
+        # A snapshot baked in recently enough waits for its regular refresh
+        age = _snapshot_age_seconds(snapshot.manifest) if snapshot is not None else float("inf")
+        first_delay = max(STARTUP_REFRESH_DELAY_SECONDS, SNAPSHOT_REFRESH_SECONDS - age)
+        refresh_task = asyncio.create_task(refresh_snapshot_periodically(SNAPSHOT_REFRESH_SECONDS, first_delay))
+
+    logging.info(f"Server ready {(time.time() - app.state.process_started_at) * 1000:.0f} ms after process start.")
+    yield
+
+    if refresh_task is not None:
+        refresh_task.cancel()
+
+
+async def log_time_to_first_byte(request: Request, call_next):
+    """HTTP middleware: log how long after process start the first response went out."""
+    response = await call_next(request)
+    app = request.app
+    if not getattr(app.state, "first_byte_logged", True):
+        app.state.first_byte_logged = True
+        ttfb_ms = (time.time() - app.state.process_started_at) * 1000
+        logging.info(f"Time to first byte: {ttfb_ms:.0f} ms after process start ({request.url.path}).")
+    return response
@@ -38,6 +38,27 @@ CREATE TABLE public.rental_clusters (
 );
 ALTER TABLE public.rental_clusters
 ADD CONSTRAINT rental_clusters_pkey PRIMARY KEY (cluster_id);
+--CLUSTER_RECLUSTER_QUEUE
+CREATE TABLE public.cluster_recluster_queue (
+    listing_db_id integer NOT NULL,
+    nearest_cluster_id integer NULL,
+    distance_km double precision NULL,
+    flagged_at timestamp with time zone NOT NULL DEFAULT now()
+);
+ALTER TABLE public.cluster_recluster_queue
+ADD CONSTRAINT cluster_recluster_queue_pkey PRIMARY KEY (listing_db_id);
+--CLUSTER_MODEL_VERSIONS
+CREATE TABLE public.cluster_model_versions (
+    version serial NOT NULL,
+    created_at timestamp with time zone NOT NULL DEFAULT now(),
+    data_hash text NULL,
+    n_clusters integer NOT NULL,
+    n_listings integer NOT NULL,
+    params jsonb NULL,
+    is_current boolean NOT NULL DEFAULT false
+);
+ALTER TABLE public.cluster_model_versions
+ADD CONSTRAINT cluster_model_versions_pkey PRIMARY KEY (version);
 --PLACE_REVIEW
 CREATE TABLE public.place_review (
     id serial NOT NULL,
@@ -77,6 +98,9 @@ CREATE TABLE public.listing_clusters (
 );
 ALTER TABLE public.listing_clusters
 ADD CONSTRAINT listing_clusters_pkey PRIMARY KEY (assignment_id);
+ALTER TABLE public.listing_clusters
+ADD CONSTRAINT listing_clusters_listing_db_id_key UNIQUE (listing_db_id);
+CREATE INDEX listing_clusters_cluster_id_idx ON public.listing_clusters (cluster_id);
 --GEO_NWI
 CREATE TABLE public.geo_nwi (
     geo_id text NOT NULL,
@@ -0,0 +1,35 @@
+-- Tables used by incremental assignment and atomic cluster publishing
+CREATE TABLE IF NOT EXISTS public.cluster_recluster_queue (
+    listing_db_id integer NOT NULL,
+    nearest_cluster_id integer NULL,
+    distance_km double precision NULL,
+    flagged_at timestamp with time zone NOT NULL DEFAULT now(),
+    CONSTRAINT cluster_recluster_queue_pkey PRIMARY KEY (listing_db_id)
+);
+CREATE TABLE IF NOT EXISTS public.cluster_model_versions (
+    version serial NOT NULL,
+    created_at timestamp with time zone NOT NULL DEFAULT now(),
+    data_hash text NULL,
+    n_clusters integer NOT NULL,
+    n_listings integer NOT NULL,
+    params jsonb NULL,
+    is_current boolean NOT NULL DEFAULT false,
+    CONSTRAINT cluster_model_versions_pkey PRIMARY KEY (version)
+);
+
+-- Appending reruns of the clustering notebook duplicated assignments; keep the newest per listing
+DELETE FROM public.listing_clusters lc
+USING public.listing_clusters newer
+WHERE lc.listing_db_id = newer.listing_db_id
+  AND lc.assignment_id < newer.assignment_id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'listing_clusters_listing_db_id_key'
+    ) THEN
+        ALTER TABLE public.listing_clusters
+        ADD CONSTRAINT listing_clusters_listing_db_id_key UNIQUE (listing_db_id);
+    END IF;
+END $$;
+CREATE INDEX IF NOT EXISTS listing_clusters_cluster_id_idx ON public.listing_clusters (cluster_id);
@@ -0,0 +1,12 @@
+-- GiST indexes backing ST_DWithin and the KNN (<->) lookups
+CREATE INDEX IF NOT EXISTS rental_listings_geom_idx ON public.rental_listings USING gist (geom);
+CREATE INDEX IF NOT EXISTS bus_stops_geom_idx ON public.bus_stops USING gist (geom);
+CREATE INDEX IF NOT EXISTS open_street_geom_idx ON public.open_street USING gist (geom);
+-- Nearest-park lookups only ever search parks
+CREATE INDEX IF NOT EXISTS open_street_parks_geom_idx ON public.open_street USING gist (geom)
+WHERE leisure = 'park';
+
+-- Join keys of the rental score query
+CREATE INDEX IF NOT EXISTS listings_geo_listing_db_id_idx ON public.listings_geo (listing_db_id);
+CREATE INDEX IF NOT EXISTS place_review_listing_id_idx ON public.place_review (listing_id);
+CREATE INDEX IF NOT EXISTS open_street_leisure_idx ON public.open_street (leisure);
@@ -0,0 +1,17 @@
+-- Precomputed geography points so ST_DWithin/ST_Distance work in meters without per-row casts
+ALTER TABLE public.rental_listings
+ADD COLUMN IF NOT EXISTS geog geography (Point, 4326) GENERATED ALWAYS AS (geom::geography) STORED;
+ALTER TABLE public.bus_stops
+ADD COLUMN IF NOT EXISTS geog geography (Point, 4326) GENERATED ALWAYS AS (geom::geography) STORED;
+ALTER TABLE public.open_street
+ADD COLUMN IF NOT EXISTS geog geography (Point, 4326) GENERATED ALWAYS AS (geom::geography) STORED;
+
+CREATE INDEX IF NOT EXISTS rental_listings_geog_idx ON public.rental_listings USING gist (geog);
+CREATE INDEX IF NOT EXISTS bus_stops_geog_idx ON public.bus_stops USING gist (geog);
+CREATE INDEX IF NOT EXISTS open_street_geog_idx ON public.open_street USING gist (geog);
+CREATE INDEX IF NOT EXISTS open_street_parks_geog_idx ON public.open_street USING gist (geog)
+WHERE leisure = 'park';
+
+ANALYZE public.rental_listings;
+ANALYZE public.bus_stops;
+ANALYZE public.open_street;
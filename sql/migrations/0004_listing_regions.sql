@@ -0,0 +1,106 @@
+-- Region registry: which states/counties/cities make up each metro we serve
+CREATE TABLE IF NOT EXISTS public.regions (
+    region_id serial NOT NULL,
+    name text NOT NULL,
+    in_scope boolean NOT NULL DEFAULT true,
+    CONSTRAINT regions_pkey PRIMARY KEY (region_id),
+    CONSTRAINT regions_name_key UNIQUE (name)
+);
+-- An area matches a listing on state, and on county and city when those are set
+CREATE TABLE IF NOT EXISTS public.region_areas (
+    area_id serial NOT NULL,
+    region_id integer NOT NULL REFERENCES public.regions (region_id) ON DELETE CASCADE,
+    state character varying(2) NOT NULL,
+    county text NULL,
+    city text NULL,
+    CONSTRAINT region_areas_pkey PRIMARY KEY (area_id)
+);
+CREATE INDEX IF NOT EXISTS region_areas_state_idx ON public.region_areas (state);
+
+-- The study area previously spelled out as an OR-predicate in every query
+INSERT INTO public.regions (name, in_scope) VALUES ('DMV', true)
+ON CONFLICT (name) DO NOTHING;
+INSERT INTO public.region_areas (region_id, state, county, city)
+SELECT r.region_id, a.state, a.county, a.city
+FROM public.regions r
+CROSS JOIN (
+    VALUES
+        ('DC', NULL, NULL),
+        ('MD', 'Montgomery', NULL),
+        ('MD', 'Prince George''s', NULL),
+        ('VA', 'Arlington', NULL),
+        ('VA', 'Fairfax', NULL),
+        ('VA', 'Loudoun', NULL),
+        ('VA', NULL, 'Alexandria'),
+        ('VA', NULL, 'Fairfax'),
+        ('VA', NULL, 'Falls Church')
+) AS a (state, county, city)
+WHERE r.name = 'DMV'
+  AND NOT EXISTS (SELECT 1 FROM public.region_areas ra WHERE ra.region_id = r.region_id);
+
+ALTER TABLE public.rental_listings
+ADD COLUMN IF NOT EXISTS region_id integer NULL REFERENCES public.regions (region_id) ON DELETE SET NULL;
+ALTER TABLE public.rental_listings
+ADD COLUMN IF NOT EXISTS in_scope boolean NOT NULL DEFAULT false;
+
+CREATE OR REPLACE FUNCTION public.listing_region(p_state text, p_county text, p_city text)
+RETURNS integer
+LANGUAGE sql STABLE AS $$
+    SELECT ra.region_id
+    FROM public.region_areas ra
+    WHERE ra.state = p_state
+      AND (ra.county IS NULL OR ra.county = p_county)
+      AND (ra.city IS NULL OR ra.city = p_city)
+    -- Most specific area wins
+    ORDER BY (ra.county IS NOT NULL)::int + (ra.city IS NOT NULL)::int DESC, ra.area_id
+    LIMIT 1
+$$;
+
+-- Keeps region_id/in_scope current for every imported or edited listing
+CREATE OR REPLACE FUNCTION public.rental_listings_set_region()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.region_id := public.listing_region(NEW.state, NEW.county, NEW.city);
+    NEW.in_scope := COALESCE(
+        (SELECT r.in_scope FROM public.regions r WHERE r.region_id = NEW.region_id),
+        false
+    );
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS rental_listings_set_region ON public.rental_listings;
+CREATE TRIGGER rental_listings_set_region
+BEFORE INSERT OR UPDATE OF state, county, city ON public.rental_listings
+FOR EACH ROW EXECUTE FUNCTION public.rental_listings_set_region();
+
+-- Re-derive every listing's region after editing regions/region_areas; returns the rows changed
+CREATE OR REPLACE FUNCTION public.refresh_listing_regions()
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    changed integer;
+BEGIN
+    UPDATE public.rental_listings rl
+    SET region_id = m.region_id,
+        in_scope = COALESCE(r.in_scope, false)
+    FROM (
+        SELECT listing_db_id, public.listing_region(state, county, city) AS region_id
+        FROM public.rental_listings
+    ) m
+    LEFT JOIN public.regions r ON r.region_id = m.region_id
+    WHERE rl.listing_db_id = m.listing_db_id
+      AND (rl.region_id IS DISTINCT FROM m.region_id OR rl.in_scope IS DISTINCT FROM COALESCE(r.in_scope, false));
+    GET DIAGNOSTICS changed = ROW_COUNT;
+    RETURN changed;
+END
+$$;
+
+SELECT public.refresh_listing_regions();
+
+CREATE INDEX IF NOT EXISTS rental_listings_region_id_idx ON public.rental_listings (region_id);
+-- Queries filter on in_scope alone; the partial index holds only served listings
+CREATE INDEX IF NOT EXISTS rental_listings_in_scope_idx ON public.rental_listings (listing_db_id)
+WHERE in_scope;
+ANALYZE public.rental_listings;
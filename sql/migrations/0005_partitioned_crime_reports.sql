@@ -0,0 +1,39 @@
+-- crime_reports keyed by CCN (DC's incident number) and partitioned by report month.
+-- Rows loaded before CCN was kept cannot be deduplicated; they stay in crime_reports_legacy
+-- until dropped by hand. Reload them with crime_reports_import.py.
+ALTER TABLE IF EXISTS public.crime_reports RENAME TO crime_reports_legacy;
+ALTER TABLE IF EXISTS public.crime_reports_legacy RENAME CONSTRAINT crime_reports_pkey TO crime_reports_legacy_pkey;
+
+CREATE TABLE public.crime_reports (
+    ccn text NOT NULL,
+    name text NULL,
+    date timestamp without time zone NOT NULL,
+    shift text NULL,
+    method text NULL,
+    lat double precision NOT NULL,
+    lon double precision NOT NULL,
+    geom geometry (Point, 4326) NULL,
+    -- The partition key has to be part of every unique constraint
+    CONSTRAINT crime_reports_pkey PRIMARY KEY (ccn, date)
+) PARTITION BY RANGE (date);
+-- Finds a CCN whose report date moved to another partition
+CREATE INDEX crime_reports_ccn_idx ON public.crime_reports (ccn);
+CREATE INDEX crime_reports_geom_idx ON public.crime_reports USING gist (geom);
+
+-- Monthly partitions are created on demand by the importer
+CREATE OR REPLACE FUNCTION public.ensure_crime_reports_partition(month date)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    first_day date := date_trunc('month', month)::date;
+    partition_name text := format('crime_reports_y%sm%s', to_char(first_day, 'YYYY'), to_char(first_day, 'MM'));
+BEGIN
+    -- Parallel loaders may ask for the same month at once
+    PERFORM pg_advisory_xact_lock(hashtext('public.crime_reports partitions'));
+    IF to_regclass(format('public.%I', partition_name)) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.crime_reports FOR VALUES FROM (%L) TO (%L)',
+            partition_name, first_day, (first_day + interval '1 month')::date
+        );
+    END IF;
+END;
+$$;
@@ -0,0 +1,9 @@
+-- WMATA routes serving each stop, as listed in the stop export ("96", "96*2", ...).
+-- line is the route without the "*N" variant suffix, so variants count as one route.
+CREATE TABLE IF NOT EXISTS public.bus_stop_routes (
+    stop_id integer NOT NULL REFERENCES public.bus_stops (id) ON DELETE CASCADE,
+    route text NOT NULL,
+    line text GENERATED ALWAYS AS (split_part(route, '*', 1)) STORED,
+    CONSTRAINT bus_stop_routes_pkey PRIMARY KEY (stop_id, route)
+);
+CREATE INDEX IF NOT EXISTS bus_stop_routes_line_idx ON public.bus_stop_routes (line);